@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from Scraper.csr_graph import CsrGraph, load_csr_graph
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Scraper/Output_Graph_Json/dom_graph.json"        # ← change as needed
+OUTPUT_STRUCTURE = "Embedding/Output_Embeddings/structural_embeddings.npz"
+
+DIM = 64                 # vector size (capped by the number of distinct walk features)
+WALKS_PER_NODE = 10
+WALK_LENGTH = 12
+CHUNK_NODES = 100_000    # start nodes per batch of walks (bounds memory)
+SEED = 0
+
+# Edges walks may follow (both ways). Tree edges move the walker one level
+# down (out) or up (in); link edges keep its level.
+TREE_RELATIONS = ("CONTAINS", "CONTAINS_DATA")
+LINK_RELATIONS = ("LINKS_TO_PAGE", "LINKS_TO_EXTERNAL_PAGE")
+
+STRUCTURE_WEIGHT = 0.3   # share of structural similarity in hybrid_similarity
+
+
+# ============================================================
+# 2. WALK GRAPH
+# ============================================================
+
+def node_features(G):
+    """(feature code per node, feature names): the tag, or the type for non-DOM nodes."""
+    tags = dict(G.nodes(data="tag"))
+    names = [tags.get(node) or ntype or "?" for node, ntype in G.nodes(data="type")]
+    vocabulary, codes = np.unique(np.array(names, dtype=object).astype(str), return_inverse=True)
+    return codes.astype(np.int32), list(vocabulary)
+
+
+def walk_adjacency(G):
+    """
+    Undirected CSR over the walkable edges: (ptr, neighbour, level step),
+    step = +1 to a child, -1 to a parent, 0 along a link.
+    CsrGraph is read straight from its arrays; other graphs through G.edges.
+    """
+    if isinstance(G, CsrGraph):
+        n = len(G.ids.state)
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(G.out_ptr))
+        dst = G.edge_dst.astype(np.int64)
+        names = np.array(G.relations + [None], dtype=object)[:-1]
+        relation = names[G.edge_rel]
+    else:
+        row = {node: i for i, node in enumerate(G.nodes)}
+        n = len(row)
+        edges = [(row[u], row[v], rel) for u, v, rel in G.edges(data="relation")]
+        src = np.fromiter((u for u, _, _ in edges), dtype=np.int64, count=len(edges))
+        dst = np.fromiter((v for _, v, _ in edges), dtype=np.int64, count=len(edges))
+        relation = np.array([rel for _, _, rel in edges] + [None], dtype=object)[:-1]
+
+    tree = np.isin(relation, TREE_RELATIONS)
+    keep = tree | np.isin(relation, LINK_RELATIONS)
+    src, dst, down = src[keep], dst[keep], tree[keep].astype(np.int8)
+
+    both_src = np.concatenate([src, dst])
+    both_dst = np.concatenate([dst, src])
+    step = np.concatenate([down, -down])
+    order = np.argsort(both_src, kind="stable")
+
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(both_src, minlength=n), out=ptr[1:])
+    return ptr, both_dst[order].astype(np.int32), step[order]
+
+
+# ============================================================
+# 3. WALKS → FEATURE COUNTS
+# ============================================================
+
+def walk_counts(ptr, neighbour, step, features, n_features,
+                walks=WALKS_PER_NODE, length=WALK_LENGTH, chunk=CHUNK_NODES, seed=SEED):
+    """
+    Sparse node × (feature, relative level) counts from uniform random walks.
+    All walks of a chunk of start nodes advance together, one NumPy step at
+    a time; each visited node adds its feature at the walker's level
+    relative to the start (clipped to ±length). Nodes without walkable
+    edges only count themselves.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(ptr) - 1
+    levels = 2 * length + 1
+    degree = np.diff(ptr)
+    parts = []
+
+    for first in range(0, n, chunk):
+        starts = np.repeat(np.arange(first, min(first + chunk, n), dtype=np.int64), walks)
+        current = starts.copy()
+        level = np.zeros(len(starts), dtype=np.int64)
+        keys = [starts * (n_features * levels) + features[starts] * levels + length]
+
+        for _ in range(length):
+            d = degree[current]
+            moving = d > 0
+            pick = ptr[current] + (rng.random(len(current)) * d).astype(np.int64)
+            pick = np.where(moving, pick, 0)
+            current = np.where(moving, neighbour[pick] if len(neighbour) else current, current)
+            level = np.clip(level + np.where(moving, step[pick] if len(step) else 0, 0), -length, length)
+            keys.append(starts * (n_features * levels) + features[current] * levels + level + length)
+
+        unique, counts = np.unique(np.concatenate(keys), return_counts=True)
+        parts.append((unique, counts))
+
+    unique = np.concatenate([u for u, _ in parts])
+    counts = np.concatenate([c for _, c in parts]).astype(np.float64)
+    rows, cols = np.divmod(unique, n_features * levels)
+    return sp.csr_matrix((counts, (rows, cols)), shape=(n, n_features * levels))
+
+
+# ============================================================
+# 4. FACTORIZATION
+# ============================================================
+
+def ppmi(M):
+    """Positive pointwise mutual information of a sparse count matrix (common features weigh little)."""
+    M = M.tocoo()
+    total = M.data.sum()
+    row_sum = np.asarray(M.sum(axis=1)).ravel()
+    col_sum = np.asarray(M.sum(axis=0)).ravel()
+    pmi = np.log(M.data * total / (row_sum[M.row] * col_sum[M.col]))
+    keep = pmi > 0
+    return sp.csr_matrix((pmi[keep], (M.row[keep], M.col[keep])), shape=M.shape)
+
+
+def factorize(M, dim=DIM):
+    """
+    Rank-dim SVD of a tall sparse matrix through the small feature × feature
+    Gram matrix: U·sqrt(S) = M·V / sqrt(S), rows L2-normalized.
+    """
+    used = np.unique(M.indices)
+    M = M[:, used]
+    gram = (M.T @ M).toarray()
+    values, vectors = np.linalg.eigh(gram)
+    top = np.argsort(values)[::-1][:min(dim, len(values))]
+    top = top[values[top] > 1e-9]
+    vectors = vectors[:, top] / np.sqrt(np.sqrt(values[top]))
+
+    emb = np.zeros((M.shape[0], dim), dtype=np.float32)
+    emb[:, :len(top)] = M @ vectors
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb / np.where(norms > 0, norms, 1)
+
+
+def structural_embeddings(G, dim=DIM, walks=WALKS_PER_NODE, length=WALK_LENGTH, seed=SEED):
+    """
+    One vector per node of G (rows in G's node order) describing its role
+    in the page layout rather than its text: which tags lie how many levels
+    above and below it, and where its links go. Two nav bars or two product
+    cards on different pages get similar vectors, a nav bar and an article
+    don't. G may be a networkx graph, a CsrGraph or a SqliteGraph.
+    """
+    features, vocabulary = node_features(G)
+    ptr, neighbour, step = walk_adjacency(G)
+    counts = walk_counts(ptr, neighbour, step, features, len(vocabulary), walks, length, seed=seed)
+    return factorize(ppmi(counts), dim)
+
+
+def hybrid_similarity(text_vectors, structure_vectors, i, weight=STRUCTURE_WEIGHT):
+    """Similarity of every node to node row i, blending text and structure cosine similarity."""
+    text = text_vectors @ text_vectors[i] if text_vectors is not None else 0
+    return (1 - weight) * text + weight * (structure_vectors @ structure_vectors[i])
+
+
+# ============================================================
+# 5. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Structural node embeddings from random walks.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE,
+                            help="node-link JSON or a CSR directory (Scraper/csr_graph.py)")
+    arg_parser.add_argument("-o", "--output", default=OUTPUT_STRUCTURE)
+    arg_parser.add_argument("--dim", type=int, default=DIM)
+    arg_parser.add_argument("--walks", type=int, default=WALKS_PER_NODE)
+    arg_parser.add_argument("--length", type=int, default=WALK_LENGTH)
+    arg_parser.add_argument("--similar", metavar="NODE", help="print the nodes most similar in structure")
+    arg_parser.add_argument("--top", type=int, default=10)
+    args = arg_parser.parse_args(argv)
+
+    started = time.perf_counter()
+    G = load_csr_graph(args.graph)
+    loaded = time.perf_counter()
+    vectors = structural_embeddings(G, args.dim, args.walks, args.length)
+    took = time.perf_counter() - loaded
+
+    ids = list(G.nodes)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    tmp_file = args.output + ".tmp.npz"
+    np.savez(tmp_file, ids=np.array(ids, dtype=object).astype(str), vectors=vectors)
+    os.replace(tmp_file, args.output)
+    print(f"Embedded {len(ids)} nodes ({vectors.shape[1]} dims) in {took:.2f}s "
+          f"(+{loaded - started:.2f}s loading) → {args.output}")
+
+    if args.similar:
+        i = ids.index(args.similar)
+        sims = hybrid_similarity(None, vectors, i, weight=1.0)
+        for j in np.argsort(-sims)[:args.top + 1]:
+            if j != i:
+                attrs = G.nodes[ids[j]]
+                print(f"  {sims[j]:.3f}  {ids[j]}  <{attrs.get('tag') or attrs.get('type')}>")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,12 @@ with open(GRAPH_FILE, "r", encoding="utf-8") as f:
 
 G = nx.node_link_graph(graph_data, edges="links")
 
+# Page_File nodes by title, for get_page_file_node (built once, not scanned per lookup)
+PAGE_FILES_BY_TITLE = {}
+for _n, _data in G.nodes(data=True):
+    if _data.get("type") == "Page_File":
+        PAGE_FILES_BY_TITLE.setdefault(_data.get("title"), _n)
+
 
 # ============================================================
 # HELPERS
@@ -58,10 +64,7 @@ def get_page_file_node(page_name):
     if page_name in G.nodes and G.nodes[page_name].get("type") == "Page_File":
         return page_name
     # fallback: search by attribute
-    for n, data in G.nodes(data=True):
-        if data.get("type") == "Page_File" and data.get("title") == page_name:
-            return n
-    return None
+    return PAGE_FILES_BY_TITLE.get(page_name)
 
 
 def get_heading_context(node):
@@ -0,0 +1,178 @@
+import os
+import re
+import sys
+import json
+import argparse
+from collections import Counter
+
+from graph_diff import load_graph, TREE_RELATIONS
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"          # ← change as needed
+ANCHOR_REPORT = "Output_Graph_Json/inbound_anchors.json"
+
+WORD_RE = re.compile(r"\w+")
+
+
+def clean_anchor(text):
+    return " ".join((text or "").split())
+
+
+# ============================================================
+# 2. INDEX
+# ============================================================
+
+class AnchorIndex:
+    """
+    Inverted index from every linked page to the links pointing at it:
+    how many, with which anchor texts and from which pages, e.g.
+        inbound("faq.html") → {"links": 14, "anchors": Counter({"FAQ": 12, ...}),
+                               "sources": Counter({"index.html": 1, ...})}
+    It remembers what each source page contributed, so re-parsing or
+    removing one page only re-counts that page's links (update_page /
+    remove_page); the parser does both as it builds.
+    """
+
+    def __init__(self, G):
+        self.G = G
+        self.rebuild()
+
+    def clear(self):
+        self.pages = {}          # target page -> {"links", "anchors", "sources"}
+        self.contributed = {}    # source page -> [(target, anchor), ...]
+
+    def rebuild(self):
+        """Index every LINKS_TO_PAGE edge of G from scratch (one pass over the edges)."""
+        self.clear()
+        for u, v, attrs in self.G.edges(data=True):
+            if attrs.get("relation") == "LINKS_TO_PAGE":
+                source = self.G.nodes[u].get("page") or u
+                self.contributed.setdefault(source, []).append((v, clean_anchor(attrs.get("anchor"))))
+        for source, links in self.contributed.items():
+            for target, anchor in links:
+                self._count(source, target, anchor, 1)
+
+    def _count(self, source, target, anchor, sign):
+        entry = self.pages.get(target)
+        if entry is None:
+            entry = self.pages[target] = {"links": 0, "anchors": Counter(), "sources": Counter()}
+        entry["links"] += sign
+        for field, key in (("anchors", anchor), ("sources", source)):
+            entry[field][key] += sign
+            if entry[field][key] <= 0:
+                del entry[field][key]
+        if entry["links"] <= 0:
+            del self.pages[target]
+
+    def remove_page(self, page):
+        """
+        Take back the links page contributed. If the page node itself has
+        left G, the links other pages had to it went with it: drop those too.
+        """
+        for target, anchor in self.contributed.pop(page, ()):
+            self._count(page, target, anchor, -1)
+
+        entry = self.pages.get(page)
+        if entry is not None and page not in self.G:
+            for source in entry["sources"]:
+                self.contributed[source] = [link for link in self.contributed[source] if link[0] != page]
+                if not self.contributed[source]:
+                    del self.contributed[source]
+            del self.pages[page]
+
+    def update_page(self, page, nodes=None):
+        """Re-count the links of one page; nodes = its tree if the caller already has it."""
+        self.remove_page(page)
+        if page not in self.G:
+            return
+        if nodes is None:
+            nodes, stack = [], [page]
+            while stack:
+                children = [v for _, v, rel in self.G.out_edges(stack.pop(), data="relation")
+                            if rel in TREE_RELATIONS]
+                nodes.extend(children)
+                stack.extend(children)
+
+        links = [
+            (v, clean_anchor(attrs.get("anchor")))
+            for node in nodes
+            for _, v, attrs in self.G.out_edges(node, data=True)
+            if attrs.get("relation") == "LINKS_TO_PAGE"
+        ]
+        if links:
+            self.contributed[page] = links
+            for target, anchor in links:
+                self._count(page, target, anchor, 1)
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def inbound(self, page):
+        """{"links", "anchors": Counter, "sources": Counter} for page (empty if nothing links to it)."""
+        return self.pages.get(page) or {"links": 0, "anchors": Counter(), "sources": Counter()}
+
+    def vocabulary(self, page):
+        """Lower-cased words of the page's inbound anchors, weighted by how often they link to it."""
+        words = Counter()
+        for anchor, n in self.inbound(page)["anchors"].items():
+            for word in WORD_RE.findall(anchor.lower()):
+                words[word] += n
+        return words
+
+    def report(self):
+        """Every linked page, most linked first, as plain JSON-ready dicts."""
+        rows = []
+        for page, entry in self.pages.items():
+            rows.append({
+                "page": page,
+                "links": entry["links"],
+                "source_pages": len(entry["sources"]),
+                "anchors": entry["anchors"].most_common(),
+                "sources": entry["sources"].most_common(),
+            })
+        rows.sort(key=lambda r: (-r["links"], r["page"]))
+        return rows
+
+    def write_report(self, path=ANCHOR_REPORT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, path)
+
+
+# ============================================================
+# 3. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="How pages of a DOM graph are described by the pages linking to them.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE)
+    arg_parser.add_argument("--page", help="print one page's inbound links and vocabulary")
+    arg_parser.add_argument("-o", "--output", default=ANCHOR_REPORT)
+    args = arg_parser.parse_args(argv)
+
+    index = AnchorIndex(load_graph(args.graph))
+
+    if args.page:
+        entry = index.inbound(args.page)
+        print(f"{args.page}: {entry['links']} inbound links from {len(entry['sources'])} pages")
+        for anchor, n in entry["anchors"].most_common():
+            print(f"  {n:4d}  {anchor!r}")
+        print("Vocabulary:", ", ".join(f"{w} ({n})" for w, n in index.vocabulary(args.page).most_common(15)))
+        return
+
+    index.write_report(args.output)
+    print("--- Inbound Anchor Texts ---")
+    for row in index.report()[:10]:
+        top = ", ".join(f"{a!r} ×{n}" for a, n in row["anchors"][:3])
+        print(f"  {row['links']:4d} links from {row['source_pages']:3d} pages  {row['page']}: {top}")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import networkx as nx
+
+import dom_graph_parser as parser
+import http_crawler as crawler
+import near_duplicates
+import page_rank
+from graph_diff import load_graph
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+SITES = ["../StaticTestWebsite"]          # ← site directories and/or start URLs
+OUTPUT_DIR = "Output_Graph_Json/sites"    # one <site>/dom_graph.json per site
+COMBINED_FILE = "Output_Graph_Json/dom_graph_combined.json"
+SITE_WORKERS = os.cpu_count() or 4        # sites built at once
+
+SITE_SEPARATOR = "/"      # node IDs become "<site>/<page>", "<site>/<page>_div_3", ...
+
+
+# ============================================================
+# 2. SITE NAMES + NAMESPACED IDS
+# ============================================================
+
+def is_url(site):
+    return urlsplit(site).scheme in ("http", "https")
+
+
+def site_name(site):
+    """Directory basename, or host(_port) for a URL: ../StaticTestWebsite → StaticTestWebsite."""
+    if is_url(site):
+        return urlsplit(site).netloc.replace(":", "_")
+    return os.path.basename(os.path.normpath(site))
+
+
+def unique_site_names(sites):
+    """{site: name}, with "-2", "-3", ... appended when two sites share a name."""
+    names = {}
+    taken = set()
+    for site in sites:
+        name = base = site_name(site)
+        n = 1
+        while name in taken:
+            n += 1
+            name = f"{base}-{n}"
+        taken.add(name)
+        names[site] = name
+    return names
+
+
+def namespace_graph(G, name):
+    """
+    Prefix every node ID that belongs to this site with "<name>/".
+    External_Page nodes keep their URL as ID, so sites linking to the same
+    URL share one node in the combined graph. Page_File nodes get "site".
+    """
+    prefix = name + SITE_SEPARATOR
+    mapping = {n: prefix + n for n, t in G.nodes(data="type") if t != "External_Page"}
+    G = nx.relabel_nodes(G, mapping, copy=True)
+
+    for node, attrs in G.nodes(data=True):
+        if attrs.get("page") is not None:
+            attrs["page"] = prefix + attrs["page"]
+        if attrs.get("type") == "Page_File":
+            attrs["site"] = name
+    return G
+
+
+# ============================================================
+# 3. BUILDING ONE SITE (IN A WORKER PROCESS)
+# ============================================================
+
+def reset_builder():
+    """Forget the previous site: the worker processes build one site after another."""
+    parser.reset_graph()
+    parser.all_known_pages.clear()
+    parser.page_budget_log.clear()
+    parser.set_link_resolver(None)
+    crawler.page_urls.clear()
+
+
+def build_site(site, name, output_dir=OUTPUT_DIR, max_pages=crawler.MAX_PAGES):
+    """
+    Build one site (directory or start URL) into its own namespaced
+    <output_dir>/<name>/dom_graph.json. Returns a summary dict.
+    """
+    started = time.perf_counter()
+    reset_builder()
+
+    if is_url(site):
+        asyncio.run(crawler.crawl(site, max_pages=max_pages))
+    else:
+        parser.build_all_pages(site)
+
+    if parser.MARK_NEAR_DUPLICATES:
+        near_duplicates.mark_near_duplicates(parser.G)
+    if parser.SCORE_PAGES:
+        page_rank.score_pages(parser.G)
+
+    G = namespace_graph(parser.G, name)
+    output_file = os.path.join(output_dir, name, os.path.basename(parser.OUTPUT_FILE))
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(G), f, indent=4)
+    os.replace(tmp_file, output_file)
+
+    return {
+        "site": site,
+        "name": name,
+        "pages": sum(1 for _, t in G.nodes(data="type") if t == "Page_File"),
+        "nodes": G.number_of_nodes(),
+        "edges": G.number_of_edges(),
+        "seconds": round(time.perf_counter() - started, 2),
+        "output": output_file,
+    }
+
+
+# ============================================================
+# 4. BATCH + COMBINED GRAPH
+# ============================================================
+
+def build_sites(sites=SITES, output_dir=OUTPUT_DIR, workers=SITE_WORKERS, max_pages=crawler.MAX_PAGES):
+    """Build all sites, `workers` at a time, in reused processes. Returns the summaries in input order."""
+    names = unique_site_names(sites)
+    if workers <= 1:
+        return [build_site(site, names[site], output_dir, max_pages) for site in sites]
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(build_site, site, names[site], output_dir, max_pages) for site in sites]
+        return [f.result() for f in futures]
+
+
+def combine_site_graphs(graph_files, output_file=COMBINED_FILE):
+    """
+    One graph from the per-site graphs. Their IDs are already disjoint apart
+    from shared External_Page URLs, which keep the attributes they were
+    first seen with (as in dom_graph_parser.merge_page_subgraph).
+    """
+    combined = nx.MultiDiGraph()
+    for graph_file in graph_files:
+        G = load_graph(graph_file)
+        for node, attrs in G.nodes(data=True):
+            if node in combined and attrs.get("type") == "External_Page":
+                for k, v in attrs.items():
+                    combined.nodes[node].setdefault(k, v)
+            else:
+                combined.add_node(node, **attrs)
+        combined.add_edges_from(G.edges(data=True))
+
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(combined), f, indent=4)
+    os.replace(tmp_file, output_file)
+    return combined
+
+
+# ============================================================
+# 5. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Build DOM graphs for many sites in one run.")
+    arg_parser.add_argument("sites", nargs="*", default=SITES, help="site directories and/or start URLs")
+    arg_parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    arg_parser.add_argument("--workers", type=int, default=SITE_WORKERS, help="sites built at once")
+    arg_parser.add_argument("--max-pages", type=int, default=crawler.MAX_PAGES, help="per crawled site")
+    arg_parser.add_argument("--combined", nargs="?", const=COMBINED_FILE,
+                            help="also write one combined graph (default path: %(const)s)")
+    args = arg_parser.parse_args(argv)
+
+    started = time.perf_counter()
+    summaries = build_sites(args.sites, args.output_dir, args.workers, args.max_pages)
+
+    print("--- DOM Graphs Built ---")
+    for s in summaries:
+        print(f"  {s['name']}: {s['pages']} pages, {s['nodes']} nodes, {s['edges']} edges "
+              f"in {s['seconds']}s → {s['output']}")
+
+    if args.combined:
+        combined = combine_site_graphs([s["output"] for s in summaries], args.combined)
+        print(f"Combined: {combined.number_of_nodes()} nodes, {combined.number_of_edges()} edges "
+              f"→ {args.combined}")
+
+    print(f"{len(summaries)} sites in {time.perf_counter() - started:.2f}s")
+    print("Embed them with one model load: python main.py " +
+          " ".join(os.path.abspath(s["output"]) for s in summaries))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+
+from seen_urls import SeenUrls
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+CHECKPOINT_DIR = "Output_Crawl/checkpoint"   # ← change as needed
+CHECKPOINT_EVERY = 500         # pages between snapshots of the frontier
+CHECKPOINT_SECONDS = 60.0      # ... or seconds, whichever comes first
+
+PAGES_FILE = "pages.jsonl"     # one finished page per line (append-only)
+STATE_FILE = "state.json"      # frontier snapshot + how much of PAGES_FILE it covers
+SEEN_FILE = "seen.bin"         # SeenUrls at the time of the snapshot
+
+
+# ============================================================
+# 2. CHECKPOINT
+# ============================================================
+
+class CrawlCheckpoint:
+    """
+    Crash-safe progress of a long crawl, in one directory.
+
+    Every finished page is appended to the page log right away: its subgraph,
+    ID counters, click depth and link targets. Every CHECKPOINT_EVERY pages
+    (or CHECKPOINT_SECONDS) the frontier, the seen-URL set and the extra
+    page URLs are snapshotted, together with the log length at that moment.
+
+    load() gives back the snapshot plus every logged page, flagged whether it
+    came after the snapshot: those pages' links still have to be queued
+    again, since the snapshot predates them. A torn last line is dropped.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, every=CHECKPOINT_EVERY, seconds=CHECKPOINT_SECONDS):
+        self.directory = directory
+        self.every = every
+        self.seconds = seconds
+        self.pages_path = os.path.join(directory, PAGES_FILE)
+        self.state_path = os.path.join(directory, STATE_FILE)
+        self.seen_path = os.path.join(directory, SEEN_FILE)
+        self.log = None
+        self.since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+
+    # -----------------------------
+    # Starting / resuming
+    # -----------------------------
+    def reset(self):
+        """Forget a previous run."""
+        for path in (self.pages_path, self.state_path, self.seen_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load(self):
+        """
+        Returns (state, seen, [(page entry, after_snapshot)]). state and seen
+        are None when no snapshot was taken yet.
+        """
+        state, seen = None, None
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            seen = SeenUrls.load(self.seen_path)
+        covered = state["log_bytes"] if state else 0
+
+        entries = []
+        good_bytes = 0
+        if os.path.exists(self.pages_path):
+            with open(self.pages_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break   # torn write of a crashed run
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    entries.append((entry, good_bytes >= covered))
+                    good_bytes += len(line)
+
+            # drop the torn tail so new lines append to a clean log
+            with open(self.pages_path, "r+b") as f:
+                f.truncate(good_bytes)
+
+        return state, seen, entries
+
+    # -----------------------------
+    # During the crawl
+    # -----------------------------
+    def log_page(self, entry):
+        """Append one finished page (see http_crawler.page_log_entry)."""
+        if self.log is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.log = open(self.pages_path, "ab")
+        self.log.write(json.dumps(entry).encode("utf-8") + b"\n")
+        self.log.flush()
+        self.since_snapshot += 1
+
+    def due(self):
+        return self.since_snapshot >= self.every or (
+            self.since_snapshot and time.monotonic() - self.last_snapshot >= self.seconds
+        )
+
+    def snapshot(self, state, seen):
+        """Persist frontier state + seen URLs; the page log is fsynced first so state never runs ahead of it."""
+        os.makedirs(self.directory, exist_ok=True)
+        log_bytes = 0
+        if self.log is not None:
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            log_bytes = self.log.tell()
+        elif os.path.exists(self.pages_path):
+            log_bytes = os.path.getsize(self.pages_path)
+
+        seen.save(self.seen_path)
+
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(state, log_bytes=log_bytes), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+        self.since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
@@ -0,0 +1,298 @@
+import time
+import heapq
+import asyncio
+import itertools
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+POLITENESS_DELAY = 0.25        # seconds between requests to one host
+MAX_INFLIGHT_PER_HOST = 2      # concurrent requests to one host
+RESPECT_ROBOTS = True
+SEED_FROM_SITEMAP = True
+MAX_SITEMAP_URLS = 50_000      # per site (sitemap index files are followed one level)
+SCORE_WEIGHT = 1.0             # how many click-depth levels one score point is worth
+ROBOTS_RETRIES = 3             # extra robots.txt attempts after a 5xx / 429 / network error
+ROBOTS_BACKOFF = 1.0           # seconds before the first retry, doubled for each further one
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+def lastmod_score(url, depth, lastmod):
+    """
+    Default score hook: pages the sitemap says changed recently come first.
+    1.0 for "today", decaying to 0 over about a year; 0 without lastmod.
+    """
+    if not lastmod:
+        return 0.0
+    try:
+        modified = datetime.fromisoformat(lastmod.replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+
+    age_days = max((datetime.now(timezone.utc) - modified).days, 0)
+    return 1.0 / (1.0 + age_days / 30.0)
+
+
+# ============================================================
+# 2. FRONTIER
+# ============================================================
+
+class CrawlFrontier:
+    """
+    Priority frontier with one queue per host.
+
+    get() hands out the best URL of any host that is allowed to receive a
+    request right now: fewer than max_inflight requests in flight and at
+    least `delay` seconds since its last response. So slow hosts never stall
+    the others, and no host gets hammered. Priority is click depth minus
+    SCORE_WEIGHT * score_fn(url, depth, lastmod), ties in insertion order.
+    With a crawl_traps.TrapDetector, URLs of throttled or blocked URL
+    templates are turned away before they are queued.
+    """
+
+    def __init__(self, delay=POLITENESS_DELAY, max_inflight=MAX_INFLIGHT_PER_HOST,
+                 score_fn=lastmod_score, user_agent="*", traps=None):
+        self.delay = delay
+        self.max_inflight = max_inflight
+        self.score_fn = score_fn
+        self.user_agent = user_agent
+        self.traps = traps
+
+        self.queues = {}        # host -> heap of (priority, seq, url, depth)
+        self.inflight = {}      # host -> requests in flight
+        self.next_allowed = {}  # host -> monotonic time of the next allowed request
+        self.host_delay = {}    # host -> delay (robots.txt Crawl-delay can raise it)
+        self.robots = {}        # host -> RobotFileParser
+        self.blocked = []       # URLs dropped because of robots.txt
+        self.held = 0           # finished requests whose links are not queued yet
+        self.seq = itertools.count()
+        self.wakeup = asyncio.Event()
+
+    # -----------------------------
+    # Adding work
+    # -----------------------------
+    def allowed(self, url):
+        robots = self.robots.get(host_of(url))
+        return robots is None or robots.can_fetch(self.user_agent, url)
+
+    def add(self, url, depth, lastmod=None):
+        """Queue a URL. Returns False if robots.txt disallows it or it looks like a crawl trap."""
+        if not self.allowed(url):
+            self.blocked.append(url)
+            return False
+        if self.traps is not None and not self.traps.admit(url, depth):
+            return False
+
+        host = host_of(url)
+        priority = depth - SCORE_WEIGHT * self.score_fn(url, depth, lastmod)
+        heapq.heappush(self.queues.setdefault(host, []), (priority, next(self.seq), url, depth))
+        self.wakeup.set()
+        return True
+
+    def restore(self, entries):
+        """Re-queue (priority, url, depth) entries from snapshot(), priorities unchanged."""
+        for priority, url, depth in entries:
+            heapq.heappush(self.queues.setdefault(host_of(url), []), (priority, next(self.seq), url, depth))
+        self.wakeup.set()
+
+    def snapshot(self):
+        """Every queued URL as (priority, url, depth), in queue order per host."""
+        return [(priority, url, depth) for queue in self.queues.values() for priority, _, url, depth in sorted(queue)]
+
+    def set_robots(self, host, robots):
+        self.robots[host] = robots
+        crawl_delay = robots.crawl_delay(self.user_agent)
+        if crawl_delay:
+            self.host_delay[host] = max(self.delay, float(crawl_delay))
+
+    # -----------------------------
+    # Handing out work
+    # -----------------------------
+    def pending(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def _pop_ready(self, now):
+        best = None
+        for host, queue in self.queues.items():
+            if not queue:
+                continue
+            if self.inflight.get(host, 0) >= self.max_inflight:
+                continue
+            if self.next_allowed.get(host, 0) > now:
+                continue
+            if best is None or queue[0] < self.queues[best][0]:
+                best = host
+
+        if best is None:
+            return None
+
+        _, _, url, depth = heapq.heappop(self.queues[best])
+        self.inflight[best] = self.inflight.get(best, 0) + 1
+        # spacing also applies between requests that overlap in flight
+        self.next_allowed[best] = now + self.host_delay.get(best, self.delay)
+        return url, depth
+
+    def _seconds_until_ready(self, now):
+        waits = [
+            self.next_allowed.get(host, 0) - now
+            for host, queue in self.queues.items()
+            if queue and self.inflight.get(host, 0) < self.max_inflight
+        ]
+        return max(min(waits), 0) if waits else None
+
+    async def get(self):
+        """
+        Next (url, depth) to fetch, waiting for politeness as needed.
+        Returns None once nothing is queued and nothing is in flight.
+        """
+        while True:
+            now = time.monotonic()
+            item = self._pop_ready(now)
+            if item is not None:
+                return item
+
+            if self.pending() == 0 and sum(self.inflight.values()) == 0 and self.held == 0:
+                self.wakeup.set()   # let the other waiting workers see it too
+                return None
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self._seconds_until_ready(now))
+            except asyncio.TimeoutError:
+                pass
+
+    def done(self, url):
+        """Report a finished request; the host's next slot opens after its delay."""
+        host = host_of(url)
+        self.inflight[host] -= 1
+        self.next_allowed[host] = max(
+            self.next_allowed.get(host, 0),
+            time.monotonic() + self.host_delay.get(host, self.delay),
+        )
+        self.wakeup.set()
+
+    def hold(self):
+        """
+        Keep get() from reporting the end of the crawl although nothing is in
+        flight: a response is still being processed and may add URLs.
+        """
+        self.held += 1
+
+    def release(self):
+        self.held -= 1
+        self.wakeup.set()
+
+
+# ============================================================
+# 3. ROBOTS.TXT + SITEMAP SEEDING
+# ============================================================
+
+async def fetch_text(session, url):
+    """GET a small text resource; None on any error or non-200."""
+    try:
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                return None
+            return await resp.text(errors="replace")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+
+async def fetch_robots(session, url):
+    """(status, text) of a robots.txt request; status None on a network error."""
+    try:
+        async with session.get(url) as resp:
+            return resp.status, await resp.text(errors="replace")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None, ""
+
+
+async def load_robots(session, site_url, retries=ROBOTS_RETRIES, backoff=ROBOTS_BACKOFF):
+    """
+    Fetch and parse robots.txt for a site, following RFC 9309:
+      - 2xx: parse it
+      - 401 / 403: access is restricted, disallow everything
+      - any other 4xx (404, 410, 400, ...) or a 3xx left after the redirects
+        were followed: there is no usable robots.txt, allow everything
+      - 5xx, 429 or no answer: back off and retry; if it stays unavailable,
+        disallow everything rather than guess
+    """
+    url = urljoin(site_url, "/robots.txt")
+    robots = RobotFileParser(url)
+
+    for attempt in range(retries + 1):
+        status, text = await fetch_robots(session, url)
+        if status is not None and 200 <= status < 300:
+            robots.parse(text.splitlines())
+            return robots
+        if status in (401, 403):
+            break
+        if status is not None and status < 500 and status != 429:
+            robots.parse([])
+            robots.allow_all = True
+            return robots
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+    robots.parse([])
+    robots.disallow_all = True
+    return robots
+
+
+def parse_sitemap(xml_text):
+    """Return (page entries [(loc, lastmod)], nested sitemap URLs) from one sitemap file."""
+    try:
+        root = ET.fromstring(xml_text)
+    except ET.ParseError:
+        return [], []
+
+    def entries(tag):
+        found = []
+        for el in root.iter(SITEMAP_NS + tag):
+            loc = el.findtext(SITEMAP_NS + "loc")
+            if loc:
+                found.append((loc.strip(), (el.findtext(SITEMAP_NS + "lastmod") or "").strip() or None))
+        return found
+
+    return entries("url"), [loc for loc, _ in entries("sitemap")]
+
+
+async def load_sitemap_urls(session, site_url, robots=None):
+    """
+    (url, lastmod) pairs from the site's sitemaps: those named in robots.txt,
+    else /sitemap.xml. Sitemap index files are followed one level deep.
+    """
+    sitemap_urls = list(robots.site_maps() or []) if robots else []
+    if not sitemap_urls:
+        sitemap_urls = [urljoin(site_url, "/sitemap.xml")]
+
+    pages = []
+    for _ in range(2):
+        nested = []
+        for sitemap_url in sitemap_urls:
+            text = await fetch_text(session, sitemap_url)
+            if not text:
+                continue
+            entries, children = parse_sitemap(text)
+            pages.extend(entries)
+            nested.extend(children)
+            if len(pages) >= MAX_SITEMAP_URLS:
+                return pages[:MAX_SITEMAP_URLS]
+        sitemap_urls = nested
+
+    return pages
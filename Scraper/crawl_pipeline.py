@@ -0,0 +1,251 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import dom_graph_parser as parser
+import http_crawler as crawler
+from crawl_frontier import CrawlFrontier, POLITENESS_DELAY, RESPECT_ROBOTS, SEED_FROM_SITEMAP
+from crawl_workers import build_page
+from crawl_traps import TrapDetector, DETECT_TRAPS, TRAP_REPORT, page_text_digest
+from seen_urls import SeenUrls
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+FETCHERS = 16                         # concurrent downloads
+PARSE_WORKERS = os.cpu_count() or 4   # parser processes (0 = parse on the event loop)
+QUEUE_SIZE = 64                       # fetched pages waiting for a parser
+
+
+# ============================================================
+# 2. PARSE STAGE (RUNS IN THE WORKER PROCESSES)
+# ============================================================
+
+def init_parse_worker(start_url, base_url):
+    parser.set_link_resolver(crawler.make_link_resolver(base_url))
+    parser.set_site_scope(urlsplit(start_url).hostname)
+
+
+def parse_job(page_name, url, record, depth, base_url):
+    """Fetched response → (page subgraph, link targets, {target: URL} for non-plain URLs)."""
+    if base_url + page_name != url:
+        crawler.page_urls.setdefault(page_name, url)
+    graph, targets = build_page(page_name, record, depth)
+    links = {t: crawler.page_urls[t] for t in targets if t in crawler.page_urls}
+    return graph, targets, links
+
+
+# ============================================================
+# 3. PIPELINE
+# ============================================================
+
+async def supervise(tasks):
+    """
+    Wait for all tasks. The first one to fail cancels the others and its
+    exception is raised, so no stage is left waiting on one that died
+    (fetchers blocked on a full queue whose parsers are gone).
+    """
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def pipeline_crawl(start_url=crawler.START_URL, max_pages=crawler.MAX_PAGES,
+                         max_depth=crawler.MAX_CLICK_DEPTH, fetchers=FETCHERS,
+                         parse_workers=PARSE_WORKERS, queue_size=QUEUE_SIZE,
+                         frontier=None, seen=None,
+                         respect_robots=RESPECT_ROBOTS, use_sitemap=SEED_FROM_SITEMAP):
+    """
+    Crawl one site into parser.G with fetching and parsing overlapped.
+
+        fetchers (async) → bounded queue → parse pool (processes) → writer
+
+    Fetchers only wait for the network; a full queue makes them wait for
+    the parsers too (backpressure), so memory stays bounded by queue_size
+    pages. Parsed subgraphs are merged by a single writer on the event loop
+    thread, which also queues the links found, so G is never touched
+    concurrently. Throughput approaches min(network, parse_workers × parse rate).
+    If any stage fails (a parser error, a broken process pool), the others
+    are cancelled and the exception is raised.
+    Returns {page name: click depth} for every fetched page.
+    """
+    base_url = crawler.base_of(start_url)
+    init_parse_worker(start_url, base_url)
+
+    if frontier is None:
+        frontier = CrawlFrontier(user_agent=crawler.USER_AGENT)
+    if seen is None:
+        seen = SeenUrls()
+
+    fetched = {}
+    queue = asyncio.Queue(maxsize=queue_size)
+    loop = asyncio.get_running_loop()
+
+    def write(page_name, depth, graph, targets, links):
+        """The single writer: the only place G grows during the crawl."""
+        if graph is not None:
+            parser.merge_page_subgraph(graph)
+        crawler.page_urls.update(links)
+        fetched[page_name] = depth
+        if frontier.traps is not None:
+            frontier.traps.record_page(crawler.page_url(page_name, base_url),
+                                       page_text_digest(parser.G, page_name))
+
+        if max_depth is None or depth < max_depth:
+            for target in targets:
+                target_url = crawler.page_url(target, base_url)
+                if len(seen) < max_pages and seen.add(target_url):
+                    frontier.add(target_url, depth + 1)
+
+    async def fetcher(session):
+        while True:
+            item = await frontier.get()
+            if item is None:
+                return
+
+            url, depth = item
+            if not seen.mark_fetched(url):
+                frontier.done(url)
+                continue
+
+            # held until the writer has queued this page's links, so the
+            # frontier doesn't run dry while pages sit in the pipeline
+            frontier.hold()
+            try:
+                record = await crawler.fetch_page(session, url)
+            except BaseException:
+                frontier.release()
+                raise
+            finally:
+                frontier.done(url)
+
+            await queue.put((url, depth, record))
+
+    async def parse_stage(pool):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+
+            url, depth, record = item
+            page_name = crawler.url_to_page_name(url, base_url)
+            try:
+                if pool is None:
+                    # no parser processes: build straight into G, nothing to merge
+                    if base_url + page_name != url:
+                        crawler.page_urls.setdefault(page_name, url)
+                    crawler.record_page(page_name, record, depth)
+                    write(page_name, depth, None, parser.page_link_targets(page_name), {})
+                else:
+                    result = await loop.run_in_executor(pool, parse_job, page_name, url, record, depth, base_url)
+                    write(page_name, depth, *result)
+            finally:
+                frontier.release()
+
+    pool = None
+    if parse_workers:
+        pool = ProcessPoolExecutor(parse_workers, initializer=init_parse_worker,
+                                   initargs=(start_url, base_url))
+    # two jobs per process: one being parsed, one being pickled over to it
+    parse_tasks = max(parse_workers * 2, 1)
+
+    try:
+        async with crawler.make_session(fetchers) as session:
+            await crawler.seed_site(session, frontier, start_url, base_url, seen, respect_robots, use_sitemap)
+
+            parsers = [asyncio.create_task(parse_stage(pool)) for _ in range(parse_tasks)]
+            fetch_tasks = [asyncio.create_task(fetcher(session)) for _ in range(fetchers)]
+
+            async def stop_parsers():
+                # the fetchers only stop once nothing is held, i.e. everything is written
+                await asyncio.wait(fetch_tasks)
+                for _ in parsers:
+                    await queue.put(None)
+
+            await supervise(fetch_tasks + parsers + [asyncio.create_task(stop_parsers())])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for url in frontier.blocked:
+        name = crawler.url_to_page_name(url, base_url)
+        parser.G.add_node(name, type="Page_File", title=name, blocked_by_robots=True)
+        parser.node_index.update([name])
+
+    return fetched
+
+
+# ============================================================
+# 4. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Crawl a site over HTTP into a DOM graph, fetching and parsing in parallel."
+    )
+    arg_parser.add_argument("start_url", nargs="?", default=crawler.START_URL)
+    arg_parser.add_argument("--serve", metavar="DIR",
+                            help="serve DIR with a local http.server and crawl that instead")
+    arg_parser.add_argument("--port", type=int, default=0)
+    arg_parser.add_argument("--max-pages", type=int, default=crawler.MAX_PAGES)
+    arg_parser.add_argument("--max-depth", type=int, default=crawler.MAX_CLICK_DEPTH)
+    arg_parser.add_argument("--fetchers", type=int, default=FETCHERS)
+    arg_parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                            help="parser processes (0 = parse on the event loop)")
+    arg_parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    arg_parser.add_argument("--delay", type=float, default=POLITENESS_DELAY,
+                            help="seconds between requests to one host")
+    arg_parser.add_argument("--no-robots", action="store_true", help="ignore robots.txt")
+    arg_parser.add_argument("--no-sitemap", action="store_true", help="don't seed from sitemap.xml")
+    arg_parser.add_argument("--no-trap-detection", action="store_true",
+                            help="don't throttle URL templates that stop yielding new pages")
+    arg_parser.add_argument("--trap-report", default=TRAP_REPORT)
+    arg_parser.add_argument("-o", "--output", default=crawler.OUTPUT_FILE)
+    args = arg_parser.parse_args(argv)
+
+    start_url = args.start_url
+    server = None
+    if args.serve:
+        server, base = crawler.serve_directory(args.serve, args.port)
+        start_url = base + crawler.DEFAULT_DOCUMENT
+
+    started = time.perf_counter()
+    try:
+        traps = TrapDetector() if DETECT_TRAPS and not args.no_trap_detection else None
+        frontier = CrawlFrontier(delay=args.delay, user_agent=crawler.USER_AGENT, traps=traps)
+        depths = asyncio.run(pipeline_crawl(
+            start_url, args.max_pages, args.max_depth, args.fetchers, args.parse_workers,
+            args.queue_size, frontier,
+            respect_robots=not args.no_robots, use_sitemap=not args.no_sitemap,
+        ))
+    finally:
+        if server:
+            server.shutdown()
+    took = time.perf_counter() - started
+
+    parser.export_graph(args.output)
+
+    print("--- DOM Graph Crawled (pipeline) ---")
+    print(f"Pages: {len(depths)} in {took:.2f}s ({len(depths) / took:.1f} pages/s) from {start_url}")
+    print(f"Parse workers: {args.parse_workers}  Queue: {args.queue_size}")
+    print("Nodes:", len(parser.G.nodes))
+    print("Edges:", len(parser.G.edges))
+    if traps:
+        crawler.print_trap_report(traps, args.trap_report)
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
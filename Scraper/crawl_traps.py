@@ -0,0 +1,273 @@
+import os
+import re
+import json
+import hashlib
+from collections import deque
+from urllib.parse import urlsplit
+
+from near_duplicates import page_tree
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+DETECT_TRAPS = True
+TRAP_REPORT = "Output_Crawl/crawl_traps.json"   # ← change as needed
+
+MIN_SAMPLE = 20          # fetched pages of a template before its yield is judged
+YIELD_WINDOW = 20        # ... over its most recent this many pages
+THROTTLE_YIELD = 0.5     # share of new distinct pages below which a template is throttled
+BLOCK_YIELD = 0.1        # ... and below which it is blocked
+THROTTLE_EVERY = 10      # a throttled template gets 1 of every N new URLs (so it can recover)
+MAX_DEPTH_SPAN = 25      # click depths one template may span before it counts as an endless chain
+
+DIGITS_RE = re.compile(r"\d+")
+DATE_RE = re.compile(r"^\d{4}-\d{1,2}(-\d{1,2})?$")
+ID_RE = re.compile(r"^(?=.*\d)[0-9A-Za-z_-]{16,}$")   # hashes, UUIDs, session tokens
+
+TRAP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trap_templates (
+    template  TEXT PRIMARY KEY,
+    stats     TEXT NOT NULL           -- TrapDetector stats as JSON, without the digests
+);
+CREATE TABLE IF NOT EXISTS trap_digests (
+    template  TEXT NOT NULL,
+    digest    BLOB NOT NULL,
+    PRIMARY KEY (template, digest)
+) WITHOUT ROWID;
+"""
+
+
+# ============================================================
+# 2. URL TEMPLATES + PAGE DIGESTS
+# ============================================================
+
+def normalize_segment(segment):
+    segment = segment.split(";", 1)[0]      # ;jsessionid=... path parameters
+    if DATE_RE.match(segment):
+        return "{date}"
+    if ID_RE.match(segment):
+        return "{id}"
+    return DIGITS_RE.sub("{n}", segment)
+
+
+def url_template(url):
+    """
+    The pattern a URL was generated from: host + path with numbers, dates
+    and ID-like segments replaced, + the sorted query keys without values.
+        /calendar/2024/05?day=3&sid=ab12   →  host/calendar/{n}/{n}?day&sid
+    """
+    parts = urlsplit(url)
+    path = "/".join(normalize_segment(s) for s in parts.path.split("/"))
+    keys = sorted({pair.split("=", 1)[0] for pair in parts.query.split("&") if pair})
+    template = parts.netloc.lower() + path
+    return template + "?" + "&".join(keys) if keys else template
+
+
+def page_text_digest(G, page):
+    """
+    Digest of a parsed page's visible text (leaf elements in document
+    order). Links and attributes are left out on purpose: pages that only
+    differ by the session ID in their links are the same page.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for node in page_tree(G, page):
+        if not any(rel == "CONTAINS" for _, _, rel in G.out_edges(node, data="relation")):
+            h.update((G.nodes[node].get("text_snippet") or "").encode("utf-8"))
+            h.update(b"\x00")
+    return h.digest()
+
+
+# ============================================================
+# 3. DETECTOR
+# ============================================================
+
+class TrapDetector:
+    """
+    Groups URLs by url_template and watches every template for the two
+    signs of a crawl trap:
+      - yield collapse: few of its recently fetched pages had text not seen
+        before under that template (session IDs, sort orders, print views)
+      - depth explosion: its URLs keep appearing deeper and deeper
+        (calendar "next month" links, endless pagination)
+    Low yield throttles a template, very low yield or a runaway depth blocks
+    it. CrawlFrontier.add asks admit() for every URL; the crawler reports
+    each fetched page through record_page(). SqliteTrapDetector shares the
+    same judgement between worker processes.
+    """
+
+    def __init__(self, min_sample=MIN_SAMPLE, window=YIELD_WINDOW, throttle_yield=THROTTLE_YIELD,
+                 block_yield=BLOCK_YIELD, throttle_every=THROTTLE_EVERY, max_depth_span=MAX_DEPTH_SPAN):
+        self.min_sample = min_sample
+        self.window = window
+        self.throttle_yield = throttle_yield
+        self.block_yield = block_yield
+        self.throttle_every = throttle_every
+        self.max_depth_span = max_depth_span
+        self.templates = {}     # template -> stats, see _stats
+
+    def _stats(self, template):
+        stats = self.templates.get(template)
+        if stats is None:
+            stats = self.templates[template] = {
+                "state": "ok", "reason": None,
+                "queued": 0, "fetched": 0, "distinct": 0, "suppressed": 0,
+                "min_depth": None, "max_depth": None,
+                "recent": deque(maxlen=self.window),   # 1 = new distinct page
+                "digests": set(),
+                "offered": 0,                          # URLs seen while throttled
+                "examples": [],                        # a few suppressed URLs
+            }
+        return stats
+
+    def _suppress(self, stats, url):
+        stats["suppressed"] += 1
+        if len(stats["examples"]) < 5:
+            stats["examples"].append(url)
+        return False
+
+    def admit(self, url, depth):
+        """True if url may be queued, False if its template is throttled or blocked."""
+        stats = self._stats(url_template(url))
+        if stats["min_depth"] is None or depth < stats["min_depth"]:
+            stats["min_depth"] = depth
+        stats["max_depth"] = depth if stats["max_depth"] is None else max(stats["max_depth"], depth)
+
+        if stats["state"] != "blocked" and depth - stats["min_depth"] > self.max_depth_span:
+            stats["state"] = "blocked"
+            stats["reason"] = (f"depth explosion: found {depth - stats['min_depth']} clicks "
+                               f"deeper than its first URL")
+
+        if stats["state"] == "blocked":
+            return self._suppress(stats, url)
+        if stats["state"] == "throttled":
+            stats["offered"] += 1
+            if stats["offered"] % self.throttle_every:
+                return self._suppress(stats, url)
+
+        stats["queued"] += 1
+        return True
+
+    def record_page(self, url, digest):
+        """A page of url's template was fetched; digest from page_text_digest."""
+        stats = self._stats(url_template(url))
+        is_new = digest not in stats["digests"]
+        stats["digests"].add(digest)
+        stats["fetched"] += 1
+        stats["distinct"] += is_new
+        stats["recent"].append(int(is_new))
+
+        if stats["state"] == "blocked" or stats["fetched"] < self.min_sample:
+            return
+
+        new_share = sum(stats["recent"]) / len(stats["recent"])
+        summary = f"only {sum(stats['recent'])} of its last {len(stats['recent'])} pages were new"
+        if new_share < self.block_yield:
+            stats["state"], stats["reason"] = "blocked", "yield collapse: " + summary
+        elif new_share < self.throttle_yield:
+            stats["state"], stats["reason"] = "throttled", "low yield: " + summary
+        elif stats["state"] == "throttled":
+            stats["state"], stats["reason"] = "ok", None     # recovered
+
+    def report(self):
+        """Every template that was throttled, blocked or had URLs suppressed, most suppressed first."""
+        rows = []
+        for template, s in self.templates.items():
+            if s["state"] == "ok" and not s["suppressed"]:
+                continue
+            rows.append({
+                "template": template,
+                "state": s["state"],
+                "reason": s["reason"],
+                "queued": s["queued"],
+                "fetched": s["fetched"],
+                "distinct": s["distinct"],
+                "suppressed": s["suppressed"],
+                "depths": [s["min_depth"], s["max_depth"]],
+                "examples": s["examples"],
+            })
+        rows.sort(key=lambda r: (-r["suppressed"], r["template"]))
+        return rows
+
+    def write_report(self, path=TRAP_REPORT):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        os.replace(tmp_file, path)
+
+
+# ============================================================
+# 4. SHARED DETECTOR (crawl_workers.py)
+# ============================================================
+
+class StoredDigests:
+    """The page digests of one template, as a set kept in trap_digests."""
+
+    def __init__(self, db, template):
+        self.db = db
+        self.template = template
+
+    def __contains__(self, digest):
+        return self.db.execute(
+            "SELECT 1 FROM trap_digests WHERE template = ? AND digest = ?", (self.template, digest)
+        ).fetchone() is not None
+
+    def add(self, digest):
+        self.db.execute("INSERT OR IGNORE INTO trap_digests VALUES (?, ?)", (self.template, digest))
+
+
+class SqliteTrapDetector(TrapDetector):
+    """
+    TrapDetector whose template stats live in a SQLite database - the
+    SqliteFrontier file - so every worker process judges a template by the
+    pages all workers fetched. Only the template at hand is loaded; the
+    caller runs admit() and record_page() inside a write transaction
+    (SqliteFrontier.add / record_page do), which makes each one an atomic
+    read-modify-write.
+    """
+
+    def __init__(self, db, **options):
+        super().__init__(**options)
+        self.db = db
+        self.db.executescript(TRAP_SCHEMA)
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM trap_templates")
+            self.db.execute("DELETE FROM trap_digests")
+
+    def _stats(self, template):
+        self.templates.pop(template, None)
+        stats = super()._stats(template)
+        row = self.db.execute("SELECT stats FROM trap_templates WHERE template = ?", (template,)).fetchone()
+        if row:
+            saved = json.loads(row[0])
+            saved["recent"] = deque(saved["recent"], maxlen=self.window)
+            stats.update(saved)
+        stats["digests"] = StoredDigests(self.db, template)
+        return stats
+
+    def _save(self, url):
+        template = url_template(url)
+        stats = self.templates.pop(template)
+        saved = {k: v for k, v in stats.items() if k != "digests"}
+        saved["recent"] = list(stats["recent"])
+        self.db.execute("INSERT OR REPLACE INTO trap_templates VALUES (?, ?)", (template, json.dumps(saved)))
+
+    def admit(self, url, depth):
+        admitted = super().admit(url, depth)
+        self._save(url)
+        return admitted
+
+    def record_page(self, url, digest):
+        super().record_page(url, digest)
+        self._save(url)
+
+    def report(self):
+        for (template,) in self.db.execute("SELECT template FROM trap_templates").fetchall():
+            self._stats(template)
+        rows = super().report()
+        self.templates.clear()
+        return rows
@@ -0,0 +1,354 @@
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing
+from urllib.parse import urldefrag, urlsplit
+
+import dom_graph_parser as parser
+import http_crawler as crawler
+from crawl_frontier import (
+    POLITENESS_DELAY, RESPECT_ROBOTS, SEED_FROM_SITEMAP, SCORE_WEIGHT,
+    host_of, lastmod_score, load_robots, load_sitemap_urls,
+)
+from crawl_traps import SqliteTrapDetector, DETECT_TRAPS, TRAP_REPORT, page_text_digest
+from sqlite_frontier import SqliteFrontier, FRONTIER_DB, worker_id
+from sqlite_graph import SqliteGraph
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+SHARD_DIR = "Output_Crawl/shards"      # ← change as needed
+OUTPUT_FILE = parser.OUTPUT_FILE
+
+WORKERS = os.cpu_count() or 4      # processes for "run"
+WORKER_CONCURRENCY = 8             # pages each worker fetches at once (per-host limits still apply)
+IDLE_POLL = 0.5                    # longest a worker waits before asking the frontier again
+
+
+# ============================================================
+# 2. SEEDING
+# ============================================================
+
+async def seed(frontier, start_url, max_pages=crawler.MAX_PAGES, max_depth=crawler.MAX_CLICK_DEPTH,
+               respect_robots=RESPECT_ROBOTS, use_sitemap=SEED_FROM_SITEMAP, delay=POLITENESS_DELAY):
+    """
+    Store the crawl settings in the frontier and queue the start URL (+ sitemap
+    URLs). A robots.txt Crawl-delay above `delay` becomes the site's delay.
+    Workers detect crawl traps if the frontier has a trap detector.
+    """
+    base_url = crawler.base_of(start_url)
+    frontier.set_config(
+        start_url=start_url, base_url=base_url, max_pages=max_pages,
+        max_depth=max_depth, respect_robots=respect_robots, delay=delay,
+        detect_traps=frontier.traps is not None,
+    )
+    frontier.delay = delay
+
+    seeds = [(start_url, None)]
+    if respect_robots or use_sitemap:
+        async with crawler.make_session() as session:
+            robots = await load_robots(session, start_url) if respect_robots else None
+            if robots is not None:
+                crawl_delay = robots.crawl_delay(crawler.USER_AGENT)
+                frontier.set_host_delay(host_of(start_url), max(delay, float(crawl_delay or 0)))
+            if use_sitemap:
+                seeds += await load_sitemap_urls(session, start_url, robots)
+
+    entries = []
+    for url, lastmod in seeds:
+        url, _ = urldefrag(url)
+        if url.startswith(base_url) and crawler.looks_like_page(url):
+            priority = -SCORE_WEIGHT * lastmod_score(url, 0, lastmod)
+            entries.append((url, crawler.url_to_page_name(url, base_url), 0, priority))
+
+    return frontier.add(entries, max_urls=max_pages)
+
+
+# ============================================================
+# 3. WORKER
+# ============================================================
+
+def build_page(page_name, record, depth):
+    """
+    Parse one fetched page in an empty G. Returns (page subgraph, link targets).
+    record=None means robots.txt disallows the page.
+    """
+    parser.reset_graph()
+
+    if record is None:
+        parser.G.add_node(page_name, type="Page_File", title=page_name, blocked_by_robots=True)
+        parser.node_index.update([page_name])
+        return parser.page_subgraph(page_name), []
+
+    crawler.record_page(page_name, record, depth)
+    return parser.page_subgraph(page_name), parser.page_link_targets(page_name)
+
+
+async def work(db_path=FRONTIER_DB, shard_dir=SHARD_DIR, concurrency=WORKER_CONCURRENCY):
+    """
+    One worker process: `concurrency` fetchers that each claim a URL, fetch
+    it, parse it into its page subgraph, append that to this worker's shard,
+    queue the links it found and complete the lease. The frontier decides
+    when a host may get its next request, so politeness holds across all
+    worker processes; crawl-trap statistics are shared through it too.
+    Stops once the frontier is finished. Returns the number of pages written.
+    """
+    frontier = SqliteFrontier(db_path)
+    config = frontier.get_config()
+    start_url, base_url = config["start_url"], config["base_url"]
+    max_depth, max_pages = config["max_depth"], config["max_pages"]
+    frontier.delay = config.get("delay", frontier.delay)
+    if config.get("detect_traps"):
+        frontier.traps = SqliteTrapDetector(frontier.db)
+
+    parser.set_link_resolver(crawler.make_link_resolver(base_url))
+    parser.set_site_scope(urlsplit(start_url).hostname)
+
+    owner = worker_id()
+    os.makedirs(shard_dir, exist_ok=True)
+    shard_path = os.path.join(shard_dir, owner.replace(":", "_") + ".jsonl")
+
+    async def fetch(session, url, robots):
+        if robots and not robots.can_fetch(crawler.USER_AGENT, url):
+            return None
+        return await crawler.fetch_page(session, url)
+
+    written = 0
+
+    async def fetcher(session, robots, shard):
+        nonlocal written
+        while True:
+            claimed = frontier.claim(owner, 1)
+            if not claimed:
+                if frontier.is_finished():
+                    return
+                await asyncio.sleep(min(frontier.seconds_until_ready() or IDLE_POLL, IDLE_POLL))
+                continue
+
+            url, page_name, depth = claimed[0]
+            record = await fetch(session, url, robots)
+
+            # parsing has no await in it, so the fetchers never share parser.G
+            if crawler.base_of(url) + page_name != url:
+                crawler.page_urls.setdefault(page_name, url)
+            graph, targets = build_page(page_name, record, depth)
+            if record is not None:
+                frontier.record_page(url, page_text_digest(parser.G, page_name))
+
+            # the shard line is written before complete(): a crash in
+            # between only means the page is parsed twice, never lost
+            shard.write(json.dumps({"page": page_name, "url": url, "graph": graph}) + "\n")
+            shard.flush()
+
+            if max_depth is None or depth < max_depth:
+                frontier.add(
+                    [(crawler.page_url(t, base_url), t, depth + 1, depth + 1) for t in targets],
+                    max_urls=max_pages,
+                )
+            frontier.complete(url, owner)
+            written += 1
+
+    async with crawler.make_session(concurrency) as session:
+        robots = await load_robots(session, start_url) if config["respect_robots"] else None
+
+        with open(shard_path, "a", encoding="utf-8") as shard:
+            await asyncio.gather(*(fetcher(session, robots, shard) for _ in range(concurrency)))
+
+    frontier.close()
+    return written
+
+
+def run_worker(db_path, shard_dir, concurrency):
+    """Process entry point (multiprocessing target)."""
+    written = asyncio.run(work(db_path, shard_dir, concurrency))
+    print(f"[{worker_id()}] wrote {written} pages")
+
+
+# ============================================================
+# 4. MERGE
+# ============================================================
+
+def merge_shards(shard_dir=SHARD_DIR, output_file=OUTPUT_FILE):
+    """
+    Combine all worker shards into G and export it. A page that was parsed
+    twice (its lease expired mid-way) is merged once; a torn last line from
+    a crashed worker is skipped. Pages are merged in name order, so the
+    output does not depend on which worker got which page.
+    An output ending in ".sqlite" goes through merge_shards_sqlite.
+    """
+    if output_file.endswith(".sqlite"):
+        return merge_shards_sqlite(shard_dir, output_file)
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(shard_dir, "*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                pages.setdefault(entry["page"], entry["graph"])
+
+    parser.reset_graph()
+    for page_name in sorted(pages):
+        parser.merge_page_subgraph(pages[page_name])
+
+    parser.export_graph(output_file)
+    return len(pages)
+
+
+def merge_shards_sqlite(shard_dir=SHARD_DIR, output_file=OUTPUT_FILE):
+    """
+    merge_shards into a sqlite_graph store instead of G. Only an index of
+    page -> (shard, offset) is kept in memory; every page is read back and
+    written to the store one at a time, so the merge runs in roughly
+    constant memory however large the site is. Same dedup and name order.
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(shard_dir, "*.jsonl"))):
+        with open(path, "rb") as f:
+            offset = f.tell()
+            for line in iter(f.readline, b""):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    entry = None
+                if entry is not None:
+                    pages.setdefault(entry["page"], (path, offset))
+                offset = f.tell()
+
+    store = SqliteGraph(output_file)
+    store.clear()
+    handles = {}
+    with store.db:
+        for page_name in sorted(pages):
+            path, offset = pages[page_name]
+            f = handles.get(path) or handles.setdefault(path, open(path, "rb"))
+            f.seek(offset)
+            store.add_page_subgraph(json.loads(f.readline())["graph"])
+    for f in handles.values():
+        f.close()
+    store.close()
+    return len(pages)
+
+
+# ============================================================
+# 5. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Crawl a site with several worker processes sharing a SQLite frontier."
+    )
+    arg_parser.add_argument("--db", default=FRONTIER_DB, help="shared frontier (default: %(default)s)")
+    arg_parser.add_argument("--shards", default=SHARD_DIR, help="shard directory (default: %(default)s)")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    def add_seed_args(cmd):
+        cmd.add_argument("start_url", nargs="?", default=crawler.START_URL)
+        cmd.add_argument("--max-pages", type=int, default=crawler.MAX_PAGES)
+        cmd.add_argument("--max-depth", type=int, default=crawler.MAX_CLICK_DEPTH)
+        cmd.add_argument("--no-robots", action="store_true", help="ignore robots.txt")
+        cmd.add_argument("--no-sitemap", action="store_true", help="don't seed from sitemap.xml")
+        cmd.add_argument("--delay", type=float, default=POLITENESS_DELAY,
+                         help="seconds between requests to the site, across all workers (default: %(default)s)")
+        cmd.add_argument("--no-trap-detection", action="store_true",
+                         help="don't throttle URL templates that stop yielding new pages")
+
+    add_seed_args(commands.add_parser("seed", help="start a new crawl: reset the frontier and queue the start URL"))
+
+    work_cmd = commands.add_parser("work", help="run one worker until the frontier is finished")
+    work_cmd.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+
+    merge_cmd = commands.add_parser("merge", help="merge the shards into one graph")
+    merge_cmd.add_argument("-o", "--output", default=OUTPUT_FILE,
+                           help="graph JSON, or a .sqlite store for sites too big for memory")
+
+    run_cmd = commands.add_parser("run", help="seed, run N local workers, merge")
+    add_seed_args(run_cmd)
+    run_cmd.add_argument("--workers", type=int, default=WORKERS)
+    run_cmd.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    run_cmd.add_argument("--serve", metavar="DIR",
+                         help="serve DIR with a local http.server and crawl that instead")
+    run_cmd.add_argument("--port", type=int, default=0)
+    run_cmd.add_argument("--resume", action="store_true",
+                         help="continue the crawl in --db / --shards instead of starting over")
+    run_cmd.add_argument("--trap-report", default=TRAP_REPORT,
+                         help="where to write the suppressed URL templates (default: %(default)s)")
+    run_cmd.add_argument("-o", "--output", default=OUTPUT_FILE)
+
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "work":
+        run_worker(args.db, args.shards, args.concurrency)
+        return
+
+    if args.command == "merge":
+        pages = merge_shards(args.shards, args.output)
+        print(f"Merged {pages} pages into {args.output}")
+        return
+
+    server = None
+    start_url = args.start_url
+    if getattr(args, "serve", None):
+        server, base = crawler.serve_directory(args.serve, args.port)
+        start_url = base + crawler.DEFAULT_DOCUMENT
+
+    try:
+        frontier = SqliteFrontier(args.db)
+        if DETECT_TRAPS and not args.no_trap_detection:
+            frontier.traps = SqliteTrapDetector(frontier.db)
+        if getattr(args, "resume", False):
+            # frontier rows and shard lines are the checkpoint: workers of the
+            # crashed run left their leases behind, everything else is as it was
+            print(f"Resuming: {frontier.stats()}, {frontier.release_leases()} leases released")
+        else:
+            frontier.reset()
+            for path in glob.glob(os.path.join(args.shards, "*.jsonl")):
+                os.remove(path)
+        queued = asyncio.run(seed(
+            frontier, start_url, args.max_pages, args.max_depth,
+            respect_robots=not args.no_robots, use_sitemap=not args.no_sitemap, delay=args.delay,
+        ))
+        frontier.close()
+        print(f"Queued {queued} start URLs in {args.db}")
+        if args.command == "seed":
+            return
+
+        started = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(args.db, args.shards, args.concurrency))
+            for _ in range(args.workers)
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        took = time.perf_counter() - started
+    finally:
+        if server:
+            server.shutdown()
+
+    frontier = SqliteFrontier(args.db)
+    stats = frontier.stats()
+    pages = merge_shards(args.shards, args.output)
+
+    print("--- DOM Graph Crawled (workers) ---")
+    print(f"Pages: {pages} in {took:.2f}s with {args.workers} workers from {start_url}")
+    print("Frontier:", stats)
+    if frontier.get_config().get("detect_traps"):
+        crawler.print_trap_report(SqliteTrapDetector(frontier.db), args.trap_report)
+    frontier.close()
+    print("Nodes:", len(parser.G.nodes))
+    print("Edges:", len(parser.G.edges))
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,601 @@
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+
+import numpy as np
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"   # ← change as needed
+CSR_DIR = "Output_Graph_Csr/dom_graph"            # one .npy per array + meta.json
+
+CATEGORY_SHARE = 0.25     # string columns with at most this share of distinct values are dictionary-encoded
+
+MISSING, VALUE, NULL = 0, 1, 2    # per-row state of an attribute column
+_ABSENT = object()                # "attribute not set" while building
+
+
+def id_hash(node):
+    """
+    Stable 64-bit key of a node ID (the lookup index is saved with the graph).
+    Cheap rather than strong: lookups compare the ID itself on a match.
+    """
+    raw = node.encode("utf-8")
+    return (zlib.crc32(raw) << 32) | zlib.adler32(raw)
+
+
+def column_shapes(columns, n):
+    """
+    Per row, a code for the set of columns it has a value in, and for each
+    code those column names: node_attrs then only visits the columns a node
+    actually has (fetch metadata exists on Page_File nodes only, etc.).
+    """
+    names = list(columns)
+    words = np.zeros((n, max((len(names) + 63) // 64, 1)), dtype=np.uint64)
+    for j, name in enumerate(names):
+        words[:, j // 64] |= (columns[name].state != MISSING).astype(np.uint64) << np.uint64(j % 64)
+    unique, codes = np.unique(words, axis=0, return_inverse=True)
+    shapes = [
+        [name for j, name in enumerate(names) if int(row[j // 64]) >> (j % 64) & 1]
+        for row in unique
+    ]
+    return codes.astype(np.int32).reshape(-1), shapes
+
+
+# ============================================================
+# 2. ATTRIBUTE COLUMNS
+# ============================================================
+
+class Column:
+    """
+    One attribute over all nodes (or edges): a state byte per row
+    (MISSING / VALUE / NULL for JSON null) plus the values in one of:
+      - "category": int32 codes into a list of distinct strings (type, tag, page)
+      - "text" / "json": UTF-8 bytes of all rows in one buffer + int64 offsets
+      - "int" / "float" / "bool": a numpy array
+    """
+
+    def __init__(self, kind, state, arrays, categories=None):
+        self.kind = kind
+        self.state = state
+        self.arrays = arrays        # {"codes"} | {"offsets", "data"} | {"values"}
+        self.categories = categories
+
+        # one getter per kind, bound once: get() is the hot path of every read
+        if kind == "category":
+            codes, categories = arrays["codes"], self.categories
+            self._get = lambda i: categories[codes[i]]
+        elif kind in ("text", "json"):
+            offsets, data = arrays["offsets"], memoryview(arrays["data"])
+            if kind == "text":
+                self._get = lambda i: str(data[offsets[i]:offsets[i + 1]], "utf-8")
+            else:
+                self._get = lambda i: json.loads(str(data[offsets[i]:offsets[i + 1]], "utf-8"))
+        else:
+            values = arrays["values"]
+            self._get = lambda i: values[i].item()
+
+    @classmethod
+    def build(cls, values):
+        """Column from a list of Python values (_ABSENT where the attribute isn't set)."""
+        state = np.fromiter(
+            (MISSING if v is _ABSENT else NULL if v is None else VALUE for v in values),
+            dtype=np.int8, count=len(values),
+        )
+        present = [v for v in values if v is not _ABSENT and v is not None]
+
+        if present and all(isinstance(v, str) for v in present):
+            distinct = list(dict.fromkeys(present))
+            if len(distinct) <= max(CATEGORY_SHARE * len(present), 1):
+                code_of = {c: i for i, c in enumerate(distinct)}
+                codes = np.fromiter((code_of.get(v, -1) if isinstance(v, str) else -1 for v in values),
+                                    dtype=np.int32, count=len(values))
+                return cls("category", state, {"codes": codes}, distinct)
+            return cls._text("text", state, [v if isinstance(v, str) else "" for v in values])
+
+        if present and all(isinstance(v, bool) for v in present):
+            kind, dtype = "bool", np.bool_
+        elif present and all(isinstance(v, int) and not isinstance(v, bool) and -2 ** 63 <= v < 2 ** 63
+                             for v in present):
+            kind, dtype = "int", np.int64
+        elif present and all(isinstance(v, float) for v in present):
+            kind, dtype = "float", np.float64
+        else:
+            # lists, dicts, mixed types: kept exactly, decoded on access
+            return cls._text("json", state, [
+                json.dumps(v) if v is not _ABSENT and v is not None else "" for v in values
+            ])
+
+        filled = [v if s == VALUE else 0 for v, s in zip(values, state)]
+        return cls(kind, state, {"values": np.array(filled, dtype=dtype)})
+
+    @classmethod
+    def _text(cls, kind, state, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+        return cls(kind, state, {"offsets": offsets, "data": data})
+
+    def has(self, i):
+        return self.state[i] != MISSING
+
+    def get(self, i):
+        """Value of row i (None for JSON null); only valid if has(i)."""
+        return None if self.state[i] == NULL else self._get(i)
+
+    def take(self, rows):
+        """Column of the given rows only (for subgraphs)."""
+        state = self.state[rows]
+        if "offsets" not in self.arrays:
+            return Column(self.kind, state, {k: a[rows] for k, a in self.arrays.items()}, self.categories)
+
+        offsets, data = self.arrays["offsets"], self.arrays["data"]
+        starts = offsets[:-1][rows]
+        lengths = offsets[1:][rows] - starts
+        new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=new_offsets[1:])
+        # byte positions of every kept row, without a Python loop over rows
+        positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+        return Column(self.kind, state, {"offsets": new_offsets, "data": data[positions]})
+
+    def nbytes(self):
+        return self.state.nbytes + sum(a.nbytes for a in self.arrays.values())
+
+
+# ============================================================
+# 3. CSR GRAPH
+# ============================================================
+
+class CsrGraph:
+    """
+    Read-only MultiDiGraph in flat arrays.
+
+    Nodes are rows 0..n-1 (node-link order); IDs live in a text column with
+    a sorted 64-bit hash index for lookups. Edges are stored sorted by
+    source (out-CSR: out_ptr, edge_dst, edge_rel codes into `relations`)
+    with an in-CSR (in_ptr, in_edge, in_src) on top. All other node and
+    edge attributes are Columns.
+
+    The networkx-style methods below (nodes, edges, in_edges, out_edges,
+    predecessors, successors, subgraph, get_edge_data) return what a
+    MultiDiGraph would, in the same order, so code written against
+    networkx, e.g. Embedding/embed_graph.get_context_text, runs unchanged.
+    G.nodes[n] builds a fresh dict: changing it does not change the graph.
+    """
+
+    def __init__(self, ids, node_columns, relations, out_ptr, edge_dst, edge_rel, edge_columns,
+                 in_ptr, in_edge, in_src, hash_sorted, hash_order, node_shape, shapes):
+        self.ids = ids
+        self.node_columns = node_columns
+        self.relations = relations
+        self.out_ptr = out_ptr
+        self.edge_dst = edge_dst
+        self.edge_rel = edge_rel
+        self.edge_columns = edge_columns
+        self.in_ptr = in_ptr
+        self.in_edge = in_edge
+        self.in_src = in_src
+        self.hash_sorted = hash_sorted
+        self.hash_order = hash_order
+        self.node_shape = node_shape
+        self.shapes = shapes
+        self.nodes = NodeView(self)
+        self.edges = EdgeView(self)
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    @classmethod
+    def from_arrays(cls, ids, node_columns, relations, src, dst, rel, edge_columns):
+        """Graph from edge arrays in any order; a stable sort by source keeps each node's edge order."""
+        n = len(ids.state)
+        order = np.argsort(src, kind="stable")
+        src, dst, rel = src[order], dst[order], rel[order]
+        edge_columns = {k: c.take(order) for k, c in edge_columns.items()}
+
+        out_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=out_ptr[1:])
+
+        in_edge = np.argsort(dst, kind="stable").astype(np.int32)
+        in_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=n), out=in_ptr[1:])
+
+        hashes = np.fromiter((id_hash(ids.get(i)) for i in range(n)), dtype=np.uint64, count=n)
+        hash_order = np.argsort(hashes, kind="stable").astype(np.int32)
+
+        return cls(ids, node_columns, relations, out_ptr, dst.astype(np.int32), rel, edge_columns,
+                   in_ptr, in_edge, src[in_edge].astype(np.int32), hashes[hash_order], hash_order,
+                   *column_shapes(node_columns, n))
+
+    @classmethod
+    def from_node_link(cls, graph_data):
+        """Graph from nx.node_link_data output (either edges key)."""
+        nodes = graph_data["nodes"]
+        links = graph_data["links"] if "links" in graph_data else graph_data.get("edges", [])
+
+        ids = [node["id"] for node in nodes]
+        index = {node: i for i, node in enumerate(ids)}
+        src = np.empty(len(links), dtype=np.int64)
+        dst = np.empty(len(links), dtype=np.int64)
+        for e, link in enumerate(links):
+            for arr, end in ((src, link["source"]), (dst, link["target"])):
+                if end not in index:           # like networkx: edges add missing nodes
+                    index[end] = len(ids)
+                    ids.append(end)
+                arr[e] = index[end]
+        del index
+
+        node_keys = list(dict.fromkeys(k for node in nodes for k in node if k != "id"))
+        node_columns = {
+            k: Column.build([node.get(k, _ABSENT) for node in nodes] + [_ABSENT] * (len(ids) - len(nodes)))
+            for k in node_keys
+        }
+
+        relations = list(dict.fromkeys(link.get("relation") for link in links))
+        code_of = {r: i for i, r in enumerate(relations)}
+        rel_dtype = np.uint8 if len(relations) <= 256 else np.int32
+        rel = np.fromiter((code_of[link.get("relation")] for link in links), dtype=rel_dtype, count=len(links))
+
+        edge_keys = list(dict.fromkeys(
+            k for link in links for k in link if k not in ("source", "target", "relation")
+        ))
+        edge_columns = {k: Column.build([link.get(k, _ABSENT) for link in links]) for k in edge_keys}
+
+        return cls.from_arrays(Column._text("text", np.ones(len(ids), dtype=np.int8), ids),
+                               node_columns, relations, src, dst, rel, edge_columns)
+
+    @classmethod
+    def from_networkx(cls, G):
+        import networkx as nx
+        return cls.from_node_link(nx.node_link_data(G))
+
+    def to_networkx(self):
+        import networkx as nx
+        H = nx.MultiDiGraph()
+        H.add_nodes_from(self.nodes(data=True))
+        H.add_edges_from(self.edges(keys=True, data=True))
+        return H
+
+    # -----------------------------
+    # Index-level access
+    # -----------------------------
+    def index_of(self, node):
+        """Row of a node ID, or -1."""
+        if not isinstance(node, str):
+            return -1
+        h = np.uint64(id_hash(node))
+        pos = int(self.hash_sorted.searchsorted(h))
+        while pos < len(self.hash_sorted) and self.hash_sorted[pos] == h:
+            i = int(self.hash_order[pos])
+            if self.ids.get(i) == node:
+                return i
+            pos += 1
+        return -1
+
+    def _row(self, node):
+        i = self.index_of(node)
+        if i < 0:
+            raise KeyError(node)
+        return i
+
+    def node_attrs(self, i):
+        columns = self.node_columns
+        return {k: columns[k].get(i) for k in self.shapes[self.node_shape[i]]}
+
+    def edge_attrs(self, e):
+        attrs = {}
+        relation = self.relations[self.edge_rel[e]]
+        if relation is not None:
+            attrs["relation"] = relation
+        for k, c in self.edge_columns.items():
+            if k != "key" and c.has(e):
+                attrs[k] = c.get(e)
+        return attrs
+
+    def edge_key(self, e, default=0):
+        column = self.edge_columns.get("key")
+        return column.get(e) if column is not None and column.has(e) else default
+
+    def _edge_tuple(self, u, v, e, data, keys, default):
+        out = (u, v)
+        if keys:
+            out += (self.edge_key(e),)
+        if data is True:
+            out += (self.edge_attrs(e),)
+        elif data is not False:
+            if data == "relation":
+                value = self.relations[self.edge_rel[e]]
+            else:
+                column = self.edge_columns.get(data)
+                value = column.get(e) if column is not None and column.has(e) else None
+            out += (default if value is None else value,)
+        return out
+
+    def _rows(self, nbunch):
+        if nbunch is None:
+            return range(len(self.ids.state))
+        if isinstance(nbunch, str):
+            i = self.index_of(nbunch)
+            return [i] if i >= 0 else []
+        return [r for r in (self.index_of(n) for n in nbunch) if r >= 0]
+
+    # -----------------------------
+    # networkx-compatible reads
+    # -----------------------------
+    def __len__(self):
+        return len(self.ids.state)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, node):
+        return self.index_of(node) >= 0
+
+    def has_node(self, node):
+        return node in self
+
+    def number_of_nodes(self):
+        return len(self)
+
+    def number_of_edges(self):
+        return len(self.edge_dst)
+
+    def is_directed(self):
+        return True
+
+    def is_multigraph(self):
+        return True
+
+    def out_edges(self, nbunch=None, data=False, keys=False, default=None):
+        ids = self.ids
+        for i in self._rows(nbunch):
+            u = ids.get(i)
+            for e in range(self.out_ptr[i], self.out_ptr[i + 1]):
+                yield self._edge_tuple(u, ids.get(self.edge_dst[e]), e, data, keys, default)
+
+    def in_edges(self, nbunch=None, data=False, keys=False, default=None):
+        ids = self.ids
+        for i in self._rows(nbunch):
+            v = ids.get(i)
+            for pos in range(self.in_ptr[i], self.in_ptr[i + 1]):
+                yield self._edge_tuple(ids.get(self.in_src[pos]), v, self.in_edge[pos], data, keys, default)
+
+    def successors(self, node):
+        i = self._row(node)
+        rows = dict.fromkeys(self.edge_dst[self.out_ptr[i]:self.out_ptr[i + 1]].tolist())
+        return iter([self.ids.get(r) for r in rows])
+
+    def predecessors(self, node):
+        i = self._row(node)
+        rows = dict.fromkeys(self.in_src[self.in_ptr[i]:self.in_ptr[i + 1]].tolist())
+        return iter([self.ids.get(r) for r in rows])
+
+    neighbors = successors
+
+    def out_degree(self, node):
+        i = self._row(node)
+        return int(self.out_ptr[i + 1] - self.out_ptr[i])
+
+    def in_degree(self, node):
+        i = self._row(node)
+        return int(self.in_ptr[i + 1] - self.in_ptr[i])
+
+    def has_edge(self, u, v, key=None):
+        return bool(self.get_edge_data(u, v, key))
+
+    def get_edge_data(self, u, v, key=None, default=None):
+        """{key: attrs} of all u → v edges (attrs of one with key=...), or default."""
+        i, j = self.index_of(u), self.index_of(v)
+        if i < 0 or j < 0:
+            return default
+        found = {}
+        for e in range(self.out_ptr[i], self.out_ptr[i + 1]):
+            if self.edge_dst[e] == j:
+                found[self.edge_key(e)] = self.edge_attrs(e)
+        if key is not None:
+            return found.get(key, default)
+        return found or default
+
+    def subgraph(self, nodes):
+        """Induced subgraph as a new (compact) CsrGraph, in this graph's node and edge order."""
+        n = len(self)
+        keep = np.zeros(n, dtype=bool)
+        for node in nodes:
+            i = self.index_of(node)
+            if i >= 0:
+                keep[i] = True
+        rows = np.flatnonzero(keep)
+        new_row = np.full(n, -1, dtype=np.int64)
+        new_row[rows] = np.arange(len(rows))
+
+        src = np.repeat(np.arange(n), np.diff(self.out_ptr))
+        kept_edges = np.flatnonzero(keep[src] & keep[self.edge_dst])
+        return CsrGraph.from_arrays(
+            self.ids.take(rows),
+            {k: c.take(rows) for k, c in self.node_columns.items()},
+            self.relations,
+            new_row[src[kept_edges]], new_row[self.edge_dst[kept_edges]], self.edge_rel[kept_edges],
+            {k: c.take(kept_edges) for k, c in self.edge_columns.items()},
+        )
+
+    def copy(self):
+        return self     # read-only: nothing can change under the caller
+
+    # -----------------------------
+    # Size + persistence
+    # -----------------------------
+    def _arrays(self):
+        arrays = {
+            "out_ptr": self.out_ptr, "edge_dst": self.edge_dst, "edge_rel": self.edge_rel,
+            "in_ptr": self.in_ptr, "in_edge": self.in_edge, "in_src": self.in_src,
+            "hash_sorted": self.hash_sorted, "hash_order": self.hash_order, "node_shape": self.node_shape,
+        }
+        for prefix, columns in (("node", {"id": self.ids, **self.node_columns}), ("edge", self.edge_columns)):
+            for n, column in enumerate(columns.values()):
+                arrays[f"{prefix}{n}_state"] = column.state
+                for name, array in column.arrays.items():
+                    arrays[f"{prefix}{n}_{name}"] = array
+        return arrays
+
+    def nbytes(self):
+        """Bytes held in arrays (category lists and Python overhead not counted)."""
+        return sum(a.nbytes for a in self._arrays().values())
+
+    def save(self, directory=CSR_DIR):
+        """One .npy per array plus meta.json, written last (load() needs it)."""
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self._arrays().items():
+            np.save(os.path.join(directory, name + ".npy"), array)
+
+        def describe(columns):
+            return [{"name": k, "kind": c.kind, "categories": c.categories, "arrays": list(c.arrays)}
+                    for k, c in columns.items()]
+
+        meta = {
+            "format": 1,
+            "nodes": len(self), "edges": self.number_of_edges(),
+            "relations": self.relations,
+            "shapes": self.shapes,
+            "node_columns": describe({"id": self.ids, **self.node_columns}),
+            "edge_columns": describe(self.edge_columns),
+        }
+        tmp_file = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=4)
+        os.replace(tmp_file, os.path.join(directory, "meta.json"))
+
+    @classmethod
+    def load(cls, directory=CSR_DIR, mmap=True):
+        """Open a saved graph; with mmap=True arrays are paged in from disk as they are read."""
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+
+        def array(name):
+            return np.load(os.path.join(directory, name + ".npy"), mmap_mode=mode)
+
+        def columns(prefix, described):
+            return {
+                c["name"]: Column(c["kind"], array(f"{prefix}{n}_state"),
+                                  {a: array(f"{prefix}{n}_{a}") for a in c["arrays"]}, c["categories"])
+                for n, c in enumerate(described)
+            }
+
+        node_columns = columns("node", meta["node_columns"])
+        ids = node_columns.pop("id")
+        return cls(ids, node_columns, meta["relations"], array("out_ptr"), array("edge_dst"), array("edge_rel"),
+                   columns("edge", meta["edge_columns"]), array("in_ptr"), array("in_edge"), array("in_src"),
+                   array("hash_sorted"), array("hash_order"), array("node_shape"), meta["shapes"])
+
+
+class NodeView:
+    """G.nodes: G.nodes[n], G.nodes(data=...), n in G.nodes, G.nodes.get(n), len, iteration."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False, default=None):
+        if data is False:
+            return self
+        return self._data(data, default)
+
+    def _data(self, data, default):
+        graph = self._graph
+        if data is True:
+            for i in range(len(graph)):
+                yield graph.ids.get(i), graph.node_attrs(i)
+            return
+        column = graph.node_columns.get(data)
+        for i in range(len(graph)):
+            value = column.get(i) if column is not None and column.has(i) else None
+            yield graph.ids.get(i), default if value is None else value
+
+    def __getitem__(self, node):
+        return self._graph.node_attrs(self._graph._row(node))
+
+    def get(self, node, default=None):
+        i = self._graph.index_of(node)
+        return default if i < 0 else self._graph.node_attrs(i)
+
+    def __contains__(self, node):
+        return self._graph.index_of(node) >= 0
+
+    def __iter__(self):
+        ids = self._graph.ids
+        return (ids.get(i) for i in range(len(self._graph)))
+
+    def __len__(self):
+        return len(self._graph)
+
+
+class EdgeView:
+    """G.edges: G.edges(nbunch, data=..., keys=...), len, iteration over (u, v, key) like a MultiDiGraph."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, nbunch=None, data=False, keys=False, default=None):
+        return self._graph.out_edges(nbunch, data=data, keys=keys, default=default)
+
+    def __iter__(self):
+        return self._graph.out_edges(keys=True)
+
+    def __len__(self):
+        return self._graph.number_of_edges()
+
+
+def load_csr_graph(path):
+    """A saved CSR directory, or a node-link JSON file converted on the fly."""
+    if os.path.isdir(path):
+        return CsrGraph.load(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return CsrGraph.from_node_link(json.load(f))
+
+
+# ============================================================
+# 4. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Convert a DOM graph JSON into the compact CSR format.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE)
+    arg_parser.add_argument("-o", "--output", default=CSR_DIR)
+    arg_parser.add_argument("--compare", action="store_true",
+                            help="also measure the memory networkx needs for the same graph")
+    args = arg_parser.parse_args(argv)
+
+    with open(args.graph, "r", encoding="utf-8") as f:
+        graph_data = json.load(f)
+
+    started = time.perf_counter()
+    G = CsrGraph.from_node_link(graph_data)
+    took = time.perf_counter() - started
+    G.save(args.output)
+
+    print("--- CSR Graph ---")
+    print(f"Nodes: {len(G)}  Edges: {G.number_of_edges()}  Relations: {len(G.relations)}")
+    print(f"Arrays: {G.nbytes() / 1e6:.1f} MB ({G.nbytes() / max(len(G) + G.number_of_edges(), 1):.0f} B "
+          f"per node+edge), built in {took:.2f}s")
+
+    if args.compare:
+        import tracemalloc
+        import networkx as nx
+        tracemalloc.start()
+        H = nx.node_link_graph(graph_data, edges="links" if "links" in graph_data else "edges")
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"networkx: {used / 1e6:.1f} MB for {H.number_of_nodes()} nodes "
+              f"({used / max(G.nbytes(), 1):.1f}x the CSR arrays)")
+
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,18 @@
 import os
 import re
 import json
+import time
+import hashlib
+from collections import deque
 import networkx as nx
-from bs4 import BeautifulSoup, Tag
+import soupsieve as sv
+from bs4 import BeautifulSoup, Tag, NavigableString
+from bs4.element import PreformattedString
+
+import near_duplicates
+import page_rank
+from graph_index import GraphIndex
+from anchor_index import AnchorIndex, ANCHOR_REPORT
 
 
 # ============================================================
@@ -11,20 +21,76 @@ from bs4 import BeautifulSoup, Tag
 
 ROOT_DIR = "../StaticTestWebsite"     # ← change as needed
 START_PAGE = ROOT_DIR + "/index.html"
+OUTPUT_FILE = "Output_Graph_Json/dom_graph.json"
+
+# "all":       parse every .html in ROOT_DIR
+# "reachable": breadth-first from START_PAGE along LINKS_TO_PAGE edges,
+#              so orphaned drafts are never read or parsed
+CRAWL_MODE = "all"
+MAX_CLICK_DEPTH = None    # "reachable" only; None = follow links all the way
 
-file_contents = {}
+# Link near-identical pages with NEAR_DUPLICATE_OF edges (see near_duplicates.py)
+MARK_NEAR_DUPLICATES = True
 
-# Load all HTML files
-for filename in os.listdir(ROOT_DIR):
-    if filename.endswith(".html"):
-        with open(os.path.join(ROOT_DIR, filename), "r", encoding="utf-8") as f:
-            file_contents[filename] = f.read()
+# Store PageRank / HITS / in-degree on Page_File nodes (see page_rank.py)
+SCORE_PAGES = True
 
-all_known_pages = set(file_contents.keys())
+all_known_pages = set()
 
 G = nx.MultiDiGraph()
 node_counters = {}   # per-page counters
 node_map = {}        # reserved but not used
+node_index = GraphIndex(G)   # type / tag / page / hostname / xpath lookups, kept current per page
+anchor_index = AnchorIndex(G)   # inbound links + anchor texts per page, kept current per page
+
+# Edges that make up a page's own tree (everything add_page creates for it)
+PAGE_TREE_RELATIONS = {"CONTAINS", "CONTAINS_DATA"}
+
+# Per-page resource budget (None = unlimited), so one pathological page
+# (huge table, deep nesting, megabytes of inline text) can't stall the run.
+PAGE_LIMITS = {
+    "max_bytes": 2_000_000,       # bytes read per file (also bounds BeautifulSoup parse time)
+    "max_elements": 50_000,       # DOM nodes created per page
+    "max_depth": 200,             # deeper subtrees are cut off (never skips the page)
+    "max_seconds": 10.0,          # wall clock per page
+    "max_text_chars": 20_000,     # full_text / heading_text / title_text
+}
+ON_LIMIT = "truncate"   # "truncate": keep what was built, "skip": drop the page's DOM
+                        # once a page-wide limit (bytes, elements, seconds) is hit
+PAGE_WIDE_LIMITS = {"max_bytes", "max_elements", "max_seconds"}
+BUDGET_ATTRS = ("budget_skipped", "budget_truncated")
+
+page_budget = {}        # state for the page currently being built
+page_text = []          # its visible text in document order, for the page's SimHash
+page_budget_log = {}    # filename -> {"action": ..., "reasons": [...]}
+
+FULL_TEXT_TAGS = {"title", "h1", "h2", "h3", "h4", "p"}
+SNIPPET_CHARS = 150
+
+# Per-site extraction scope, keyed by the site directory name. Only subtrees
+# matching "include" become nodes (empty = whole page); subtrees matching
+# "exclude" are never visited. With keep_excluded_links, links inside an
+# excluded subtree are still recorded on the nearest built ancestor.
+SITE_SCOPES = {
+    # "StaticTestWebsite": {
+    #     "include": ["main", "#content"],
+    #     "exclude": ["nav", "footer", ".cookie-banner"],
+    #     "keep_excluded_links": True,
+    # },
+}
+
+active_scope = {}       # compiled scope of the site being built (see set_site_scope)
+
+# Optional fn(href, page_name) -> target page name or None. The default
+# (None) matches the href's file name against all_known_pages; the HTTP
+# crawler plugs in URL resolution, since it learns about pages as it goes.
+link_resolver = None
+
+# Local .html links whose file is no known page (yet), so they got no edge:
+# target name -> {source page}. watch_site re-parses the sources once the
+# target appears; dangling_from lets remove_page take a page's entries back.
+dangling_links = {}
+dangling_from = {}
 
 
 # ============================================================
@@ -45,6 +111,15 @@ def get_node_id(page_name, tag):
     return f"{page_name}_{tag_name}_{idx}"
 
 
+def get_data_node_id(page_name):
+    """Per-page counter for Data_Link nodes, so re-parsing a page reproduces its IDs."""
+    counters = node_counters.setdefault(page_name, {})
+    idx = counters.setdefault("DATA", 0)
+    counters["DATA"] += 1
+
+    return f"{page_name}_DATA_{idx}"
+
+
 def get_simple_xpath(tag):
     """
     Generate a robust simple XPath for traceability.
@@ -62,11 +137,13 @@ def get_simple_xpath(tag):
             s for s in parent.find_all(current.name, recursive=False)
         ]
 
-        if current not in same_tag_siblings:
+        # Compare by identity: Tag == Tag is structural, so two identical
+        # siblings would otherwise both get the first one's index
+        index = next((i for i, s in enumerate(same_tag_siblings, 1) if s is current), None)
+        if index is None:
             # BeautifulSoup sometimes changes tree during parsing
             break
 
-        index = same_tag_siblings.index(current) + 1
         path.insert(0, f"{current.name}[{index}]")
 
         current = parent
@@ -79,6 +156,32 @@ def clean_text(s):
     return " ".join(s.split())
 
 
+def get_text_prefix(element, limit):
+    """
+    clean_text(element.get_text())[:limit] without joining the whole subtree
+    text first. Matters for containers high up the tree: <body> over a 200k-row
+    table would otherwise copy megabytes just to keep a 150-char snippet.
+    """
+    if limit is None:
+        return clean_text(element.get_text())
+
+    parts = []
+    raw_size = 0
+    next_check = limit
+
+    for s in element.strings:
+        parts.append(s)
+        raw_size += len(s)
+        if raw_size > next_check:
+            text = clean_text("".join(parts))
+            # everything before the last (possibly unfinished) word is final
+            if len(text) > limit:
+                return text[:limit]
+            next_check = raw_size * 2
+
+    return clean_text("".join(parts))[:limit]
+
+
 def extract_link_text(a_tag):
     """Extract readable link text, falling back to <img alt> or 'Link'."""
     txt = a_tag.get_text(strip=True)
@@ -96,27 +199,186 @@ def extract_link_text(a_tag):
 # 3. DOM TRAVERSAL
 # ============================================================
 
-def build_dom_tree(element, parent_node_id, page_name, depth=0):
+def compile_scope(scope):
+    """Compile a SITE_SCOPES entry once: selector lists → soupsieve patterns."""
+    include = scope.get("include") or []
+    exclude = scope.get("exclude") or []
+    return {
+        "include": sv.compile(", ".join(include)) if include else None,
+        "exclude": sv.compile(", ".join(exclude)) if exclude else None,
+        "keep_excluded_links": scope.get("keep_excluded_links", False),
+    }
+
+
+def set_site_scope(root_dir):
+    """Activate the SITE_SCOPES entry for a site directory or hostname (none = whole page)."""
+    site_name = os.path.basename(os.path.normpath(root_dir))
+    active_scope.clear()
+    active_scope.update(compile_scope(SITE_SCOPES.get(site_name, {})))
+
+
+def set_link_resolver(resolver):
+    global link_resolver
+    link_resolver = resolver
+
+
+def resolve_page_link(href, page_name):
+    """Page name an href points to, or None if it is not an internal page."""
+    if link_resolver is not None:
+        return link_resolver(href, page_name)
+
+    target = href.split("/")[-1]
+    return target if target in all_known_pages else None
+
+
+def add_link_edges(node_id, a_tag, page_name, **edge_attrs):
+    """Turn one <a href> into a page / external / data link hanging off node_id."""
+    href = a_tag["href"].split("#")[0]
+    link_txt = extract_link_text(a_tag)
+    target = resolve_page_link(href, page_name)
+
+    if target is not None:
+        # Page → Page link edge
+        G.add_edge(node_id, target, relation="LINKS_TO_PAGE", anchor=link_txt, **edge_attrs)
+
+    elif re.match(r"^(http|https)", href):
+        # External web page (not email/phone)
+        external_node_id = href  # use full URL as node ID to merge duplicates
+
+        # Create the external page node if not present
+        if external_node_id not in G:
+            G.add_node(
+                external_node_id,
+                type="External_Page",
+                url=href,
+                label=link_txt,
+                hostname=re.sub(r"^https?://", "", href).split("/")[0]  # domain
+            )
+
+        G.add_edge(node_id, external_node_id, relation="LINKS_TO_EXTERNAL_PAGE", anchor=link_txt, **edge_attrs)
+
+    elif re.match(r"^(mailto:|tel:)", href):
+        # Non-page external target (email, phone)
+        data_node_id = get_data_node_id(page_name)
+
+        G.add_node(
+            data_node_id,
+            type="Data_Link",
+            data_type=href.split(":")[0],
+            value=href,
+            label=link_txt
+        )
+
+        G.add_edge(node_id, data_node_id, relation="CONTAINS_DATA", anchor=link_txt, **edge_attrs)
+
+    elif link_resolver is None and href.endswith(".html"):
+        target = href.split("/")[-1]
+        dangling_links.setdefault(target, set()).add(page_name)
+        dangling_from.setdefault(page_name, set()).add(target)
+
+
+def record_excluded_links(element, parent_node_id, page_name):
+    """Links inside an excluded subtree, attached to the nearest built ancestor."""
+    anchors = [element] if element.name == "a" else []
+    anchors += element.find_all("a", href=True)
+
+    for a_tag in anchors:
+        if a_tag.has_attr("href"):
+            add_link_edges(parent_node_id, a_tag, page_name, excluded_region=True)
+
+
+def scope_regions(root):
+    """Outermost elements matching the include selector, in document order."""
+    regions = active_scope["include"].select(root)
+    selected = {id(r) for r in regions}
+    return [r for r in regions if not any(id(p) in selected for p in r.parents)]
+
+
+def start_page_budget():
+    page_budget.clear()
+    page_budget.update(
+        elements=0,
+        started=time.monotonic(),
+        exhausted=False,
+        reasons=[],
+    )
+
+
+def record_limit(reason):
+    if reason not in page_budget["reasons"]:
+        page_budget["reasons"].append(reason)
+
+
+def within_page_budget(depth):
+    """
+    Count one more element against the page budget.
+    Depth cuts off only the current subtree; elements and time stop the page.
+    """
+    if page_budget.get("exhausted"):
+        return False
+
+    max_depth = PAGE_LIMITS.get("max_depth")
+    if max_depth is not None and depth > max_depth:
+        record_limit("max_depth")
+        return False
+
+    page_budget["elements"] += 1
+
+    max_elements = PAGE_LIMITS.get("max_elements")
+    if max_elements is not None and page_budget["elements"] > max_elements:
+        record_limit("max_elements")
+        page_budget["exhausted"] = True
+        return False
+
+    # checking the clock every element is measurable, every 256 is not
+    max_seconds = PAGE_LIMITS.get("max_seconds")
+    if (max_seconds is not None and page_budget["elements"] % 256 == 0
+            and time.monotonic() - page_budget["started"] > max_seconds):
+        record_limit("max_seconds")
+        page_budget["exhausted"] = True
+        return False
+
+    return True
+
+
+def build_dom_tree(element, parent_node_id, page_name, depth=0, xpath=None):
     if not isinstance(element, Tag):
         return
 
     if element.name in ["script", "style", "meta", "link", "br", "hr"]:
         return
 
+    exclude = active_scope.get("exclude")
+    if exclude is not None and exclude.match(element):
+        if active_scope["keep_excluded_links"] and parent_node_id:
+            record_excluded_links(element, parent_node_id, page_name)
+        return
+
+    if page_budget and not within_page_budget(depth):
+        return
+
     # -----------------------------
     # Create node for this element
     # -----------------------------
     node_id = get_node_id(page_name, element)
 
-    text_content = clean_text(element.get_text())
+    # Children get their XPath from the parent's (see recursion below);
+    # only the entry point pays for get_simple_xpath.
+    if xpath is None:
+        xpath = get_simple_xpath(element)
+
+    if element.name in FULL_TEXT_TAGS:
+        text_content = get_text_prefix(element, PAGE_LIMITS.get("max_text_chars"))
+    else:
+        text_content = get_text_prefix(element, SNIPPET_CHARS)
 
     node_attrs = {
         "type": "DOM_Element",
         "tag": element.name,
-        "xpath": get_simple_xpath(element),
+        "xpath": xpath,
         "page": page_name,
         "depth": depth,
-        "text_snippet": text_content[:150]
+        "text_snippet": text_content[:SNIPPET_CHARS]
     }
 
     # Tag-specific node types
@@ -142,98 +404,358 @@ def build_dom_tree(element, parent_node_id, page_name, depth=0):
     # Process <a> links
     # -----------------------------
     if element.name == "a" and element.has_attr("href"):
-        href = element["href"].split("#")[0]
-        link_txt = extract_link_text(element)
-        target = href.split("/")[-1]
+        add_link_edges(node_id, element, page_name)
+
+    # -----------------------------
+    # Recurse into children
+    # -----------------------------
+    # Same-name sibling positions, as get_simple_xpath counts them.
+    # text_digest covers the element's whole text (its own strings and its
+    # children's digests), which text_snippet cuts off at SNIPPET_CHARS.
+    sibling_index = {}
+    digest = hashlib.blake2b(digest_size=8)
+    for child in element.children:
+        if isinstance(child, Tag):
+            sibling_index[child.name] = sibling_index.get(child.name, 0) + 1
+            child_xpath = f"{xpath.rstrip('/')}/{child.name}[{sibling_index[child.name]}]"
+            child_digest = build_dom_tree(child, node_id, page_name, depth + 1, child_xpath)
+            if child_digest:
+                digest.update(child_digest)
+        elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+            text = clean_text(child)
+            if text:
+                page_text.append(text)
+                digest.update(text.encode("utf-8") + b"\x00")
+
+    G.nodes[node_id]["text_digest"] = digest.hexdigest()
+    return digest.digest()
 
-        if target in all_known_pages:
-            # Page → Page link edge
-            G.add_edge(node_id, target, relation="LINKS_TO_PAGE", anchor=link_txt)
 
+# ============================================================
+# 4. PAGE-LEVEL BUILD / REMOVE
+# ============================================================
 
-        elif re.match(r"^(http|https)", href):
+def read_html_file(path):
+    """Read an HTML file, never more than PAGE_LIMITS["max_bytes"] + 1 bytes."""
+    max_bytes = PAGE_LIMITS.get("max_bytes")
 
-            # External web page (not email/phone)
+    with open(path, "rb") as f:
+        raw = f.read() if max_bytes is None else f.read(max_bytes + 1)
 
-            external_node_id = href  # use full URL as node ID to merge duplicates
+    return raw.decode("utf-8", errors="ignore")
 
-            # Create the external page node if not present
 
-            if external_node_id not in G:
-                G.add_node(
+def load_site_files(root_dir=ROOT_DIR):
+    """Read all .html files in root_dir into {filename: content}."""
+    file_contents = {}
 
-                    external_node_id,
+    for filename in os.listdir(root_dir):
+        if filename.endswith(".html"):
+            file_contents[filename] = read_html_file(os.path.join(root_dir, filename))
 
-                    type="External_Page",
+    return file_contents
 
-                    url=href,
 
-                    label=link_txt,
+def add_page(filename, content):
+    """
+    Parse one page into G: its Page_File node plus the DOM tree, within
+    PAGE_LIMITS. Pages that hit a limit are truncated or skipped (ON_LIMIT);
+    either way the reason ends up on the Page_File node and in page_budget_log.
+    """
+    page_node = filename
+    page_budget_log.pop(filename, None)
+    if page_node in G:
+        # re-parsed in place: the last parse's limits and fingerprint no longer apply
+        for attr in BUDGET_ATTRS + ("simhash",):
+            G.nodes[page_node].pop(attr, None)
+
+    max_bytes = PAGE_LIMITS.get("max_bytes")
+    oversized = max_bytes is not None and len(content.encode("utf-8")) > max_bytes
+
+    if oversized and ON_LIMIT == "skip":
+        G.add_node(page_node, type="Page_File", title=filename, budget_skipped=["max_bytes"])
+        page_budget_log[filename] = {"action": "skip", "reasons": ["max_bytes"]}
+        index_page(filename)
+        return
 
-                    hostname=re.sub(r"^https?://", "", href).split("/")[0]  # domain
+    if oversized:
+        content = content.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
 
-                )
+    soup = BeautifulSoup(content, "html.parser")
 
-            G.add_edge(node_id, external_node_id, relation="LINKS_TO_EXTERNAL_PAGE", anchor=link_txt)
+    title = soup.title.string.strip() if soup.title and soup.title.string else filename
+    G.add_node(page_node, type="Page_File", title=title)
 
+    # Use <html> or <body> or document root
+    root = soup.find("html") or soup.find("body") or soup
 
-        elif re.match(r"^(mailto:|tel:)", href):
+    start_page_budget()
+    page_text.clear()
+    if oversized:
+        record_limit("max_bytes")
+    try:
+        if active_scope.get("include") is None:
+            build_dom_tree(root, page_node, filename, depth=0)
+        else:
+            # Scoped: each included region hangs directly off the page node,
+            # keeping its real XPath and depth within the document
+            for region in scope_regions(root):
+                depth = sum(1 for p in region.parents if p.name != "[document]")
+                build_dom_tree(region, page_node, filename, depth, get_simple_xpath(region))
+    finally:
+        reasons = list(page_budget["reasons"])
+        page_budget.clear()
+
+    fingerprint = near_duplicates.page_simhash(G, filename, " ".join(page_text))
+    page_text.clear()
+    if fingerprint is not None:
+        G.nodes[page_node]["simhash"] = f"{fingerprint:016x}"
+
+    if not reasons:
+        index_page(filename)
+        return
 
-            # Non-page external target (email, phone)
+    if ON_LIMIT == "skip" and PAGE_WIDE_LIMITS.intersection(reasons):
+        remove_page(filename, keep_page_node=True)
+        G.nodes[page_node].pop("simhash", None)
+        G.nodes[page_node]["budget_skipped"] = reasons
+        page_budget_log[filename] = {"action": "skip", "reasons": reasons}
+    else:
+        G.nodes[page_node]["budget_truncated"] = reasons
+        page_budget_log[filename] = {"action": "truncate", "reasons": reasons}
+    index_page(filename)
 
-            data_node_id = f"{page_name}_DATA_{len(G.nodes)}"
 
-            G.add_node(
+def index_page(filename):
+    """Bring node_index and anchor_index up to date for a page: its tree and every node it links to."""
+    page_nodes = get_page_nodes(filename)
+    nodes = [filename] + page_nodes
+    node_index.update(nodes + [v for _, v in G.out_edges(nodes)])
+    anchor_index.update_page(filename, page_nodes)
 
-                data_node_id,
 
-                type="Data_Link",
+def reset_graph():
+    """Empty G together with everything kept alongside it (counters, indexes)."""
+    G.clear()
+    node_counters.clear()
+    node_index.clear()
+    anchor_index.clear()
+    dangling_links.clear()
+    dangling_from.clear()
 
-                data_type=href.split(":")[0],
 
-                value=href,
+def rebuild_indexes():
+    """Re-derive node_index and anchor_index after G was filled in bulk (e.g. G.update)."""
+    node_index.rebuild()
+    anchor_index.rebuild()
 
-                label=link_txt
 
-            )
+def get_page_nodes(filename):
+    """All nodes add_page created for a page (DOM + Data_Link), via the page tree, in document order."""
+    if filename not in G:
+        return []
 
-            G.add_edge(node_id, data_node_id, relation="CONTAINS_DATA", anchor=link_txt)
+    nodes = []
+    stack = [filename]
+    while stack:
+        node = stack.pop()
+        if node != filename:
+            nodes.append(node)
+        children = [child for _, child, rel in G.out_edges(node, data="relation") if rel in PAGE_TREE_RELATIONS]
+        stack.extend(reversed(children))   # first child on top: pre-order
 
-    # -----------------------------
-    # Recurse into children
-    # -----------------------------
-    for child in element.children:
-        if isinstance(child, Tag):
-            build_dom_tree(child, node_id, page_name, depth + 1)
+    return nodes
+
+
+def remove_page(filename, keep_page_node=False):
+    """
+    Undo add_page for one page, touching only that page's subtree.
+
+    External_Page nodes that no other page links to anymore are dropped too.
+    With keep_page_node=True the Page_File node (and the LINKS_TO_PAGE edges
+    other pages point at it) stays, so the page can be re-parsed in place.
+    """
+    page_nodes = get_page_nodes(filename)
+
+    externals = {
+        v for n in page_nodes
+        for _, v, rel in G.out_edges(n, data="relation")
+        if rel == "LINKS_TO_EXTERNAL_PAGE"
+    }
+
+    G.remove_nodes_from(page_nodes)
+    if not keep_page_node and filename in G:
+        G.remove_node(filename)
+
+    for ext in externals:
+        if ext in G and G.in_degree(ext) == 0:
+            G.remove_node(ext)
+
+    node_index.update([filename] + page_nodes + list(externals))
+    anchor_index.remove_page(filename)
+    node_counters.pop(filename, None)
+
+    for target in dangling_from.pop(filename, ()):
+        dangling_links[target].discard(filename)
+        if not dangling_links[target]:
+            del dangling_links[target]
+
+
+def page_subgraph(filename):
+    """
+    Node-link data for one page: Page_File, its tree, every edge leaving it
+    and the External_Page nodes it links to. Targets of LINKS_TO_PAGE edges
+    appear as bare IDs; their attributes belong to their own page.
+    """
+    SUB = nx.MultiDiGraph()
+    nodes = [filename] + get_page_nodes(filename)
+
+    for node in nodes:
+        SUB.add_node(node, **G.nodes[node])
+
+    for node in nodes:
+        for _, v, attrs in G.out_edges(node, data=True):
+            if attrs.get("relation") == "LINKS_TO_EXTERNAL_PAGE":
+                SUB.add_node(v, **G.nodes[v])
+            SUB.add_edge(node, v, **attrs)
+
+    return nx.node_link_data(SUB)
+
+
+def merge_page_subgraph(graph_data):
+    """Merge the output of page_subgraph back into G."""
+    edges_key = "links" if "links" in graph_data else "edges"
+
+    for node in graph_data["nodes"]:
+        attrs = {k: v for k, v in node.items() if k != "id"}
+        if node["id"] in G and attrs.get("type") == "External_Page":
+            # shared External_Page nodes keep the label they were first seen with
+            for k, v in attrs.items():
+                G.nodes[node["id"]].setdefault(k, v)
+        else:
+            G.add_node(node["id"], **attrs)
+
+    for edge in graph_data[edges_key]:
+        attrs = {k: v for k, v in edge.items() if k not in ("source", "target", "key")}
+        G.add_edge(edge["source"], edge["target"], **attrs)
+
+    node_index.update([node["id"] for node in graph_data["nodes"]]
+                      + [edge["target"] for edge in graph_data[edges_key]])
+    if graph_data["nodes"]:
+        anchor_index.update_page(graph_data["nodes"][0]["id"])   # page_subgraph lists the page first
+
+
+def export_graph(output_file=OUTPUT_FILE):
+    """Write G as node-link JSON (via a temp file, so readers never see half a graph)."""
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    graph_data = nx.node_link_data(G)
+    json_string = json.dumps(graph_data, indent=4)
+
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(json_string)
+    os.replace(tmp_file, output_file)
 
 
 # ============================================================
-# 4. PROCESS ALL PAGES
+# 5. REACHABILITY CRAWL FROM START_PAGE
 # ============================================================
 
-for filename, content in file_contents.items():
-    soup = BeautifulSoup(content, "html.parser")
+def page_link_targets(filename):
+    """Internal pages a parsed page links to, in document order, without duplicates."""
+    targets = {}
+    for node in get_page_nodes(filename):
+        for _, v, rel in G.out_edges(node, data="relation"):
+            if rel == "LINKS_TO_PAGE":
+                targets[v] = True
+    return list(targets)
 
-    page_node = filename
-    title = soup.title.string.strip() if soup.title else filename
-    G.add_node(page_node, type="Page_File", title=title)
 
-    # Use <html> or <body> or document root
-    root = soup.find("html") or soup.find("body") or soup
-    build_dom_tree(root, page_node, filename, depth=0)
+def crawl_site(root_dir=ROOT_DIR, start_page=START_PAGE, max_depth=MAX_CLICK_DEPTH):
+    """
+    Parse only pages reachable from start_page, breadth-first, up to
+    max_depth clicks away. The directory listing (no reads) tells the link
+    check which targets exist; files are read when they are discovered.
+
+    Parsed Page_File nodes get "crawl_depth". Pages linked from the depth
+    limit but not parsed keep a Page_File node with parsed=False.
+    Returns {filename: click depth} for every parsed page.
+    """
+    all_known_pages.update(f for f in os.listdir(root_dir) if f.endswith(".html"))
+    set_site_scope(root_dir)
+
+    start = os.path.basename(start_page)
+    depths = {start: 0}
+    frontier = {}
+    queue = deque([start])
+
+    while queue:
+        filename = queue.popleft()
+        depth = depths[filename]
+
+        add_page(filename, read_html_file(os.path.join(root_dir, filename)))
+        G.nodes[filename]["crawl_depth"] = depth
+
+        for target in page_link_targets(filename):
+            if target in depths:
+                continue
+            if max_depth is not None and depth >= max_depth:
+                frontier.setdefault(target, depth + 1)
+                continue
+            depths[target] = depth + 1
+            queue.append(target)
+
+    for target, depth in frontier.items():
+        if target not in depths:
+            G.add_node(target, type="Page_File", title=target, crawl_depth=depth, parsed=False)
+            node_index.update([target])
+
+    return depths
 
 
 # ============================================================
-# 5. EXPORT GRAPH
+# 6. PROCESS ALL PAGES + EXPORT
 # ============================================================
 
-graph_data = nx.node_link_data(G)
-json_string = json.dumps(graph_data, indent=4)
+def build_all_pages(root_dir=ROOT_DIR):
+    """Parse every .html file of root_dir into G."""
+    file_contents = load_site_files(root_dir)
+    all_known_pages.update(file_contents.keys())
+    set_site_scope(root_dir)
+
+    for filename, content in file_contents.items():
+        add_page(filename, content)
+
+
+def main():
+    if CRAWL_MODE == "reachable":
+        depths = crawl_site(ROOT_DIR, START_PAGE, MAX_CLICK_DEPTH)
+        print(f"Crawled {len(depths)} of {len(all_known_pages)} pages from {START_PAGE}")
+    else:
+        build_all_pages(ROOT_DIR)
+
+    duplicates = near_duplicates.mark_near_duplicates(G) if MARK_NEAR_DUPLICATES else {}
+    if SCORE_PAGES:
+        page_graph, _ = page_rank.score_pages(G)
+        page_rank.export_page_graph(page_graph)
+
+    export_graph(OUTPUT_FILE)
+    anchor_index.write_report()
+
+    print("--- DOM Graph Created ---")
+    print("Nodes:", len(G.nodes))
+    print("Edges:", len(G.edges))
+    if MARK_NEAR_DUPLICATES:
+        print("Near-duplicate pages:", len(duplicates))
+    if SCORE_PAGES:
+        print(f"Page links: {page_graph.number_of_edges()} (saved to {page_rank.PAGE_GRAPH_FILE})")
+    print(f"Pages linked to: {len(anchor_index.pages)} (anchor texts in {ANCHOR_REPORT})")
+    print(f"Saved to {OUTPUT_FILE}")
+
+    for filename, entry in page_budget_log.items():
+        print(f"  budget {entry['action']}: {filename} ({', '.join(entry['reasons'])})")
 
-with open("Output_Graph_Json/dom_graph.json", "w", encoding="utf-8") as f:
-    f.write(json_string)
 
-print("--- DOM Graph Created ---")
-print("Nodes:", len(G.nodes))
-print("Edges:", len(G.edges))
-print("Saved to Output_Graph_Json/dom_graph.json")
+if __name__ == "__main__":
+    main()
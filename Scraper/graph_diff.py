@@ -0,0 +1,309 @@
+import sys
+import json
+import hashlib
+import argparse
+import networkx as nx
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+OLD_GRAPH_FILE = "Output_Graph_Json/dom_graph_previous.json"   # ← change as needed
+NEW_GRAPH_FILE = "Output_Graph_Json/dom_graph.json"
+OUTPUT_FILE = "Output_Graph_Json/dom_graph_diff.json"
+
+# Edges that form the per-page tree. Everything else is a link edge
+# that hangs off a tree node.
+TREE_RELATIONS = {"CONTAINS", "CONTAINS_DATA"}
+
+
+# ============================================================
+# 2. LOADING
+# ============================================================
+
+def load_graph(path):
+    """Load a dom_graph.json written by nx.node_link_data (either edges key)."""
+    with open(path, "r", encoding="utf-8") as f:
+        graph_data = json.load(f)
+
+    edges_key = "links" if "links" in graph_data else "edges"
+    return nx.node_link_graph(graph_data, edges=edges_key)
+
+
+# ============================================================
+# 3. NODE KEYS + SUBTREE HASHES
+# ============================================================
+
+def tree_children(G, node):
+    """Children of a node in document order (CONTAINS / CONTAINS_DATA)."""
+    return [v for _, v, rel in G.out_edges(node, data="relation") if rel in TREE_RELATIONS]
+
+
+def link_edges(G, node):
+    """Outgoing non-tree edges of a node as (target, attrs) pairs."""
+    return [
+        (v, attrs) for _, v, attrs in G.out_edges(node, data=True)
+        if attrs.get("relation") not in TREE_RELATIONS
+    ]
+
+
+def compute_node_keys(G):
+    """
+    Give every node a build-independent key.
+
+    Node IDs are per-page tag counters, so inserting one <div> shifts the
+    IDs of every later <div> on that page. Keys use what survives a rebuild:
+      - DOM nodes:      "<page><xpath>"
+      - Data_Link nodes: "<parent key>/@data:<value>"
+      - everything else (Page_File, External_Page): the node ID itself
+    Duplicate keys (rare xpath collisions) get a "#<n>" suffix in build order.
+    """
+    keys = {}
+    seen = {}
+
+    def unique(key):
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        return key if n == 0 else f"{key}#{n}"
+
+    for node, data in G.nodes(data=True):
+        if data.get("xpath") and data.get("page"):
+            keys[node] = unique(f"{data['page']}{data['xpath']}")
+
+    for node, data in G.nodes(data=True):
+        if node in keys:
+            continue
+        if data.get("type") == "Data_Link":
+            parents = [u for u, _, rel in G.in_edges(node, data="relation") if rel == "CONTAINS_DATA"]
+            parent_key = keys.get(parents[0], parents[0]) if parents else ""
+            keys[node] = unique(f"{parent_key}/@data:{data.get('value', '')}")
+        else:
+            keys[node] = unique(str(node))
+
+    return keys
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def compute_subtree_hashes(G, keys=None):
+    """
+    Merkle-style hash per node: own attributes, outgoing link edges and the
+    hashes of its tree children (in order). Two nodes with equal hashes have
+    identical subtrees, so the diff can skip them without looking inside.
+    Iterative post-order, so deep DOMs don't hit the recursion limit.
+    """
+    if keys is None:
+        keys = compute_node_keys(G)
+
+    hashes = {}
+    for start in G.nodes:
+        if start in hashes:
+            continue
+
+        stack = [(start, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in hashes:
+                continue
+
+            children = tree_children(G, node)
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((c, False) for c in children if c not in hashes)
+                continue
+
+            links = sorted(
+                f"{attrs.get('relation')}>{keys.get(v, v)}>{attrs.get('anchor', '')}"
+                for v, attrs in link_edges(G, node)
+            )
+            hashes[node] = _digest(
+                json.dumps(G.nodes[node], sort_keys=True, default=str),
+                *links,
+                *(hashes.get(c, "") for c in children),
+            )
+
+    return hashes
+
+
+# ============================================================
+# 4. DIFF
+# ============================================================
+
+def _attr_changes(old_attrs, new_attrs):
+    changes = {}
+    for attr in old_attrs.keys() | new_attrs.keys():
+        if old_attrs.get(attr) != new_attrs.get(attr):
+            changes[attr] = {"old": old_attrs.get(attr), "new": new_attrs.get(attr)}
+    return changes
+
+
+def _edge_record(u, v, attrs):
+    return {"source": u, "target": v, **attrs}
+
+
+def diff_graphs(old_G, new_G):
+    """
+    Structural diff of two DOM graph builds.
+
+    Pages are aligned by Page_File ID, nodes inside a page by XPath key.
+    Subtrees whose hashes match are skipped entirely, so the cost is linear
+    in graph size (hashing) plus the size of the changed regions (walk).
+
+    Returns a JSON-serializable dict. Node IDs in "added" entries refer to
+    the new graph, in "removed" entries to the old graph.
+    """
+    old_keys = compute_node_keys(old_G)
+    new_keys = compute_node_keys(new_G)
+    old_hashes = compute_subtree_hashes(old_G, old_keys)
+    new_hashes = compute_subtree_hashes(new_G, new_keys)
+
+    result = {
+        "pages": {"added": [], "removed": [], "changed": [], "unchanged": []},
+        "nodes": {"added": [], "removed": [], "modified": []},
+        "edges": {"added": [], "removed": []},
+    }
+
+    def link_key(G, keys, v, attrs):
+        return (attrs.get("relation"), keys.get(v, v), attrs.get("anchor"))
+
+    def add_subtree(G, keys, root, side):
+        """Record every node + edge below root as added or removed."""
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            result["nodes"][side].append({"key": keys[node], "id": node, **G.nodes[node]})
+            for _, v, attrs in G.out_edges(node, data=True):
+                result["edges"][side].append(_edge_record(node, v, attrs))
+            stack.extend(reversed(tree_children(G, node)))
+
+    def walk(old_node, new_node):
+        stack = [(old_node, new_node)]
+        while stack:
+            o, n = stack.pop()
+            if old_hashes[o] == new_hashes[n]:
+                continue
+
+            changes = _attr_changes(old_G.nodes[o], new_G.nodes[n])
+            if changes:
+                result["nodes"]["modified"].append({
+                    "key": new_keys[n], "old_id": o, "new_id": n, "changes": changes,
+                })
+
+            # Link edges hanging off this node
+            old_links = {link_key(old_G, old_keys, v, a): (v, a) for v, a in link_edges(old_G, o)}
+            new_links = {link_key(new_G, new_keys, v, a): (v, a) for v, a in link_edges(new_G, n)}
+            for k in old_links.keys() - new_links.keys():
+                result["edges"]["removed"].append(_edge_record(o, *old_links[k]))
+            for k in new_links.keys() - old_links.keys():
+                result["edges"]["added"].append(_edge_record(n, *new_links[k]))
+
+            # Align tree children by key
+            old_children = {old_keys[c]: c for c in tree_children(old_G, o)}
+            new_children = {new_keys[c]: c for c in tree_children(new_G, n)}
+
+            for key, c in old_children.items():
+                if key not in new_children:
+                    result["edges"]["removed"].append(
+                        _edge_record(o, c, _first_edge_attrs(old_G, o, c)))
+                    add_subtree(old_G, old_keys, c, "removed")
+            for key, c in new_children.items():
+                if key not in old_children:
+                    result["edges"]["added"].append(
+                        _edge_record(n, c, _first_edge_attrs(new_G, n, c)))
+                    add_subtree(new_G, new_keys, c, "added")
+                else:
+                    stack.append((old_children[key], c))
+
+    # -----------------------------
+    # Pages
+    # -----------------------------
+    old_pages = {old_keys[n]: n for n, t in old_G.nodes(data="type") if t == "Page_File"}
+    new_pages = {new_keys[n]: n for n, t in new_G.nodes(data="type") if t == "Page_File"}
+
+    for key in sorted(old_pages.keys() | new_pages.keys()):
+        o, n = old_pages.get(key), new_pages.get(key)
+        if n is None:
+            result["pages"]["removed"].append(key)
+            add_subtree(old_G, old_keys, o, "removed")
+        elif o is None:
+            result["pages"]["added"].append(key)
+            add_subtree(new_G, new_keys, n, "added")
+        elif old_hashes[o] == new_hashes[n]:
+            result["pages"]["unchanged"].append(key)
+        else:
+            result["pages"]["changed"].append(key)
+            walk(o, n)
+
+    # -----------------------------
+    # Shared nodes outside any page tree (External_Page, ...)
+    # -----------------------------
+    def free_nodes(G, keys):
+        return {
+            keys[n]: n for n in G.nodes
+            if G.nodes[n].get("type") != "Page_File"
+            and not any(rel in TREE_RELATIONS for _, _, rel in G.in_edges(n, data="relation"))
+        }
+
+    old_free = free_nodes(old_G, old_keys)
+    new_free = free_nodes(new_G, new_keys)
+    for key in old_free.keys() - new_free.keys():
+        o = old_free[key]
+        result["nodes"]["removed"].append({"key": key, "id": o, **old_G.nodes[o]})
+    for key in new_free.keys() - old_free.keys():
+        n = new_free[key]
+        result["nodes"]["added"].append({"key": key, "id": n, **new_G.nodes[n]})
+    for key in old_free.keys() & new_free.keys():
+        o, n = old_free[key], new_free[key]
+        changes = _attr_changes(old_G.nodes[o], new_G.nodes[n])
+        if changes:
+            result["nodes"]["modified"].append({"key": key, "old_id": o, "new_id": n, "changes": changes})
+
+    result["summary"] = {
+        section + "_" + kind: len(items)
+        for section in ("pages", "nodes", "edges")
+        for kind, items in result[section].items()
+    }
+    return result
+
+
+def _first_edge_attrs(G, u, v):
+    data = G.get_edge_data(u, v, default={})
+    return next(iter(data.values()), {})
+
+
+def diff_files(old_path, new_path):
+    """Convenience wrapper: diff two dom_graph.json files."""
+    return diff_graphs(load_graph(old_path), load_graph(new_path))
+
+
+# ============================================================
+# 5. CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two dom_graph.json builds.")
+    parser.add_argument("old", nargs="?", default=OLD_GRAPH_FILE)
+    parser.add_argument("new", nargs="?", default=NEW_GRAPH_FILE)
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    args = parser.parse_args(argv)
+
+    diff = diff_files(args.old, args.new)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(diff, f, indent=4, ensure_ascii=False)
+
+    print("--- DOM Graph Diff ---")
+    for name, count in diff["summary"].items():
+        print(f"  {name}: {count}")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
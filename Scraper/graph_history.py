@@ -0,0 +1,394 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+
+import networkx as nx
+
+from graph_diff import load_graph, TREE_RELATIONS
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"        # ← change as needed
+HISTORY_DB = "Output_Graph_Json/dom_graph_history.sqlite"
+
+KEYFRAME_EVERY = 7       # every Nth version also stores the full list of its rows (a keyframe)
+BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version     INTEGER PRIMARY KEY,
+    created     REAL NOT NULL,
+    label       TEXT,
+    nodes       INTEGER,
+    edges       INTEGER,
+    changed     INTEGER,          -- rows opened + closed by this version
+    keyframe    INTEGER NOT NULL DEFAULT 0   -- 1 = its rows are listed in node_keyframes / edge_keyframes
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id          INTEGER PRIMARY KEY,
+    node        TEXT NOT NULL,
+    page        TEXT,             -- owning page (its Page_File node ID), NULL for shared nodes
+    attrs       TEXT NOT NULL,    -- JSON
+    valid_from  INTEGER NOT NULL, -- first version with this state
+    valid_to    INTEGER           -- first version without it, NULL = still current
+);
+CREATE TABLE IF NOT EXISTS edges (
+    id          INTEGER PRIMARY KEY,
+    src         TEXT NOT NULL,
+    dst         TEXT NOT NULL,
+    key         INTEGER NOT NULL,
+    seq         INTEGER NOT NULL, -- position among src's out-edges (document order)
+    page        TEXT,             -- page of src
+    attrs       TEXT NOT NULL,
+    valid_from  INTEGER NOT NULL,
+    valid_to    INTEGER
+);
+CREATE TABLE IF NOT EXISTS node_keyframes (
+    version     INTEGER NOT NULL,
+    row         INTEGER NOT NULL,  -- nodes.id of a row visible in that version
+    PRIMARY KEY (version, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edge_keyframes (
+    version     INTEGER NOT NULL,
+    row         INTEGER NOT NULL,  -- edges.id
+    PRIMARY KEY (version, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nodes_open ON nodes (valid_to);
+CREATE INDEX IF NOT EXISTS nodes_from ON nodes (valid_from);
+CREATE INDEX IF NOT EXISTS nodes_page ON nodes (page, valid_from);
+CREATE INDEX IF NOT EXISTS nodes_node ON nodes (node, valid_from);
+CREATE INDEX IF NOT EXISTS edges_open ON edges (valid_to);
+CREATE INDEX IF NOT EXISTS edges_from ON edges (valid_from);
+CREATE INDEX IF NOT EXISTS edges_page ON edges (page, valid_from);
+"""
+
+VISIBLE = "valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)"
+ALIVE = "(valid_to IS NULL OR valid_to > ?)"
+KEYFRAME_TABLES = {"nodes": "node_keyframes", "edges": "edge_keyframes"}
+
+
+def page_of(G, node, attrs):
+    """The page a node belongs to: its "page", itself for Page_File, else its tree parent's (Data_Link)."""
+    if attrs.get("page") or attrs.get("type") == "Page_File":
+        return attrs.get("page") or node
+    for parent, _, rel in G.in_edges(node, data="relation"):
+        if rel in TREE_RELATIONS:
+            return G.nodes[parent].get("page") or parent
+    return None
+
+
+# ============================================================
+# 2. HISTORY STORE
+# ============================================================
+
+class GraphHistory:
+    """
+    Every crawl of a site as one version, stored as deltas: each row is one
+    state of a node or edge, valid from the version that introduced it up
+    to (not including) the version that changed or removed it. Recording a
+    crawl only touches what differs from the previous one, so unchanged
+    pages cost nothing; any version is the rows whose interval contains it.
+
+    Every keyframe_every-th version is also a keyframe: the IDs of all rows
+    visible in it. A snapshot reads the nearest keyframe at or before it
+    plus the rows opened since, instead of scanning the whole history.
+
+    Node order within a snapshot follows when each state was recorded;
+    every node's out-edges come back in their original order.
+    """
+
+    def __init__(self, path=HISTORY_DB, keyframe_every=KEYFRAME_EVERY):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def latest(self):
+        return self.db.execute("SELECT MAX(version) FROM versions").fetchone()[0]
+
+    def commit(self, G, label=None, created=None):
+        """Record G as the next version. Returns (version, rows changed)."""
+        version = (self.latest() or 0) + 1
+        attrs_of = {node: attrs for node, attrs in G.nodes(data=True)}
+
+        open_nodes = {node: (row, attrs) for row, node, attrs in
+                      self.db.execute("SELECT id, node, attrs FROM nodes WHERE valid_to IS NULL")}
+        close, add = [], []
+        for node, attrs in attrs_of.items():
+            state = json.dumps(attrs, ensure_ascii=False, default=str)
+            old = open_nodes.pop(node, None)
+            if old is not None and old[1] == state:
+                continue
+            if old is not None:
+                close.append(old[0])
+            add.append((node, page_of(G, node, attrs), state, version))
+        close.extend(row for row, _ in open_nodes.values())
+
+        open_edges = {(src, dst, key): (row, seq, attrs) for row, src, dst, key, seq, attrs in
+                      self.db.execute("SELECT id, src, dst, key, seq, attrs FROM edges WHERE valid_to IS NULL")}
+        close_edges, add_edges = [], []
+        for u in attrs_of:
+            page = page_of(G, u, attrs_of[u])
+            for seq, (_, v, key, attrs) in enumerate(G.out_edges(u, keys=True, data=True)):
+                state = json.dumps(attrs, ensure_ascii=False, default=str)
+                old = open_edges.pop((u, v, key), None)
+                if old is not None and old[1:] == (seq, state):
+                    continue
+                if old is not None:
+                    close_edges.append(old[0])
+                add_edges.append((u, v, key, seq, page, state, version))
+        close_edges.extend(row for row, _, _ in open_edges.values())
+
+        with self.db:
+            self.db.executemany("UPDATE nodes SET valid_to = ? WHERE id = ?", ((version, r) for r in close))
+            self.db.executemany("INSERT INTO nodes (node, page, attrs, valid_from) VALUES (?, ?, ?, ?)", add)
+            self.db.executemany("UPDATE edges SET valid_to = ? WHERE id = ?", ((version, r) for r in close_edges))
+            self.db.executemany(
+                "INSERT INTO edges (src, dst, key, seq, page, attrs, valid_from) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                add_edges,
+            )
+            changed = len(close) + len(add) + len(close_edges) + len(add_edges)
+            self.db.execute(
+                "INSERT INTO versions (version, created, label, nodes, edges, changed) VALUES (?, ?, ?, ?, ?, ?)",
+                (version, created or time.time(), label, G.number_of_nodes(), G.number_of_edges(), changed),
+            )
+            if (version - 1) % self.keyframe_every == 0:
+                self._store_keyframe(version, current=True)
+        return version, changed
+
+    def _store_keyframe(self, version, current=False):
+        """List the rows visible in version (current=True: the open rows, i.e. the version just recorded)."""
+        for table, keyframes in KEYFRAME_TABLES.items():
+            if current:
+                self.db.execute(f"INSERT OR IGNORE INTO {keyframes} SELECT ?, id FROM {table} "
+                                f"WHERE valid_to IS NULL", (version,))
+            else:
+                self.db.execute(f"INSERT OR IGNORE INTO {keyframes} SELECT ?, id FROM {table} "
+                                f"WHERE {VISIBLE}", (version, version, version))
+        self.db.execute("UPDATE versions SET keyframe = 1 WHERE version = ?", (version,))
+
+    # -----------------------------
+    # Reconstruction
+    # -----------------------------
+    def versions(self):
+        """[(version, created, label, nodes, edges, changed, keyframe)], oldest first."""
+        return self.db.execute("SELECT * FROM versions ORDER BY version").fetchall()
+
+    def version_at(self, when):
+        """The latest version recorded at or before a timestamp / datetime (what the site looked like then)."""
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        row = self.db.execute("SELECT MAX(version) FROM versions WHERE created <= ?", (when,)).fetchone()
+        return row[0]
+
+    def _check(self, version):
+        if version is None:
+            version = self.latest()
+        if self.db.execute("SELECT 1 FROM versions WHERE version = ?", (version,)).fetchone() is None:
+            raise KeyError(f"version {version} is not in the history")
+        return version
+
+    def _add_edges(self, G, rows):
+        """Add (src, dst, key, seq, attrs) rows node by node, each node's edges in seq order."""
+        by_source = {}
+        for row in sorted(rows, key=lambda r: r[3]):
+            by_source.setdefault(row[0], []).append(row)
+        for u in list(G):
+            for src, dst, key, _, attrs in by_source.pop(u, ()):
+                G.add_edge(src, dst, key=key, **json.loads(attrs))
+
+    def _visible(self, table, columns, version):
+        """
+        Rows of table visible in version, by ID: the ones listed in the
+        nearest keyframe at or before it that are still alive, plus the ones
+        opened since (nodes_from / edges_from). Without a keyframe it is a
+        scan over the whole table.
+        """
+        keyframes = KEYFRAME_TABLES[table]
+        keyframe = self.db.execute(f"SELECT MAX(version) FROM {keyframes} WHERE version <= ?",
+                                   (version,)).fetchone()[0]
+        if keyframe is None:
+            return self.db.execute(f"SELECT {columns} FROM {table} WHERE {VISIBLE} ORDER BY id",
+                                   (version, version))
+        return self.db.execute(f"""
+            SELECT {columns} FROM {table} WHERE id IN (
+                SELECT row FROM {keyframes} WHERE version = ?
+                UNION ALL SELECT id FROM {table} WHERE valid_from > ? AND valid_from <= ?
+            ) AND {ALIVE} ORDER BY id
+        """, (keyframe, keyframe, version, version))
+
+    def snapshot(self, version=None):
+        """The whole graph as of a version (default: the latest), as an nx.MultiDiGraph."""
+        version = self._check(version)
+        G = nx.MultiDiGraph()
+        for node, attrs in self._visible("nodes", "node, attrs", version):
+            G.add_node(node, **json.loads(attrs))
+        self._add_edges(G, self._visible("edges", "src, dst, key, seq, attrs", version))
+        return G
+
+    def page_snapshot(self, page, version=None):
+        """
+        One page as of a version, shaped like dom_graph_parser.page_subgraph:
+        its Page_File node, its tree, every edge leaving it and the
+        External_Page nodes it links to. Reads only that page's rows.
+        """
+        version = self._check(version)
+        G = nx.MultiDiGraph()
+        for node, attrs in self.db.execute(
+            f"SELECT node, attrs FROM nodes WHERE page = ? AND {VISIBLE} ORDER BY id", (page, version, version)
+        ):
+            G.add_node(node, **json.loads(attrs))
+        if page not in G:
+            # e.g. a deleted page other pages still link to: a bare node of its own
+            row = self.db.execute(f"SELECT attrs FROM nodes WHERE node = ? AND {VISIBLE}",
+                                  (page, version, version)).fetchone()
+            if row is None:
+                raise KeyError(f"page {page!r} does not exist in version {version}")
+            G.add_node(page, **json.loads(row[0]))
+
+        edges = self.db.execute(
+            f"SELECT src, dst, key, seq, attrs FROM edges WHERE page = ? AND {VISIBLE}", (page, version, version)
+        ).fetchall()
+        targets = sorted({dst for _, dst, _, _, attrs in edges
+                          if dst not in G and json.loads(attrs).get("relation") == "LINKS_TO_EXTERNAL_PAGE"})
+        for i in range(0, len(targets), BATCH):
+            batch = targets[i:i + BATCH]
+            for node, attrs in self.db.execute(
+                f"SELECT node, attrs FROM nodes WHERE node IN ({','.join('?' * len(batch))}) AND {VISIBLE}",
+                (*batch, version, version),
+            ):
+                G.add_node(node, **json.loads(attrs))
+        self._add_edges(G, edges)
+        return G
+
+    def page_versions(self, page):
+        """Versions in which a page's nodes or edges changed (its own history)."""
+        rows = self.db.execute("""
+            SELECT valid_from FROM nodes WHERE page = ? UNION SELECT valid_to FROM nodes WHERE page = ?
+            UNION SELECT valid_from FROM edges WHERE page = ? UNION SELECT valid_to FROM edges WHERE page = ?
+        """, (page, page, page, page))
+        return sorted(v for v, in rows if v is not None)
+
+    # -----------------------------
+    # Compaction
+    # -----------------------------
+    def compact(self, keyframe_every=None):
+        """
+        Materialize the keyframes a history is missing (recorded before
+        keyframes existed, or with a larger keyframe_every), so that every
+        version is fewer than keyframe_every versions after one. Nothing is
+        dropped: every version can still be checked out, just faster.
+        Returns the versions that became keyframes.
+        """
+        keyframe_every = keyframe_every or self.keyframe_every
+        added, last = [], None
+        rows = self.db.execute("SELECT version, keyframe FROM versions ORDER BY version").fetchall()
+        for i, (version, keyframe) in enumerate(rows):
+            if not keyframe and (last is None or i - last >= keyframe_every):
+                with self.db:
+                    self._store_keyframe(version)
+                added.append(version)
+                keyframe = True
+            if keyframe:
+                last = i
+        return added
+
+
+def record_crawl(history_db, G, label=None):
+    """Append G to a history database as its next version; for the crawler CLIs."""
+    history = GraphHistory(history_db)
+    version, changed = history.commit(G, label)
+    history.close()
+    print(f"History: version {version} ({changed} node/edge rows changed) → {history_db}")
+    return version
+
+
+# ============================================================
+# 3. MAIN
+# ============================================================
+
+def write_graph(G, output_file):
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(G), f, indent=4)
+    os.replace(tmp_file, output_file)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Versioned, delta-encoded history of a DOM graph.")
+    arg_parser.add_argument("--db", default=HISTORY_DB, help="history database (default: %(default)s)")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="add a graph as the next version")
+    record_cmd.add_argument("graph", nargs="?", default=GRAPH_FILE)
+    record_cmd.add_argument("--label")
+
+    log_cmd = commands.add_parser("log", help="list versions (or the versions a page changed in)")
+    log_cmd.add_argument("--page")
+
+    checkout_cmd = commands.add_parser("checkout", help="write a version (or one page of it) as graph JSON")
+    checkout_cmd.add_argument("version", nargs="?", type=int, help="default: latest")
+    checkout_cmd.add_argument("--at", help="instead of a version: the site as of this date (YYYY-MM-DD[THH:MM])")
+    checkout_cmd.add_argument("--page")
+    checkout_cmd.add_argument("-o", "--output", required=True)
+
+    compact_cmd = commands.add_parser(
+        "compact", help="store keyframes so checkouts of any version stay fast (keeps every version)")
+    compact_cmd.add_argument("--every", type=int, default=KEYFRAME_EVERY,
+                             help="at most this many versions between keyframes (default: %(default)s)")
+
+    args = arg_parser.parse_args(argv)
+    history = GraphHistory(args.db)
+
+    if args.command == "record":
+        version, changed = history.commit(load_graph(args.graph), args.label or args.graph)
+        print(f"Recorded {args.graph} as version {version} ({changed} node/edge rows changed)")
+
+    elif args.command == "log":
+        if args.page:
+            print(f"{args.page} changed in versions: {history.page_versions(args.page)}")
+        else:
+            for version, created, label, nodes, edges, changed, keyframe in history.versions():
+                stamp = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M")
+                print(f"  v{version:<4} {stamp}  {nodes:>7} nodes {edges:>7} edges  "
+                      f"{changed:>7} rows changed{'  [keyframe]' if keyframe else ''}  {label or ''}")
+
+    elif args.command == "checkout":
+        version = args.version
+        if args.at:
+            version = history.version_at(datetime.fromisoformat(args.at))
+            if version is None:
+                print(f"No version recorded before {args.at}")
+                return 1
+        G = history.page_snapshot(args.page, version) if args.page else history.snapshot(version)
+        write_graph(G, args.output)
+        print(f"Version {version or history.latest()}: {G.number_of_nodes()} nodes, "
+              f"{G.number_of_edges()} edges → {args.output}")
+
+    elif args.command == "compact":
+        added = history.compact(args.every)
+        print(f"Compacted: {len(added)} new keyframes {added}")
+
+    history.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
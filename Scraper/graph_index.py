@@ -0,0 +1,229 @@
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"      # ← change as needed
+
+# node attributes with an index; other attributes can still be filtered on
+INDEXED_ATTRS = ("type", "tag", "page", "hostname", "xpath")
+
+# positions of removed nodes are compacted away once they make up this
+# share of all positions (and there are at least COMPACT_MIN of them)
+COMPACT_SHARE = 0.25
+COMPACT_MIN = 1024
+
+
+# ============================================================
+# 2. INDEX
+# ============================================================
+
+class GraphIndex:
+    """
+    Secondary indexes over the node attributes in INDEXED_ATTRS: for every
+    (attribute, value) the sorted positions of the nodes that have it.
+    A filter such as find(type="Paragraph", page="faq.html") intersects
+    the per-value arrays, smallest first, instead of scanning every node.
+
+    Positions are handed out as nodes are first indexed; results come back
+    in that order (G's node order after a rebuild). Removed nodes leave a
+    gap that compact() closes, keeping the order, once gaps reach
+    COMPACT_SHARE, so re-parsing pages over and over (watch mode) doesn't
+    grow the index. The index does not watch G by itself: whoever changes
+    nodes calls update() with them (the parser does this for every page it
+    adds, removes or merges).
+    """
+
+    def __init__(self, G, attrs=INDEXED_ATTRS):
+        self.G = G
+        self.attrs = attrs
+        self.rebuild()
+
+    def clear(self):
+        """Forget everything, e.g. right after G.clear()."""
+        self.ids = []                                  # position -> node (None once removed)
+        self.pos = {}                                  # node -> position
+        self.values = {}                               # node -> its indexed values
+        self.buckets = {a: {} for a in self.attrs}     # attr -> value -> set of positions
+        self._arrays = {}                              # (attr, value) -> sorted positions
+        self._id_array = None
+        self.removed = 0                               # None entries in ids
+
+    def rebuild(self):
+        """Index G from scratch, e.g. after loading a whole graph into it."""
+        self.clear()
+        self.update(self.G.nodes)
+
+    def update(self, nodes):
+        """Re-read nodes from G: new ones are added, changed ones re-filed, missing ones dropped."""
+        for node in nodes:
+            p = self.pos.get(node)
+            if node not in self.G:
+                if p is not None:
+                    self._file(p, self.values.pop(node), ())
+                    del self.pos[node]
+                    self.ids[p] = None
+                    self._id_array = None
+                    self.removed += 1
+                continue
+
+            attrs = self.G.nodes[node]
+            new = tuple(attrs.get(a) for a in self.attrs)
+            if p is None:
+                p = self.pos[node] = len(self.ids)
+                self.ids.append(node)
+                self._id_array = None
+                old = ()
+            else:
+                old = self.values[node]
+                if old == new:
+                    continue
+            self.values[node] = new
+            self._file(p, old, new)
+
+        if self.removed >= max(COMPACT_MIN, COMPACT_SHARE * len(self.ids)):
+            self.compact()
+
+    def compact(self):
+        """Renumber the live nodes 0..n-1 in their current order, dropping removed positions."""
+        live = [node for node in self.ids if node is not None]
+        values = self.values
+        self.clear()
+        for p, node in enumerate(live):
+            self.ids.append(node)
+            self.pos[node] = p
+            self.values[node] = values[node]
+            self._file(p, (), values[node])
+
+    def _file(self, p, old, new):
+        for i, a in enumerate(self.attrs):
+            before = old[i] if old else None
+            after = new[i] if new else None
+            if before == after:
+                continue
+            if before is not None:
+                self.buckets[a][before].discard(p)
+                self._arrays.pop((a, before), None)
+            if after is not None:
+                self.buckets[a].setdefault(after, set()).add(p)
+                self._arrays.pop((a, after), None)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _array(self, attr, value):
+        key = (attr, value)
+        arr = self._arrays.get(key)
+        if arr is None:
+            arr = self._arrays[key] = np.fromiter(
+                sorted(self.buckets[attr].get(value, ())), dtype=np.int64,
+            )
+        return arr
+
+    def _match(self, attr, value):
+        """Positions for attr == value, or attr in value for a list / tuple / set of values."""
+        if isinstance(value, (list, tuple, set, frozenset)):
+            parts = [self._array(attr, v) for v in value]
+            return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        return self._array(attr, value)
+
+    def positions(self, **conditions):
+        """Sorted positions of the nodes matching every condition (see find)."""
+        indexed = [self._match(a, v) for a, v in conditions.items() if a in self.buckets]
+        if indexed:
+            indexed.sort(key=len)
+            result = indexed[0]
+            for arr in indexed[1:]:
+                if not len(result):
+                    break
+                result = np.intersect1d(result, arr, assume_unique=True)
+        else:
+            result = np.fromiter(sorted(self.pos.values()), dtype=np.int64)
+
+        rest = [(a, v) for a, v in conditions.items() if a not in self.buckets]
+        if rest and len(result):
+            nodes = self.G.nodes
+            keep = [
+                p for p in result.tolist()
+                if all(
+                    nodes[self.ids[p]].get(a) in v if isinstance(v, (list, tuple, set, frozenset))
+                    else nodes[self.ids[p]].get(a) == v
+                    for a, v in rest
+                )
+            ]
+            result = np.array(keep, dtype=np.int64)
+        return result
+
+    def find(self, **conditions):
+        """
+        Node IDs (a numpy array, in index order) whose attributes match
+        every condition:
+            find(type="Paragraph", page="faq.html")
+            find(tag=("h1", "h2"), page="index.html")     # a collection = any of
+        Conditions on attributes without an index are checked node by node,
+        after the indexed ones have narrowed things down.
+        """
+        if self._id_array is None:
+            self._id_array = np.empty(len(self.ids), dtype=object)
+            self._id_array[:] = self.ids
+        return self._id_array[self.positions(**conditions)]
+
+    def first(self, **conditions):
+        """The first matching node, or None."""
+        found = self.positions(**conditions)
+        return self.ids[found[0]] if len(found) else None
+
+    def count(self, **conditions):
+        return len(self.positions(**conditions))
+
+    def distinct(self, attr):
+        """{value: number of nodes} for an indexed attribute."""
+        return {v: len(ps) for v, ps in self.buckets[attr].items() if ps}
+
+
+# ============================================================
+# 3. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Query a DOM graph through its attribute indexes.")
+    arg_parser.add_argument("conditions", nargs="*", metavar="ATTR=VALUE",
+                            help="e.g. type=Paragraph page=faq.html (VALUE may be a,b,c for any of)")
+    arg_parser.add_argument("--graph", default=GRAPH_FILE)
+    arg_parser.add_argument("--limit", type=int, default=20, help="IDs to print")
+    args = arg_parser.parse_args(argv)
+
+    import networkx as nx
+    with open(args.graph, "r", encoding="utf-8") as f:
+        G = nx.node_link_graph(json.load(f))
+
+    started = time.perf_counter()
+    index = GraphIndex(G)
+    built = time.perf_counter() - started
+
+    conditions = {}
+    for c in args.conditions:
+        attr, value = c.split("=", 1)
+        conditions[attr] = tuple(value.split(",")) if "," in value else value
+
+    started = time.perf_counter()
+    found = index.find(**conditions)
+    took = time.perf_counter() - started
+
+    print(f"Indexed {len(index.pos)} nodes in {built * 1000:.1f} ms")
+    print(f"{len(found)} matches in {took * 1000:.3f} ms")
+    for node in found[:args.limit]:
+        print(" ", node)
+    if len(found) > args.limit:
+        print(f"  ... {len(found) - args.limit} more")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
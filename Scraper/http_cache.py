@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+CACHE_FILE = "Output_Cache/http_cache.sqlite"   # ← change as needed
+MAX_CACHE_BYTES = 2 * 1024 ** 3                 # evict least recently used beyond this
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    status        INTEGER,
+    etag          TEXT,
+    last_modified TEXT,
+    headers       TEXT,     -- JSON
+    body          BLOB,     -- zlib
+    subgraph      BLOB,     -- zlib'd JSON from dom_graph_parser.page_subgraph
+    links         TEXT,     -- JSON {page name: url} of LINKS_TO_PAGE targets
+    size          INTEGER,  -- bytes this row accounts for
+    fetched_at    REAL,
+    last_access   REAL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def normalize_headers(headers):
+    """
+    Plain dict of response headers with lower-case names. HTTP header names
+    are case-insensitive ("ETag" may arrive as "Etag"); every record stores
+    them this way so lookups are simply headers.get("etag").
+    """
+    return {k.lower(): v for k, v in headers.items()}
+
+
+# ============================================================
+# 2. CACHE
+# ============================================================
+
+class HttpCache:
+    """
+    Disk-backed response cache keyed by URL, for conditional recrawls.
+
+    Every stored response keeps its ETag / Last-Modified validators, the
+    (compressed) body and the page subgraph it produced. On a recrawl the
+    crawler sends If-None-Match / If-Modified-Since; a 304 means the cached
+    subgraph can be merged as-is instead of parsing the page again.
+    Total size is bounded: least recently used rows are evicted first.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_CACHE_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        # WAL + NORMAL keeps the per-page commit cheap inside the crawl loop
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def get(self, url):
+        """Cached entry for url (validators, headers, links; subgraph/body on demand) or None."""
+        row = self.db.execute(
+            "SELECT status, etag, last_modified, headers, links FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, etag, last_modified, headers, links = row
+        return {
+            "url": url,
+            "status": status,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": normalize_headers(json.loads(headers)),
+            "links": json.loads(links),
+        }
+
+    def conditional_headers(self, entry):
+        """Request headers that turn a refetch into a cheap 304 when nothing changed."""
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load_subgraph(self, url):
+        row = self.db.execute("SELECT subgraph FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def load_body(self, url):
+        row = self.db.execute("SELECT body FROM responses WHERE url = ?", (url,)).fetchone()
+        return zlib.decompress(row[0]) if row and row[0] is not None else None
+
+    def touch(self, url):
+        """Mark an entry as used (a 304 hit) so eviction keeps it."""
+        self.db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+
+    # -----------------------------
+    # Stores + eviction
+    # -----------------------------
+    def put(self, url, record, subgraph=None, links=None):
+        """Store a fetched response record (see http_crawler.fetch_page) and its subgraph."""
+        headers = normalize_headers(record["headers"])
+        body = zlib.compress(record["body"])
+        packed_subgraph = zlib.compress(json.dumps(subgraph).encode("utf-8")) if subgraph else None
+        size = len(body) + len(packed_subgraph or b"")
+
+        old = self.db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if old:
+            self.total_bytes -= old[0]
+
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                url, record["status"], headers.get("etag"), headers.get("last-modified"),
+                json.dumps(headers), body, packed_subgraph, json.dumps(links or {}),
+                size, now, now,
+            ),
+        )
+        self.total_bytes += size
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        self.db.commit()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes."""
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT url, size FROM responses ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.total_bytes -= size
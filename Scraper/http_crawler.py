@@ -0,0 +1,581 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urljoin, urldefrag, urlsplit
+
+import aiohttp
+
+import dom_graph_parser as parser
+from http_cache import HttpCache, CACHE_FILE, normalize_headers
+from crawl_frontier import (
+    CrawlFrontier, POLITENESS_DELAY, RESPECT_ROBOTS, SEED_FROM_SITEMAP,
+    host_of, load_robots, load_sitemap_urls,
+)
+from seen_urls import SeenUrls
+from crawl_traps import TrapDetector, DETECT_TRAPS, TRAP_REPORT, page_text_digest
+from crawl_checkpoint import CrawlCheckpoint, CHECKPOINT_DIR
+import link_enricher
+from warc_archive import WarcWriter, WARC_FILE
+from graph_history import record_crawl, HISTORY_DB
+import near_duplicates
+import page_rank
+
+try:
+    import brotli  # noqa: F401  (aiohttp decodes "br" bodies when this is installed)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+START_URL = "http://localhost:8000/index.html"   # ← change as needed
+OUTPUT_FILE = parser.OUTPUT_FILE
+
+CONCURRENCY = 16            # pages in flight at once
+LIMIT_PER_HOST = 8          # pooled connections per host
+MAX_PAGES = 10_000
+MAX_CLICK_DEPTH = None      # None = follow links all the way
+REQUEST_TIMEOUT = 20        # seconds per request
+KEEPALIVE_TIMEOUT = 30      # seconds an idle pooled connection is kept
+READ_CHUNK = 1 << 16        # bytes per read of a response body
+USER_AGENT = "AIT-Projekt2-DomGraphCrawler/1.0"
+
+DEFAULT_DOCUMENT = "index.html"    # page name for directory URLs ("/", "/blog/")
+
+# Extensions that are never HTML pages, so they are not followed
+NON_PAGE_EXTENSIONS = {
+    ".css", ".js", ".json", ".xml", ".txt", ".pdf", ".zip",
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+    ".woff", ".woff2", ".ttf", ".eot", ".mp4", ".mp3",
+}
+
+# page name -> URL, only for pages whose URL is not simply base URL + name
+# (directory URLs mapped to DEFAULT_DOCUMENT), so it stays small on big crawls
+page_urls = {}
+
+
+# ============================================================
+# 2. URL ↔ PAGE NAMES
+# ============================================================
+
+def base_of(url):
+    """Directory part of the start URL; pages outside it are not crawled."""
+    scheme, netloc, path, _, _ = urlsplit(url)
+    return f"{scheme}://{netloc}{path.rsplit('/', 1)[0]}/"
+
+
+def url_to_page_name(url, base_url):
+    """
+    Page name (= node ID) for a URL: its path relative to the crawl base,
+    so a site served over HTTP gets the same IDs as the local build.
+    """
+    url, _ = urldefrag(url)
+    rel = url[len(base_url):] if url.startswith(base_url) else urlsplit(url).path.lstrip("/")
+    path, _, query = rel.partition("?")
+
+    if path == "" or path.endswith("/"):
+        path += DEFAULT_DOCUMENT
+
+    return f"{path}?{query}" if query else path
+
+
+def page_url(page_name, base_url):
+    return page_urls.get(page_name) or base_url + page_name
+
+
+def looks_like_page(url):
+    path = urlsplit(url).path.lower()
+    return os.path.splitext(path)[1] not in NON_PAGE_EXTENSIONS
+
+
+def make_link_resolver(base_url):
+    """Link resolver for dom_graph_parser: same-site page URLs → page names."""
+
+    def resolve(href, page_name):
+        if not href.strip():
+            return None
+
+        url, _ = urldefrag(urljoin(page_url(page_name, base_url), href.strip()))
+
+        if not url.startswith(base_url) or not looks_like_page(url):
+            return None
+
+        name = url_to_page_name(url, base_url)
+        if base_url + name != url:
+            page_urls.setdefault(name, url)
+        return name
+
+    return resolve
+
+
+# ============================================================
+# 3. FETCHING
+# ============================================================
+
+def make_session(concurrency=CONCURRENCY):
+    """One pooled keep-alive client for the whole crawl."""
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        headers={"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING},
+    )
+
+
+async def read_body(resp, limit=None):
+    """
+    The response body, up to limit bytes. (resp.content.read(n) returns
+    only what is buffered, often far less than n, so read until EOF.)
+    """
+    if limit is None:
+        return await resp.read()
+    chunks, size = [], 0
+    async for chunk in resp.content.iter_chunked(READ_CHUNK):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return b"".join(chunks)[:limit]
+
+
+async def fetch_page(session, url, headers=None):
+    """
+    GET one URL. Returns a response record (never raises for network errors):
+    {url, final_url, status, headers, body, fetch_ms, error}
+    Header names are lower-cased (see http_cache.normalize_headers).
+    The body is capped at the parser's max_bytes budget.
+    """
+    max_bytes = parser.PAGE_LIMITS.get("max_bytes")
+    started = time.perf_counter()
+    record = {"url": url, "final_url": url, "status": None, "headers": {}, "body": b"", "error": None}
+
+    try:
+        async with session.get(url, headers=headers) as resp:
+            record["final_url"] = str(resp.url)
+            record["status"] = resp.status
+            record["headers"] = normalize_headers(resp.headers)
+            record["body"] = await read_body(resp, None if max_bytes is None else max_bytes + 1)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["fetch_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+def is_html(record):
+    content_type = record["headers"].get("content-type", "")
+    return record["status"] == 200 and "html" in content_type.lower()
+
+
+def decode_body(record):
+    content_type = record["headers"].get("content-type", "")
+    charset = "utf-8"
+    if "charset=" in content_type:
+        charset = content_type.split("charset=")[-1].split(";")[0].strip() or "utf-8"
+    try:
+        return record["body"].decode(charset, errors="replace")
+    except LookupError:
+        return record["body"].decode("utf-8", errors="replace")
+
+
+# ============================================================
+# 4. FEEDING THE GRAPH BUILDER
+# ============================================================
+
+def set_fetch_metadata(page_name, record, depth):
+    parser.G.nodes[page_name].update(
+        url=record["url"],
+        final_url=record["final_url"],
+        status=record["status"],
+        fetch_ms=record["fetch_ms"],
+        bytes=len(record["body"]),
+        content_type=record["headers"].get("content-type"),
+        crawl_depth=depth,
+    )
+    if record["error"]:
+        parser.G.nodes[page_name]["error"] = record["error"]
+
+
+def record_page(page_name, record, depth):
+    """Parse an HTML response into G and put fetch metadata on its Page_File node."""
+    if is_html(record):
+        parser.add_page(page_name, decode_body(record))
+    else:
+        parser.G.add_node(page_name, type="Page_File", title=page_name)
+        parser.node_index.update([page_name])
+
+    set_fetch_metadata(page_name, record, depth)
+
+
+def record_unchanged_page(page_name, record, cached, subgraph, depth):
+    """304: merge the subgraph from the previous crawl instead of parsing."""
+    parser.merge_page_subgraph(subgraph)
+    for name, url in cached["links"].items():
+        page_urls.setdefault(name, url)
+
+    set_fetch_metadata(page_name, record, depth)
+    parser.G.nodes[page_name]["content_type"] = cached["headers"].get("content-type")
+    parser.G.nodes[page_name]["from_cache"] = True
+
+
+async def fetch_and_record(session, page_name, url, depth, cache=None, archive=None):
+    """
+    Fetch one page (conditionally, when it is cached) and put it into G.
+    With a WarcWriter every page is archived; a 304 is archived as the
+    cached response it confirmed, so a revalidating crawl's WARC replays
+    on its own. Returns True if the page was served from the cache (304).
+    """
+    cached = cache.get(url) if cache else None
+
+    record = await fetch_page(session, url, headers=cache.conditional_headers(cached) if cached else None)
+
+    if record["status"] == 304 and cached:
+        subgraph = cache.load_subgraph(url)
+        body = cache.load_body(url) if archive else b""
+        if subgraph is not None and body is not None:
+            if archive:
+                archive.write_response(
+                    dict(record, status=cached["status"], headers=cached["headers"], body=body),
+                    depth, revalidated=True,
+                )
+            record_unchanged_page(page_name, record, cached, subgraph, depth)
+            cache.touch(url)
+            return True
+        # validators matched but nothing to reuse: fetch unconditionally
+        record = await fetch_page(session, url)
+
+    if archive:
+        archive.write_response(record, depth)
+    record_page(page_name, record, depth)
+
+    if cache and is_html(record):
+        targets = parser.page_link_targets(page_name)
+        cache.put(
+            url, record,
+            subgraph=parser.page_subgraph(page_name),
+            links={t: page_urls[t] for t in targets if t in page_urls},
+        )
+    return False
+
+
+def page_log_entry(page_name, url, depth, targets):
+    """What the checkpoint needs to restore a finished page without refetching it."""
+    return {
+        "page": page_name,
+        "url": url,
+        "depth": depth,
+        "graph": parser.page_subgraph(page_name),
+        "counters": parser.node_counters.get(page_name, {}),
+        "links": {t: page_urls[t] for t in targets if t in page_urls},
+        "targets": targets,
+    }
+
+
+def resume_from_checkpoint(checkpoint, frontier, seen, fetched, base_url, max_pages, max_depth):
+    """
+    Rebuild G, the frontier and the seen set from a checkpoint. Logged pages
+    are merged back in their original order; links of pages logged after the
+    last snapshot are queued again. Returns the SeenUrls to continue with.
+    """
+    state, saved_seen, entries = checkpoint.load()
+    if state is not None:
+        seen = saved_seen
+        frontier.restore(state["frontier"])
+        frontier.blocked.extend(state["blocked"])
+        page_urls.update(state["page_urls"])
+
+    # the page log, not the snapshot, says what was fetched: pages in flight
+    # at snapshot time were marked fetched but never finished
+    seen.fetched.clear()
+
+    for entry, after_snapshot in entries:
+        parser.merge_page_subgraph(entry["graph"])
+        parser.node_counters[entry["page"]] = entry["counters"]
+        page_urls.update(entry["links"])
+        seen.mark_fetched(entry["url"])
+        fetched[entry["page"]] = entry["depth"]
+
+    for entry, after_snapshot in entries:
+        depth = entry["depth"]
+        if not after_snapshot or (max_depth is not None and depth >= max_depth):
+            continue
+        for target in entry["targets"]:
+            target_url = page_url(target, base_url)
+            if seen.was_fetched(target_url) or (target_url not in seen and len(seen) >= max_pages):
+                continue
+            # queued even if already in seen: the saved seen set may be newer than the frontier
+            seen.add(target_url)
+            frontier.add(target_url, depth + 1)
+
+    return seen
+
+
+async def seed_site(session, frontier, start_url, base_url, seen,
+                    respect_robots=RESPECT_ROBOTS, use_sitemap=SEED_FROM_SITEMAP):
+    """Load robots.txt, then queue the start URL and in-scope sitemap URLs at depth 0."""
+    robots = None
+    if respect_robots:
+        robots = await load_robots(session, start_url)
+        frontier.set_robots(host_of(start_url), robots)
+
+    seeds = [(start_url, None)]
+    if use_sitemap:
+        seeds += await load_sitemap_urls(session, start_url, robots)
+
+    for url, lastmod in seeds:
+        url, _ = urldefrag(url)
+        if not url.startswith(base_url) or not looks_like_page(url):
+            continue
+        name = url_to_page_name(url, base_url)
+        if base_url + name != url:
+            page_urls.setdefault(name, url)
+        if seen.add(url):
+            frontier.add(url, 0, lastmod)
+
+
+async def crawl(start_url=START_URL, max_pages=MAX_PAGES, max_depth=MAX_CLICK_DEPTH,
+                concurrency=CONCURRENCY, cache=None, frontier=None, seen=None,
+                respect_robots=RESPECT_ROBOTS, use_sitemap=SEED_FROM_SITEMAP,
+                checkpoint=None, resume=False, archive=None):
+    """
+    Crawl one site over HTTP into parser.G.
+
+    `concurrency` workers share one pooled session and pull from a
+    CrawlFrontier (per-host politeness, robots.txt, sitemap seeding,
+    depth/score priority). Pages are parsed as soon as they arrive and their
+    LINKS_TO_PAGE targets are queued. With an HttpCache, unchanged pages
+    (304) reuse their previous subgraph. Dedup goes through SeenUrls (Bloom
+    filter for discovered URLs, exact set for fetched ones).
+
+    With a CrawlCheckpoint every finished page is logged and the frontier
+    snapshotted periodically; resume=True continues a crashed run from it
+    and ends with the same graph an uninterrupted run would have built.
+    With a WarcWriter the raw responses are archived for warc_replay.py.
+    A frontier with a TrapDetector gets every fetched page's text digest,
+    so URL templates that stop yielding new pages are cut off.
+    Returns {page name: click depth} for every fetched page.
+    """
+    base_url = base_of(start_url)
+    parser.set_link_resolver(make_link_resolver(base_url))
+    parser.set_site_scope(urlsplit(start_url).hostname)
+
+    if frontier is None:
+        frontier = CrawlFrontier(user_agent=USER_AGENT)
+    if seen is None:
+        seen = SeenUrls()
+
+    start_name = url_to_page_name(start_url, base_url)
+    if base_url + start_name != start_url:
+        page_urls[start_name] = start_url
+    fetched = {}    # page name -> depth, exact, for pages fetched in this run
+    active = {}     # url -> depth of pages in flight (re-queued by a resume)
+
+    if checkpoint is not None:
+        if resume:
+            seen = resume_from_checkpoint(checkpoint, frontier, seen, fetched, base_url, max_pages, max_depth)
+        else:
+            checkpoint.reset()
+
+    def take_snapshot():
+        checkpoint.snapshot({
+            "frontier": frontier.snapshot() + [(d, u, d) for u, d in active.items()],
+            "blocked": frontier.blocked,
+            "page_urls": page_urls,
+        }, seen)
+
+    async def worker(session):
+        while True:
+            item = await frontier.get()
+            if item is None:
+                return
+
+            url, depth = item
+            page_name = url_to_page_name(url, base_url)
+            try:
+                if not seen.mark_fetched(url):
+                    continue
+                active[url] = depth
+                await fetch_and_record(session, page_name, url, depth, cache, archive)
+                fetched[page_name] = depth
+                if frontier.traps is not None:
+                    frontier.traps.record_page(url, page_text_digest(parser.G, page_name))
+
+                # queue discovered links before done(), so the frontier
+                # never looks empty while this page still has work to hand out
+                targets = parser.page_link_targets(page_name)
+                if max_depth is None or depth < max_depth:
+                    for target in targets:
+                        target_url = page_url(target, base_url)
+                        if len(seen) < max_pages and seen.add(target_url):
+                            frontier.add(target_url, depth + 1)
+
+                if checkpoint is not None:
+                    checkpoint.log_page(page_log_entry(page_name, url, depth, targets))
+                    del active[url]
+                    if checkpoint.due():
+                        take_snapshot()
+            finally:
+                active.pop(url, None)
+                frontier.done(url)
+
+    async with make_session(concurrency) as session:
+        await seed_site(session, frontier, start_url, base_url, seen, respect_robots, use_sitemap)
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+    if checkpoint is not None:
+        take_snapshot()
+
+    for url in frontier.blocked:
+        name = url_to_page_name(url, base_url)
+        parser.G.add_node(name, type="Page_File", title=name, blocked_by_robots=True)
+        parser.node_index.update([name])
+
+    return fetched
+
+
+# ============================================================
+# 5. LOCAL TEST SERVER
+# ============================================================
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory, port=0):
+    """Serve a directory with http.server in a background thread; returns (server, base URL)."""
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+# ============================================================
+# 6. MAIN
+# ============================================================
+
+def print_trap_report(traps, path):
+    report = traps.report()
+    traps.write_report(path)
+    if not report:
+        return
+    print(f"Crawl traps: {sum(r['suppressed'] for r in report)} URLs suppressed (report: {path})")
+    for r in report:
+        print(f"  {r['state']}: {r['template']} ({r['suppressed']} suppressed) - {r['reason']}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Crawl a site over HTTP into a DOM graph.")
+    arg_parser.add_argument("start_url", nargs="?", default=START_URL)
+    arg_parser.add_argument("--serve", metavar="DIR",
+                            help="serve DIR with a local http.server and crawl that instead")
+    arg_parser.add_argument("--port", type=int, default=0,
+                            help="port for --serve (default: any free port)")
+    arg_parser.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    arg_parser.add_argument("--max-depth", type=int, default=MAX_CLICK_DEPTH)
+    arg_parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    arg_parser.add_argument("--cache", default=CACHE_FILE,
+                            help="HTTP cache for conditional recrawls (default: %(default)s)")
+    arg_parser.add_argument("--no-cache", action="store_true")
+    arg_parser.add_argument("--delay", type=float, default=POLITENESS_DELAY,
+                            help="seconds between requests to one host")
+    arg_parser.add_argument("--no-robots", action="store_true", help="ignore robots.txt")
+    arg_parser.add_argument("--no-sitemap", action="store_true", help="don't seed from sitemap.xml")
+    arg_parser.add_argument("--checkpoint", default=CHECKPOINT_DIR,
+                            help="directory for crash-safe progress (default: %(default)s)")
+    arg_parser.add_argument("--no-checkpoint", action="store_true")
+    arg_parser.add_argument("--resume", action="store_true",
+                            help="continue the run recorded in --checkpoint")
+    arg_parser.add_argument("--no-trap-detection", action="store_true",
+                            help="don't throttle URL templates that stop yielding new pages")
+    arg_parser.add_argument("--trap-report", default=TRAP_REPORT,
+                            help="where to write the suppressed URL templates (default: %(default)s)")
+    arg_parser.add_argument("--warc", nargs="?", const=WARC_FILE, metavar="PATH",
+                            help="archive raw responses to a WARC file (default path: %(const)s)")
+    arg_parser.add_argument("--check-external", action="store_true",
+                            help="check every external link afterwards (status, redirects, title)")
+    arg_parser.add_argument("--near-duplicates", action="store_true",
+                            help="link near-identical pages with NEAR_DUPLICATE_OF edges")
+    arg_parser.add_argument("--snapshots", nargs="?", const=HISTORY_DB, metavar="PATH",
+                            help="record the crawl as a new version in a graph history (graph_history.py)")
+    arg_parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    args = arg_parser.parse_args(argv)
+
+    start_url = args.start_url
+    server = None
+    if args.serve:
+        server, base = serve_directory(args.serve, args.port)
+        start_url = base + DEFAULT_DOCUMENT
+
+    cache = None if args.no_cache else HttpCache(args.cache)
+    checkpoint = None if args.no_checkpoint else CrawlCheckpoint(args.checkpoint)
+    archive = WarcWriter(args.warc, {"software": USER_AGENT, "start-url": start_url}) if args.warc else None
+    traps = TrapDetector() if DETECT_TRAPS and not args.no_trap_detection else None
+
+    started = time.perf_counter()
+    try:
+        frontier = CrawlFrontier(delay=args.delay, user_agent=USER_AGENT, traps=traps)
+        depths = asyncio.run(crawl(
+            start_url, args.max_pages, args.max_depth, args.concurrency, cache, frontier,
+            respect_robots=not args.no_robots, use_sitemap=not args.no_sitemap,
+            checkpoint=checkpoint, resume=args.resume, archive=archive,
+        ))
+    finally:
+        if server:
+            server.shutdown()
+        if cache:
+            cache.close()
+        if checkpoint:
+            checkpoint.close()
+        if archive:
+            archive.close()
+    took = time.perf_counter() - started
+
+    if args.check_external:
+        link_cache = link_enricher.LinkCheckCache()
+        try:
+            total, checked = asyncio.run(link_enricher.enrich_external_links(
+                parser.G, link_cache, user_agent=USER_AGENT,
+            ))
+        finally:
+            link_cache.close()
+        print(f"External links: {total} ({checked} checked, {total - checked} from cache)")
+
+    if args.near_duplicates:
+        duplicates = near_duplicates.mark_near_duplicates(parser.G)
+        print("Near-duplicate pages:", len(duplicates))
+
+    if parser.SCORE_PAGES:
+        page_rank.score_pages(parser.G)
+
+    parser.export_graph(args.output)
+    if args.snapshots:
+        record_crawl(args.snapshots, parser.G, label=start_url)
+
+    print("--- DOM Graph Crawled ---")
+    print(f"Pages: {len(depths)} in {took:.2f}s from {start_url}")
+    unchanged = sum(1 for p in depths if parser.G.nodes[p].get("from_cache"))
+    if cache:
+        print(f"Unchanged (304, reused from cache): {unchanged}")
+    if traps:
+        print_trap_report(traps, args.trap_report)
+    print("Nodes:", len(parser.G.nodes))
+    print("Edges:", len(parser.G.edges))
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
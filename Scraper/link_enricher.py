@@ -0,0 +1,272 @@
+import os
+import re
+import sys
+import json
+import html
+import time
+import sqlite3
+import asyncio
+import argparse
+
+import aiohttp
+import networkx as nx
+
+from graph_diff import load_graph
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"       # ← change as needed
+CACHE_FILE = "Output_Cache/external_links.sqlite"
+
+CACHE_TTL = 7 * 24 * 3600     # seconds a check result is reused
+ERROR_TTL = 3600              # ... but failures are retried sooner
+CONCURRENCY = 32              # checks in flight at once
+LIMIT_PER_HOST = 4            # ... and per external host
+REQUEST_TIMEOUT = 10          # seconds per check
+TITLE_BYTES = 32 * 1024       # ranged GET size when looking for <title>
+USER_AGENT = "AIT-Projekt2-DomGraphCrawler/1.0 (link check)"
+
+# HEAD answers that mean "try a GET instead" rather than "broken"
+HEAD_NOT_SUPPORTED = {403, 405, 501}
+
+TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    url          TEXT PRIMARY KEY,
+    result       TEXT,     -- JSON, see check_url
+    checked_at   REAL
+);
+"""
+
+
+# ============================================================
+# 2. RESULT CACHE
+# ============================================================
+
+class LinkCheckCache:
+    """
+    On-disk check results keyed by URL, shared by every page and every run
+    that links to the URL. Entries expire after `ttl` seconds (`error_ttl`
+    for failures and 4xx/5xx, so a flaky host is retried sooner).
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL, error_ttl=ERROR_TTL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def get(self, url, now=None):
+        """Fresh cached result for url, or None."""
+        row = self.db.execute("SELECT result, checked_at FROM checks WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+
+        result, checked_at = json.loads(row[0]), row[1]
+        ttl = self.ttl if is_healthy(result) else self.error_ttl
+        if (now or time.time()) - checked_at > ttl:
+            return None
+        return result
+
+    def put_many(self, results):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO checks VALUES (?, ?, ?)",
+            [(url, json.dumps(r), r["checked_at"]) for url, r in results.items()],
+        )
+        self.db.commit()
+
+
+# ============================================================
+# 3. CHECKING ONE URL
+# ============================================================
+
+def is_healthy(result):
+    return result["error"] is None and result["status"] is not None and result["status"] < 400
+
+
+def extract_title(body):
+    match = TITLE_RE.search(body)
+    if not match:
+        return None
+    title = html.unescape(match.group(1).decode("utf-8", errors="replace"))
+    return " ".join(title.split()) or None
+
+
+async def read_prefix(resp, limit):
+    """Up to limit body bytes (resp.content.read(n) would return only what is buffered)."""
+    chunks, size = [], 0
+    async for chunk in resp.content.iter_chunked(limit):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return b"".join(chunks)[:limit]
+
+
+async def check_url(session, url):
+    """
+    HEAD the URL (following redirects); if the server refuses HEAD, or the
+    target is HTML and we want its title, do a ranged GET of TITLE_BYTES.
+    Never raises: {status, final_url, content_type, title, error, checked_at}.
+    """
+    result = {"status": None, "final_url": None, "content_type": None,
+              "title": None, "error": None, "checked_at": time.time()}
+
+    try:
+        async with session.head(url, allow_redirects=True) as resp:
+            result["status"] = resp.status
+            result["final_url"] = str(resp.url)
+            result["content_type"] = resp.headers.get("Content-Type")
+        need_get = result["status"] in HEAD_NOT_SUPPORTED or (
+            result["status"] < 400 and "html" in (result["content_type"] or "").lower()
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        need_get = True   # some servers drop HEAD requests outright
+
+    if not need_get:
+        return result
+
+    try:
+        headers = {"Range": f"bytes=0-{TITLE_BYTES - 1}"}
+        async with session.get(url, headers=headers, allow_redirects=True) as resp:
+            # 206 is the normal answer to a range request
+            result["status"] = 200 if resp.status == 206 else resp.status
+            result["final_url"] = str(resp.url)
+            result["content_type"] = resp.headers.get("Content-Type")
+            result["error"] = None
+            if "html" in (result["content_type"] or "").lower():
+                result["title"] = extract_title(await read_prefix(resp, TITLE_BYTES))
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        if result["status"] is None:
+            result["error"] = f"{type(e).__name__}: {e}"
+
+    return result
+
+
+# ============================================================
+# 4. ENRICHING THE GRAPH
+# ============================================================
+
+def external_urls(G):
+    return [n for n, t in G.nodes(data="type") if t == "External_Page"]
+
+
+async def check_urls(urls, concurrency=CONCURRENCY, limit_per_host=LIMIT_PER_HOST,
+                     timeout=REQUEST_TIMEOUT, user_agent=USER_AGENT):
+    """Check many URLs at once through one pooled session; {url: result}."""
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=limit_per_host, ttl_dns_cache=300)
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={"User-Agent": user_agent},
+    )
+    async with session:
+        results = await asyncio.gather(*(check_url(session, url) for url in urls))
+    return dict(zip(urls, results))
+
+
+async def enrich_external_links(G, cache=None, **check_options):
+    """
+    Put status, final_url, content_type, title, error and checked_at on every
+    External_Page node of G. Each unique URL costs at most one check; with a
+    LinkCheckCache, none while its result is fresh.
+    Returns (number of URLs, number actually checked).
+    """
+    urls = external_urls(G)
+
+    results = {}
+    to_check = []
+    for url in urls:
+        cached = cache.get(url) if cache else None
+        if cached is not None:
+            results[url] = cached
+        else:
+            to_check.append(url)
+
+    if to_check:
+        checked = await check_urls(to_check, **check_options)
+        results.update(checked)
+        if cache:
+            cache.put_many(checked)
+
+    for url, result in results.items():
+        G.nodes[url].update(result)
+
+    return len(urls), len(to_check)
+
+
+def link_health_report(G):
+    """{"ok": n, "broken": [(url, status or error, [referring pages])]}"""
+    report = {"ok": 0, "broken": []}
+    for url in external_urls(G):
+        attrs = G.nodes[url]
+        if "checked_at" not in attrs:
+            continue
+        if is_healthy(attrs):
+            report["ok"] += 1
+            continue
+
+        referrers = sorted({
+            G.nodes[u].get("page", u)
+            for u, _ in G.in_edges(url)
+        })
+        report["broken"].append((url, attrs["status"] or attrs["error"], referrers))
+    return report
+
+
+# ============================================================
+# 5. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Check every external link of a DOM graph.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE)
+    arg_parser.add_argument("-o", "--output", help="where to write the enriched graph (default: in place)")
+    arg_parser.add_argument("--cache", default=CACHE_FILE)
+    arg_parser.add_argument("--no-cache", action="store_true")
+    arg_parser.add_argument("--ttl", type=float, default=CACHE_TTL, help="seconds a result is reused")
+    arg_parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    arg_parser.add_argument("--per-host", type=int, default=LIMIT_PER_HOST)
+    arg_parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    args = arg_parser.parse_args(argv)
+
+    G = load_graph(args.graph)
+    cache = None if args.no_cache else LinkCheckCache(args.cache, ttl=args.ttl)
+
+    started = time.perf_counter()
+    try:
+        total, checked = asyncio.run(enrich_external_links(
+            G, cache, concurrency=args.concurrency, limit_per_host=args.per_host, timeout=args.timeout,
+        ))
+    finally:
+        if cache:
+            cache.close()
+    took = time.perf_counter() - started
+
+    output = args.output or args.graph
+    tmp_file = output + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(G), f, indent=4)
+    os.replace(tmp_file, output)
+
+    report = link_health_report(G)
+    print("--- External Links Checked ---")
+    print(f"URLs: {total} ({checked} checked, {total - checked} from cache) in {took:.2f}s")
+    print(f"OK: {report['ok']}  Broken: {len(report['broken'])}")
+    for url, problem, referrers in report["broken"]:
+        print(f"  {problem}  {url}  <- {', '.join(referrers)}")
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from collections import Counter
+
+import numpy as np
+import networkx as nx
+
+from graph_diff import load_graph
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"   # ← change as needed
+
+MAX_HAMMING = 8          # SimHash bits (of 64) near-duplicates may differ in (~87% similar)
+WORD_SHINGLE = 3         # words per text shingle
+TAG_SHINGLE = 4          # tags per structure shingle (document order)
+TAG_WEIGHT = 0.5         # structure shingles count half as much as text shingles
+
+WORD_RE = re.compile(r"\w+")
+
+
+# ============================================================
+# 2. PAGE FINGERPRINTS
+# ============================================================
+
+def page_tree(G, page):
+    """DOM nodes of a page in document order (pre-order over CONTAINS edges)."""
+    order = []
+    stack = [page]
+    while stack:
+        node = stack.pop()
+        children = [v for _, v, rel in G.out_edges(node, data="relation") if rel == "CONTAINS"]
+        order.extend(children)
+        stack.extend(reversed(children))
+    return order
+
+
+def graph_page_text(G, page, nodes=None):
+    """
+    A page's text as far as G keeps it, for pages parsed without their
+    fingerprint: the whole text of titles, headings and paragraphs, the
+    snippet of other leaf elements. Text directly inside elements with
+    children and leaf text past the snippet length are not in the graph.
+    """
+    parts = []
+    for node in page_tree(G, page) if nodes is None else nodes:
+        attrs = G.nodes[node]
+        full = attrs.get("full_text") or attrs.get("heading_text") or attrs.get("title_text")
+        if full:
+            parts.append(full)
+        elif not any(rel == "CONTAINS" for _, _, rel in G.out_edges(node, data="relation")):
+            parts.append(attrs.get("text_snippet") or "")
+    return " ".join(parts)
+
+
+def page_features(G, page, text=None):
+    """
+    Weighted shingles of one page: word n-grams of its full visible text
+    and n-grams of its tag sequence, which tell page templates apart.
+    The parser passes the text it collected while building the page;
+    without it, the text comes from graph_page_text.
+    """
+    nodes = page_tree(G, page)
+    if text is None:
+        text = graph_page_text(G, page, nodes)
+
+    words = WORD_RE.findall(text.lower())
+    tags = [G.nodes[node].get("tag", "") for node in nodes]
+
+    features = Counter()
+    for i in range(max(len(words) - WORD_SHINGLE + 1, 0)):
+        features["w:" + " ".join(words[i:i + WORD_SHINGLE])] += 1.0
+    for i in range(max(len(tags) - TAG_SHINGLE + 1, 0)):
+        features["t:" + "/".join(tags[i:i + TAG_SHINGLE])] += TAG_WEIGHT
+    return features
+
+
+def simhash(features):
+    """64-bit SimHash of weighted features (0 for a page without any)."""
+    if not features:
+        return 0
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+         for f in features],
+        dtype="<u8",
+    )
+    weights = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+
+    # n x 64 matrix of ±1 per hash bit, summed with the feature weights
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    score = weights @ (bits.astype(np.float64) * 2.0 - 1.0)
+    return int(np.packbits(score > 0, bitorder="little").view("<u8")[0])
+
+
+def page_simhash(G, page, text=None):
+    """SimHash of page_features, None for a page without any (unparsed, skipped)."""
+    features = page_features(G, page, text)
+    return simhash(features) if features else None
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+# ============================================================
+# 3. LSH BUCKETING + CLUSTERS
+# ============================================================
+
+def candidate_pairs(fingerprints, max_distance=MAX_HAMMING):
+    """
+    Pairs of pages whose fingerprints may be within max_distance bits. The
+    64 bits are cut into max_distance + 1 bands; two fingerprints that
+    differ in at most max_distance bits agree on at least one whole band
+    (pigeonhole), so comparing within band buckets finds every such pair.
+    """
+    bands = max_distance + 1
+    width = 64 // bands
+    buckets = {}
+    for page, fp in fingerprints.items():
+        for b in range(bands):
+            lo = b * width
+            hi = 64 if b == bands - 1 else lo + width
+            key = (b, (fp >> lo) & ((1 << (hi - lo)) - 1))
+            buckets.setdefault(key, []).append(page)
+
+    pairs = set()
+    for pages in buckets.values():
+        for i, a in enumerate(pages):
+            for b in pages[i + 1:]:
+                pairs.add((a, b) if a < b else (b, a))
+    return pairs
+
+
+def find_near_duplicates(fingerprints, max_distance=MAX_HAMMING):
+    """
+    {duplicate page: (canonical page, distance)}. Canonical pages are
+    picked greedily by shortest name (spice-wreath.html before
+    spice-wreath2.html); every page within max_distance of one becomes its
+    duplicate, so clusters never chain beyond the threshold.
+    """
+    neighbours = {}
+    for a, b in candidate_pairs(fingerprints, max_distance):
+        d = hamming(fingerprints[a], fingerprints[b])
+        if d <= max_distance:
+            neighbours.setdefault(a, []).append((b, d))
+            neighbours.setdefault(b, []).append((a, d))
+
+    duplicates = {}
+    assigned = set()
+    for page in sorted(neighbours, key=lambda p: (len(p), p)):
+        if page in assigned:
+            continue
+        assigned.add(page)
+        for other, d in sorted(neighbours[page], key=lambda x: (x[1], x[0])):
+            if other not in assigned:
+                assigned.add(other)
+                duplicates[other] = (page, d)
+    return duplicates
+
+
+# ============================================================
+# 4. MARKING THE GRAPH
+# ============================================================
+
+def mark_near_duplicates(G, max_distance=MAX_HAMMING):
+    """
+    Fingerprint every parsed Page_File node of G (hex "simhash" attribute;
+    the parser stores it from the full page text, other pages get it from
+    the graph) and link each near-duplicate to its canonical page with a
+    NEAR_DUPLICATE_OF edge carrying the Hamming distance and similarity.
+    Earlier NEAR_DUPLICATE_OF edges are replaced. Returns the duplicates.
+    """
+    stale = [(u, v, k) for u, v, k, rel in G.edges(keys=True, data="relation") if rel == "NEAR_DUPLICATE_OF"]
+    G.remove_edges_from(stale)
+
+    fingerprints = {}
+    for page, ntype in list(G.nodes(data="type")):
+        if ntype != "Page_File":
+            continue
+        stored = G.nodes[page].get("simhash")
+        if stored:
+            fingerprints[page] = int(stored, 16)
+            continue
+        fingerprint = page_simhash(G, page)
+        if fingerprint is None:
+            continue    # unparsed / skipped pages have nothing to compare
+        fingerprints[page] = fingerprint
+        G.nodes[page]["simhash"] = f"{fingerprint:016x}"
+
+    duplicates = find_near_duplicates(fingerprints, max_distance)
+    for page, (canonical, d) in duplicates.items():
+        G.add_edge(page, canonical, relation="NEAR_DUPLICATE_OF",
+                   distance=d, similarity=round(1 - d / 64, 4))
+    return duplicates
+
+
+# ============================================================
+# 5. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Mark near-duplicate pages of a DOM graph.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE)
+    arg_parser.add_argument("-o", "--output", help="where to write the marked graph (default: in place)")
+    arg_parser.add_argument("--max-distance", type=int, default=MAX_HAMMING,
+                            help="SimHash bits (of 64) near-duplicates may differ in")
+    args = arg_parser.parse_args(argv)
+
+    G = load_graph(args.graph)
+    duplicates = mark_near_duplicates(G, args.max_distance)
+
+    output = args.output or args.graph
+    tmp_file = output + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(G), f, indent=4)
+    os.replace(tmp_file, output)
+
+    pages = sum(1 for _, t in G.nodes(data="type") if t == "Page_File")
+    print("--- Near-Duplicate Pages ---")
+    print(f"Pages: {pages}  Near-duplicates: {len(duplicates)}")
+    for page, (canonical, d) in sorted(duplicates.items()):
+        print(f"  {page} ≈ {canonical} ({d} bits)")
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import argparse
+from collections import Counter
+
+import numpy as np
+import networkx as nx
+import scipy.sparse as sp
+
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"        # ← change as needed
+PAGE_GRAPH_FILE = "Output_Graph_Json/page_graph.json"
+
+DAMPING = 0.85           # PageRank: probability of following a link instead of jumping
+MAX_ITER = 200
+TOL = 1e-10              # L1 change per iteration at which power iteration stops
+SELF_LINKS = False       # count links from a page to itself (menus, "back to top")
+MAX_ANCHORS = 10         # most frequent anchor texts kept per page-graph edge
+PRIOR_WEIGHT = 0.05      # how much static_prior adds to a retrieval similarity
+
+# attributes score_pages writes onto every Page_File node
+SCORE_ATTRS = ("pagerank", "hub", "authority", "in_degree")
+
+
+# ============================================================
+# 2. PAGE GRAPH
+# ============================================================
+
+def source_page(G, node):
+    """The page a link-carrying node belongs to."""
+    attrs = G.nodes[node]
+    return attrs.get("page") or (node if attrs.get("type") == "Page_File" else None)
+
+
+def contract_page_graph(G, self_links=SELF_LINKS):
+    """
+    Collapse the DOM graph to pages: one node per Page_File, one edge per
+    linked (page, page) pair with "weight" = number of <a> links and
+    "anchors" = [[anchor text, count], ...], most frequent first.
+    Only the LINKS_TO_PAGE edges are read, not the page trees.
+    """
+    P = nx.DiGraph()
+    for page, ntype in G.nodes(data="type"):
+        if ntype == "Page_File":
+            P.add_node(page, title=G.nodes[page].get("title", page))
+
+    anchors = {}
+    for u, v, attrs in G.edges(data=True):
+        if attrs.get("relation") != "LINKS_TO_PAGE":
+            continue
+        src = source_page(G, u)
+        if src is None or (src == v and not self_links):
+            continue
+        anchors.setdefault((src, v), Counter())[attrs.get("anchor") or ""] += 1
+
+    for (src, dst), counts in anchors.items():
+        if dst not in P:
+            P.add_node(dst, title=dst)    # link target that never became a Page_File
+        P.add_edge(src, dst, weight=sum(counts.values()),
+                   anchors=[[text, n] for text, n in counts.most_common(MAX_ANCHORS)])
+    return P
+
+
+def sparse_adjacency(P):
+    """(page list, CSR matrix A) with A[i, j] = weight of the link i → j."""
+    pages = list(P.nodes)
+    row = {page: i for i, page in enumerate(pages)}
+    edges = list(P.edges(data="weight", default=1))
+    A = sp.csr_matrix(
+        (np.array([w for _, _, w in edges], dtype=np.float64),
+         ([row[u] for u, _, _ in edges], [row[v] for _, v, _ in edges])),
+        shape=(len(pages), len(pages)),
+    )
+    return pages, A
+
+
+# ============================================================
+# 3. SCORES
+# ============================================================
+
+def pagerank(A, damping=DAMPING, tol=TOL, max_iter=MAX_ITER):
+    """
+    Weighted PageRank by power iteration on the sparse matrix. Pages
+    without outgoing links spread their rank evenly over all pages.
+    With the default tol this agrees with a converged networkx.pagerank
+    (tol=1e-12) to ~1e-10; networkx's own default tol=1e-6 stops earlier,
+    so compared with that the difference is ~1e-7.
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out == 0
+    M = sp.diags(np.divide(1.0, out, out=np.zeros(n), where=~dangling)) @ A
+    MT = M.T.tocsr()
+
+    r = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = r
+        r = damping * (MT @ r) + (damping * r[dangling].sum() + 1 - damping) / n
+        if np.abs(r - previous).sum() < n * tol:
+            break
+    return r / r.sum()
+
+
+def hits(A, tol=TOL, max_iter=MAX_ITER):
+    """(hubs, authorities), each normalized to sum 1, as in networkx.hits."""
+    n = A.shape[0]
+    if n == 0 or A.nnz == 0:
+        return np.full(n, 1.0 / max(n, 1)), np.full(n, 1.0 / max(n, 1))
+    AT = A.T.tocsr()
+
+    h = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = h
+        a = AT @ h
+        h = A @ a
+        h /= h.max()
+        if np.abs(h - previous).sum() < n * tol:
+            break
+    a = AT @ h
+    return h / h.sum(), a / a.sum()
+
+
+def page_scores(P):
+    """{page: {"pagerank", "hub", "authority", "in_degree"}}; in_degree = distinct linking pages."""
+    pages, A = sparse_adjacency(P)
+    rank = pagerank(A)
+    hub, authority = hits(A)
+    in_degree = np.diff(A.tocsc().indptr)
+    return {
+        page: {
+            "pagerank": round(float(rank[i]), 8),
+            "hub": round(float(hub[i]), 8),
+            "authority": round(float(authority[i]), 8),
+            "in_degree": int(in_degree[i]),
+        }
+        for i, page in enumerate(pages)
+    }
+
+
+def score_pages(G):
+    """
+    Contract G to its page graph, score it and store SCORE_ATTRS on every
+    Page_File node of G. Returns (page graph, scores).
+    """
+    P = contract_page_graph(G)
+    scores = page_scores(P)
+    for page, values in scores.items():
+        if page in G:
+            G.nodes[page].update(values)
+    return P, scores
+
+
+def best_page_score(G, attr="pagerank"):
+    """Highest score of any Page_File node (0 if G was never scored); compute once per loaded graph."""
+    return max((a.get(attr) or 0 for _, a in G.nodes(data=True) if a.get("type") == "Page_File"), default=0)
+
+
+def static_prior(G, nodes, best, attr="pagerank"):
+    """
+    Per-node prior in [0, 1] for retrieval: the score of the node's page
+    divided by best (= best_page_score(G, attr)). Zeros if G was never scored.
+    """
+    prior = np.zeros(len(nodes), dtype=np.float32)
+    if not best:
+        return prior
+    for i, node in enumerate(nodes):
+        if node not in G:
+            continue
+        page = source_page(G, node)
+        if page in G:
+            prior[i] = (G.nodes[page].get(attr) or 0) / best
+    return prior
+
+
+def export_page_graph(P, output_file=PAGE_GRAPH_FILE):
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(P), f, indent=4)
+    os.replace(tmp_file, output_file)
+
+
+# ============================================================
+# 4. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Score the pages of a DOM graph by its link structure.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE)
+    arg_parser.add_argument("-o", "--output", help="where to write the scored graph (default: in place)")
+    arg_parser.add_argument("--page-graph", default=PAGE_GRAPH_FILE, help="contracted page graph output")
+    arg_parser.add_argument("--top", type=int, default=10, help="pages to print")
+    args = arg_parser.parse_args(argv)
+
+    from graph_diff import load_graph
+    G = load_graph(args.graph)
+    P, scores = score_pages(G)
+
+    output = args.output or args.graph
+    tmp_file = output + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(nx.node_link_data(G), f, indent=4)
+    os.replace(tmp_file, output)
+    export_page_graph(P, args.page_graph)
+
+    print("--- Page Scores ---")
+    print(f"Pages: {P.number_of_nodes()}  Page links: {P.number_of_edges()}")
+    print(f"  {'pagerank':>9} {'hub':>7} {'auth':>7} {'in':>4}  page")
+    for page, s in sorted(scores.items(), key=lambda item: -item[1]["pagerank"])[:args.top]:
+        print(f"  {s['pagerank']:9.4f} {s['hub']:7.4f} {s['authority']:7.4f} {s['in_degree']:4d}  {page}")
+    print(f"Saved to {output} and {args.page_graph}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+import os
+import sys
+import math
+import time
+import hashlib
+import sqlite3
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+import dom_graph_parser as parser
+import http_crawler as crawler
+import near_duplicates
+import page_rank
+from http_cache import HttpCache, CACHE_FILE
+from crawl_frontier import CrawlFrontier, POLITENESS_DELAY, RESPECT_ROBOTS, host_of, load_robots
+from graph_diff import load_graph, tree_children, link_edges, compute_subtree_hashes
+from graph_history import record_crawl, HISTORY_DB
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+START_URL = crawler.START_URL                          # ← change as needed
+GRAPH_FILE = crawler.OUTPUT_FILE                       # graph the cycles keep up to date
+HISTORY_FILE = "Output_Cache/change_history.sqlite"
+
+FETCH_BUDGET = 200              # pages refetched per cycle
+PRIOR_INTERVAL = 7 * 24 * 3600  # assumed mean time between changes for a page without history
+MIN_RATE = 1 / (365 * 24 * 3600)   # never assume a page changes less than once a year
+MAX_INTERVAL = 90 * 24 * 3600   # ... and revisit every page at least this often anyway
+MIN_CHANGE_PROBABILITY = 0.05   # below this a refetch is not worth a slot, even if the budget has room
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url           TEXT PRIMARY KEY,
+    page_name     TEXT,
+    depth         INTEGER,
+    content_hash  TEXT,     -- NULL until the first fetch
+    first_seen    REAL,
+    last_checked  REAL,     -- NULL until the first fetch
+    checks        INTEGER,  -- revisits after the first fetch
+    changes       INTEGER,  -- ... that found different content
+    observed      REAL      -- seconds covered by those revisits
+);
+"""
+
+
+# ============================================================
+# 2. CONTENT HASH
+# ============================================================
+
+def page_content_hash(G, page):
+    """
+    Merkle root of a page's DOM tree (graph_diff subtree hashes over xpath
+    keys), so node renumbering and fetch metadata (fetch_ms, status, ...)
+    don't count as a change, but any text, attribute or link change does.
+    """
+    tree = []
+    stack = [page]
+    while stack:
+        children = tree_children(G, stack.pop())
+        tree.extend(children)
+        stack.extend(children)
+    targets = {v for node in tree for v, _ in link_edges(G, node)}
+
+    hashes = compute_subtree_hashes(G.subgraph([page, *tree, *targets]))
+    h = hashlib.blake2b(digest_size=16)
+    for child in tree_children(G, page):
+        h.update(hashes[child].encode("ascii"))
+    return h.hexdigest()
+
+
+# ============================================================
+# 3. CHANGE HISTORY + RATE ESTIMATES
+# ============================================================
+
+def change_rate(checks, changes, observed, prior_rate=1 / PRIOR_INTERVAL):
+    """
+    Changes per second, assuming a page changes as a Poisson process.
+
+    A revisit only tells whether the page changed at least once since the
+    last one, so changes / time underestimates fast pages. The estimator
+    of Cho & Garcia-Molina corrects for that (and stays finite when every
+    revisit saw a change):  λ = -ln((n - X + 0.5) / (n + 0.5)) / mean interval
+    """
+    if checks == 0 or observed <= 0:
+        return prior_rate
+    mean_interval = observed / checks
+    rate = -math.log((checks - changes + 0.5) / (checks + 0.5)) / mean_interval
+    return max(rate, MIN_RATE)
+
+
+def change_probability(rate, age):
+    """P(at least one change within `age` seconds) for a Poisson rate."""
+    return 1.0 - math.exp(-rate * age)
+
+
+class ChangeHistory:
+    """
+    Per-URL visit history: content hash of the last fetch, how often a
+    revisit found it changed and over how long. Pages discovered but never
+    fetched are kept too, so the next cycle picks them up first.
+    """
+
+    def __init__(self, path=HISTORY_FILE, prior_interval=PRIOR_INTERVAL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.prior_rate = 1 / prior_interval
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def register(self, url, page_name, depth, now=None):
+        """Remember a discovered URL; True if it wasn't known yet."""
+        cur = self.db.execute(
+            "INSERT OR IGNORE INTO pages VALUES (?, ?, ?, NULL, ?, NULL, 0, 0, 0)",
+            (url, page_name, depth, now or time.time()),
+        )
+        return cur.rowcount == 1
+
+    def observe(self, url, page_name, depth, content_hash, now=None):
+        """Record one fetch of url. Returns "new", "changed" or "unchanged"."""
+        now = now or time.time()
+        self.register(url, page_name, depth, now)
+        last_hash, last_checked = self.db.execute(
+            "SELECT content_hash, last_checked FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+
+        if last_checked is None:
+            outcome = "new"
+            self.db.execute(
+                "UPDATE pages SET content_hash = ?, last_checked = ?, depth = MIN(depth, ?) WHERE url = ?",
+                (content_hash, now, depth, url),
+            )
+        else:
+            outcome = "unchanged" if content_hash == last_hash else "changed"
+            self.db.execute(
+                "UPDATE pages SET content_hash = ?, last_checked = ?, checks = checks + 1, "
+                "changes = changes + ?, observed = observed + ? WHERE url = ?",
+                (content_hash, now, outcome == "changed", max(now - last_checked, 0.0), url),
+            )
+        self.db.commit()
+        return outcome
+
+    def rows(self):
+        for row in self.db.execute(
+            "SELECT url, page_name, depth, last_checked, checks, changes, observed FROM pages"
+        ):
+            yield dict(zip(("url", "page_name", "depth", "last_checked", "checks", "changes", "observed"), row))
+
+    def schedule(self, budget=FETCH_BUDGET, now=None, max_interval=MAX_INTERVAL,
+                 min_probability=MIN_CHANGE_PROBABILITY):
+        """
+        Up to `budget` pages to refetch this cycle, most likely changed first:
+        P(changed) = 1 - exp(-λ · time since last fetch). Never-fetched pages
+        come first, then pages older than max_interval, then by P(changed);
+        pages below min_probability wait for a later cycle.
+        Frequently changing pages come up again cycle after cycle, static
+        ones once enough time has passed for even their low rate to add up.
+        """
+        now = now or time.time()
+        plan = []
+        for row in self.rows():
+            rate = change_rate(row["checks"], row["changes"], row["observed"], self.prior_rate)
+            if row["last_checked"] is None:
+                age, p = None, 1.0
+            else:
+                age = max(now - row["last_checked"], 0.0)
+                p = change_probability(rate, age)
+            row.update(rate=rate, age=age, p_changed=p)
+            plan.append(row)
+
+        def urgency(row):
+            never = row["age"] is None
+            overdue = not never and row["age"] >= max_interval
+            return (never, overdue, row["p_changed"], row["age"] or 0.0)
+
+        plan = [row for row in plan if row["p_changed"] >= min_probability or urgency(row)[1]]
+        plan.sort(key=urgency, reverse=True)
+        return plan[:budget]
+
+
+# ============================================================
+# 4. RECRAWL CYCLE
+# ============================================================
+
+def load_site_graph(graph_file, base_url):
+    """Put a previously built graph back into parser.G (and its non-plain page URLs)."""
+    parser.reset_graph()
+    parser.G.update(load_graph(graph_file))
+    parser.rebuild_indexes()
+    for name, attrs in parser.G.nodes(data=True):
+        url = attrs.get("url") if attrs.get("type") == "Page_File" else None
+        if url and base_url + name != url:
+            crawler.page_urls.setdefault(name, url)
+
+
+async def refresh_page(session, history, page_name, url, depth, base_url, cache=None, now=None):
+    """
+    Refetch one page in place and record whether its content changed.
+    On a network error or 5xx the previous version is put back and
+    nothing is recorded. Returns the outcome and the newly discovered URLs.
+    """
+    G = parser.G
+    previous = parser.page_subgraph(page_name) if page_name in G else None
+    if previous is not None:
+        parser.remove_page(page_name, keep_page_node=True)
+        G.nodes[page_name].clear()   # drop stale fetch metadata (error, from_cache, ...)
+
+    await crawler.fetch_and_record(session, page_name, url, depth, cache)
+
+    status = G.nodes[page_name].get("status")
+    if status is None or status >= 500:
+        if previous is not None:
+            parser.remove_page(page_name, keep_page_node=True)
+            G.nodes[page_name].clear()
+            parser.merge_page_subgraph(previous)
+        return "failed", 0
+
+    outcome = history.observe(url, page_name, depth, page_content_hash(G, page_name), now)
+
+    discovered = 0
+    for target in parser.page_link_targets(page_name):
+        discovered += history.register(crawler.page_url(target, base_url), target, depth + 1, now)
+    return outcome, discovered
+
+
+async def recrawl_cycle(history, start_url=START_URL, budget=FETCH_BUDGET, concurrency=crawler.CONCURRENCY,
+                        cache=None, frontier=None, respect_robots=RESPECT_ROBOTS, now=None):
+    """
+    One cycle: refetch the `budget` most-likely-changed pages of history
+    into parser.G (politely, through a CrawlFrontier) and update their
+    change history. Newly linked pages are only registered; the next cycle
+    fetches them first. Returns {outcome: count}.
+    """
+    base_url = crawler.base_of(start_url)
+    parser.set_link_resolver(crawler.make_link_resolver(base_url))
+    parser.set_site_scope(urlsplit(start_url).hostname)
+
+    if frontier is None:
+        frontier = CrawlFrontier(user_agent=crawler.USER_AGENT)
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "failed": 0, "discovered": 0}
+
+    async def worker(session):
+        while True:
+            item = await frontier.get()
+            if item is None:
+                return
+            url, depth = item
+            try:
+                page_name = crawler.url_to_page_name(url, base_url)
+                outcome, discovered = await refresh_page(
+                    session, history, page_name, url, depth, base_url, cache, now,
+                )
+                counts[outcome] += 1
+                counts["discovered"] += discovered
+            finally:
+                frontier.done(url)
+
+    async with crawler.make_session(concurrency) as session:
+        if respect_robots:
+            frontier.set_robots(host_of(start_url), await load_robots(session, start_url))
+        # queued in schedule order (not by depth), skipping what robots.txt now disallows
+        plan = [row for row in history.schedule(budget, now) if frontier.allowed(row["url"])]
+        frontier.restore([(rank, row["url"], row["depth"]) for rank, row in enumerate(plan)])
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+    return counts
+
+
+async def initial_crawl(history, start_url=START_URL, cache=None, frontier=None,
+                        respect_robots=RESPECT_ROBOTS, now=None):
+    """No history yet: crawl the whole site once and record every page as its baseline."""
+    depths = await crawler.crawl(start_url, cache=cache, frontier=frontier, respect_robots=respect_robots)
+    base_url = crawler.base_of(start_url)
+    for page_name, depth in depths.items():
+        url = crawler.page_url(page_name, base_url)
+        if parser.G.nodes[page_name].get("status") is not None:
+            history.observe(url, page_name, depth, page_content_hash(parser.G, page_name), now)
+    return len(depths)
+
+
+# ============================================================
+# 5. MAIN
+# ============================================================
+
+def format_interval(seconds):
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def print_plan(history, budget):
+    plan = history.schedule(budget)
+    print(f"--- Next cycle: {len(plan)} of up to {budget} fetches due ---")
+    for row in plan:
+        age = "never fetched" if row["age"] is None else f"last fetched {format_interval(row['age'])} ago"
+        print(f"  P={row['p_changed']:.2f}  changes every ~{format_interval(1 / row['rate'])}  "
+              f"{row['page_name']} ({age}, {row['changes']}/{row['checks']} revisits changed)")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Recrawl a site within a fixed fetch budget, revisiting pages by how often they change."
+    )
+    arg_parser.add_argument("start_url", nargs="?", default=START_URL)
+    arg_parser.add_argument("--serve", metavar="DIR",
+                            help="serve DIR with a local http.server and recrawl that instead")
+    arg_parser.add_argument("--port", type=int, default=0)
+    arg_parser.add_argument("--budget", type=int, default=FETCH_BUDGET, help="pages refetched per cycle")
+    arg_parser.add_argument("--cycles", type=int, default=1)
+    arg_parser.add_argument("--interval", type=float, default=3600.0, help="seconds between cycles")
+    arg_parser.add_argument("--history", default=HISTORY_FILE)
+    arg_parser.add_argument("--cache", default=CACHE_FILE,
+                            help="HTTP cache for conditional refetches (default: %(default)s)")
+    arg_parser.add_argument("--no-cache", action="store_true")
+    arg_parser.add_argument("--concurrency", type=int, default=crawler.CONCURRENCY)
+    arg_parser.add_argument("--delay", type=float, default=POLITENESS_DELAY,
+                            help="seconds between requests to one host")
+    arg_parser.add_argument("--no-robots", action="store_true", help="ignore robots.txt")
+    arg_parser.add_argument("--plan", action="store_true",
+                            help="only show what the next cycle would fetch")
+    arg_parser.add_argument("--near-duplicates", action="store_true",
+                            help="re-mark near-identical pages after each cycle")
+    arg_parser.add_argument("--snapshots", nargs="?", const=HISTORY_DB, metavar="PATH",
+                            help="record every cycle as a new version in a graph history (graph_history.py)")
+    arg_parser.add_argument("-o", "--output", default=GRAPH_FILE)
+    args = arg_parser.parse_args(argv)
+
+    history = ChangeHistory(args.history)
+    if args.plan:
+        print_plan(history, args.budget)
+        history.close()
+        return
+
+    start_url = args.start_url
+    server = None
+    if args.serve:
+        server, base = crawler.serve_directory(args.serve, args.port)
+        start_url = base + crawler.DEFAULT_DOCUMENT
+
+    cache = None if args.no_cache else HttpCache(args.cache)
+    try:
+        for cycle in range(args.cycles):
+            if cycle:
+                time.sleep(args.interval)
+            frontier = CrawlFrontier(delay=args.delay, user_agent=crawler.USER_AGENT)
+            started = time.perf_counter()
+
+            if len(history) == 0 or not os.path.exists(args.output):
+                pages = asyncio.run(initial_crawl(history, start_url, cache, frontier, not args.no_robots))
+                summary = f"initial crawl: {pages} pages"
+            else:
+                load_site_graph(args.output, crawler.base_of(start_url))
+                counts = asyncio.run(recrawl_cycle(history, start_url, args.budget, args.concurrency,
+                                                   cache, frontier, not args.no_robots))
+                summary = (f"{sum(counts[k] for k in ('new', 'changed', 'unchanged', 'failed'))} fetched: "
+                           f"{counts['changed']} changed, {counts['unchanged']} unchanged, "
+                           f"{counts['new']} new, {counts['failed']} failed; "
+                           f"{counts['discovered']} newly linked pages queued")
+
+            if args.near_duplicates:
+                near_duplicates.mark_near_duplicates(parser.G)
+            if parser.SCORE_PAGES:
+                page_rank.score_pages(parser.G)
+            parser.export_graph(args.output)
+            if args.snapshots:
+                record_crawl(args.snapshots, parser.G, label=f"cycle {cycle + 1}: {summary}")
+            print(f"Cycle {cycle + 1}: {summary} in {time.perf_counter() - started:.2f}s "
+                  f"({len(history)} pages tracked) → {args.output}")
+    finally:
+        if server:
+            server.shutdown()
+        if cache:
+            cache.close()
+
+    print_plan(history, min(args.budget, 10))
+    history.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import os
+import json
+import math
+import hashlib
+from array import array
+from urllib.parse import urlsplit, urlunsplit
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+SEEN_ERROR_RATE = 0.001          # overall false-positive rate of the discovered set
+INITIAL_CAPACITY = 1_000_000     # URLs before the first filter stage is full
+GROWTH = 2                       # each new stage holds GROWTH × the previous one
+TIGHTENING = 0.5                 # ... at TIGHTENING × its error rate
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# ============================================================
+# 2. CANONICAL URLS + HASHES
+# ============================================================
+
+def canonicalize_url(url):
+    """
+    One spelling per URL: lowercase scheme and host, no default port, no
+    fragment, empty path → "/", query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"   # IPv6 literal
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    # sort the raw "k=v" pairs; decoding and re-encoding them costs more
+    # than everything else here together
+    query = "&".join(sorted(pair for pair in parts.query.split("&") if pair))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def url_digest(url):
+    """Two independent 64-bit hashes of a canonical URL."""
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+# ============================================================
+# 3. BLOOM FILTERS
+# ============================================================
+
+class BloomFilter:
+    """Fixed-size Bloom filter over (h1, h2) digests, k positions by double hashing."""
+
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, digest):
+        h1, h2 = digest
+        h2 |= 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, digest):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def add(self, digest):
+        for p in self._positions(digest):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows in stages instead of needing the final size
+    upfront. Stage i gets error_rate * (1 - TIGHTENING) * TIGHTENING**i, so
+    the combined false-positive rate stays below error_rate however many
+    stages are added. About 1.44 * log2(1/p) bits per URL: ~2 bytes at 0.1%.
+    """
+
+    def __init__(self, initial_capacity=INITIAL_CAPACITY, error_rate=SEEN_ERROR_RATE):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.stages = []
+
+    def _new_stage(self):
+        i = len(self.stages)
+        stage = BloomFilter(
+            self.initial_capacity * GROWTH ** i,
+            self.error_rate * (1 - TIGHTENING) * TIGHTENING ** i,
+        )
+        self.stages.append(stage)
+        return stage
+
+    def __contains__(self, digest):
+        return any(digest in stage for stage in self.stages)
+
+    def __len__(self):
+        return sum(stage.count for stage in self.stages)
+
+    def add(self, digest):
+        """Add a digest; False if it was (probably) there already."""
+        if digest in self:
+            return False
+        stage = self.stages[-1] if self.stages and not self.stages[-1].is_full() else self._new_stage()
+        stage.add(digest)
+        return True
+
+    def nbytes(self):
+        return sum(len(stage.bits) for stage in self.stages)
+
+
+# ============================================================
+# 4. SEEN-URL SET (PROBABILISTIC + EXACT TIER)
+# ============================================================
+
+class SeenUrls:
+    """
+    Crawl dedup in two tiers.
+
+    discovered: every URL ever queued, in a scalable Bloom filter. A false
+        positive makes the crawler skip a new URL (rate ≤ error_rate); it can
+        never make it queue one twice.
+    fetched:    exact 64-bit hashes of the pages actually fetched, so a page
+        reached twice (sitemap + link, resumed run) is never fetched twice
+        and fetch counts are exact.
+    """
+
+    def __init__(self, error_rate=SEEN_ERROR_RATE, initial_capacity=INITIAL_CAPACITY):
+        self.discovered = ScalableBloomFilter(initial_capacity, error_rate)
+        self.fetched = set()
+
+    def add(self, url):
+        """Record a discovered URL; True if it is new."""
+        return self.discovered.add(url_digest(canonicalize_url(url)))
+
+    def __contains__(self, url):
+        return url_digest(canonicalize_url(url)) in self.discovered
+
+    def __len__(self):
+        return len(self.discovered)
+
+    def mark_fetched(self, url):
+        """Record a fetch; False if this exact URL was fetched before."""
+        h = url_digest(canonicalize_url(url))[0]
+        if h in self.fetched:
+            return False
+        self.fetched.add(h)
+        return True
+
+    def was_fetched(self, url):
+        return url_digest(canonicalize_url(url))[0] in self.fetched
+
+    # -----------------------------
+    # Persistence (for resumed crawls)
+    # -----------------------------
+    def save(self, path):
+        """One JSON header line, then the raw stage bit arrays, then the fetched hashes."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        header = {
+            "error_rate": self.discovered.error_rate,
+            "initial_capacity": self.discovered.initial_capacity,
+            "stages": [
+                {"capacity": s.capacity, "error_rate": s.error_rate, "count": s.count, "nbytes": len(s.bits)}
+                for s in self.discovered.stages
+            ],
+            "fetched": len(self.fetched),
+        }
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for stage in self.discovered.stages:
+                f.write(stage.bits)
+            f.write(array("Q", sorted(self.fetched)).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            seen = cls(header["error_rate"], header["initial_capacity"])
+
+            for meta in header["stages"]:
+                bits = bytearray(f.read(meta["nbytes"]))
+                seen.discovered.stages.append(
+                    BloomFilter(meta["capacity"], meta["error_rate"], bits=bits, count=meta["count"])
+                )
+
+            fetched = array("Q")
+            fetched.frombytes(f.read(header["fetched"] * fetched.itemsize))
+            seen.fetched = set(fetched)
+
+        return seen
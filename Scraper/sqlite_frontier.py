@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+
+from crawl_frontier import POLITENESS_DELAY, MAX_INFLIGHT_PER_HOST, host_of
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+FRONTIER_DB = "Output_Crawl/frontier.sqlite"   # ← change as needed
+LEASE_SECONDS = 120        # a claimed URL is retried if not completed within this
+MAX_ATTEMPTS = 3           # claims before a URL is given up as "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    url           TEXT UNIQUE NOT NULL,
+    page_name     TEXT NOT NULL,
+    depth         INTEGER NOT NULL,
+    priority      REAL NOT NULL,
+    state         TEXT NOT NULL DEFAULT 'queued',   -- queued | leased | done | failed | suppressed
+    lease_owner   TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    host          TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS hosts (
+    host          TEXT PRIMARY KEY,
+    delay         REAL,                -- seconds between requests (NULL = the frontier's delay)
+    next_allowed  REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS urls_claim ON urls (host, state, priority, id);
+CREATE INDEX IF NOT EXISTS urls_lease ON urls (state, lease_expires);
+CREATE INDEX IF NOT EXISTS urls_host_lease ON urls (host, state, lease_expires);
+"""
+
+
+def worker_id():
+    """host:pid, unique across the machines sharing one frontier."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ============================================================
+# 2. FRONTIER
+# ============================================================
+
+class SqliteFrontier:
+    """
+    Crawl frontier shared by worker processes through one SQLite file.
+
+    Workers claim URLs with a lease (visibility timeout). A URL whose lease
+    runs out without complete() - the worker crashed or hung - becomes
+    claimable again, up to MAX_ATTEMPTS claims. URLs are unique, so the
+    table is also the exact dedup set for the whole crawl.
+
+    Politeness holds across all workers, with CrawlFrontier's rules: a host
+    gets at most max_inflight live leases, and a new one only `delay`
+    seconds after its last claim and its last completed request
+    (set_host_delay raises the delay for one host, e.g. to its robots.txt
+    Crawl-delay).
+
+    With a crawl_traps.SqliteTrapDetector on the same connection as
+    `traps`, add() turns away URLs of throttled or blocked URL templates
+    like CrawlFrontier does. They are kept with state 'suppressed', so they
+    are not offered again. Workers report fetched pages through
+    record_page().
+
+    Several machines can share the file only over a filesystem with working
+    POSIX locks; otherwise run one frontier per machine.
+    """
+
+    def __init__(self, path=FRONTIER_DB, lease_seconds=LEASE_SECONDS,
+                 delay=POLITENESS_DELAY, max_inflight=MAX_INFLIGHT_PER_HOST):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.delay = delay
+        self.max_inflight = max_inflight
+        self.traps = None    # crawl_traps.SqliteTrapDetector(self.db)
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._upgrade()
+        self.db.executescript(INDEXES)
+
+    def _upgrade(self):
+        """Bring a frontier written before per-host politeness up to the current schema."""
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(urls)")}
+        with self.db:
+            if "host" not in columns:
+                self.db.execute("DROP INDEX IF EXISTS urls_claim")
+                self.db.execute("ALTER TABLE urls ADD COLUMN host TEXT NOT NULL DEFAULT ''")
+                self.db.create_function("host_of", 1, host_of)
+                self.db.execute("UPDATE urls SET host = host_of(url)")
+                self.db.execute("INSERT OR IGNORE INTO hosts (host) SELECT DISTINCT host FROM urls")
+            self.db.execute(
+                "INSERT OR IGNORE INTO counters VALUES ('urls', (SELECT COUNT(*) FROM urls))"
+            )
+
+    def close(self):
+        self.db.close()
+
+    # -----------------------------
+    # Crawl settings shared by all workers
+    # -----------------------------
+    def set_config(self, **config):
+        with self.db:
+            for key, value in config.items():
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_config(self):
+        return {k: json.loads(v) for k, v in self.db.execute("SELECT key, value FROM meta")}
+
+    def reset(self):
+        """Forget a previous crawl (URLs, settings and trap statistics)."""
+        with self.db:
+            self.db.execute("DELETE FROM urls")
+            self.db.execute("DELETE FROM hosts")
+            self.db.execute("DELETE FROM meta")
+            self.db.execute("UPDATE counters SET value = 0 WHERE name = 'urls'")
+        if self.traps is not None:
+            self.traps.clear()
+
+    def set_host_delay(self, host, delay):
+        """Seconds between requests to one host (None = back to the frontier's delay)."""
+        with self.db:
+            self.db.execute(
+                "INSERT INTO hosts (host, delay) VALUES (?, ?) "
+                "ON CONFLICT (host) DO UPDATE SET delay = excluded.delay",
+                (host, delay),
+            )
+
+    def release_leases(self):
+        """
+        Hand every leased URL back to the queue, without counting the claim.
+        Only safe while no worker runs, e.g. when resuming after a crash.
+        """
+        with self.db:
+            cur = self.db.execute(
+                "UPDATE urls SET state = 'queued', lease_owner = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE state = 'leased'"
+            )
+        return cur.rowcount
+
+    # -----------------------------
+    # Queue operations
+    # -----------------------------
+    def add(self, entries, max_urls=None):
+        """
+        Queue (url, page_name, depth, priority) tuples; known URLs are ignored.
+        Returns how many were queued. With max_urls, the table never grows
+        past it (URLs suppressed as crawl traps count, as they do in SeenUrls).
+        """
+        added = new = 0
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            total = self.db.execute("SELECT value FROM counters WHERE name = 'urls'").fetchone()[0]
+            for url, page_name, depth, priority in entries:
+                if max_urls and total + new >= max_urls:
+                    break
+                if self.db.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone():
+                    continue
+                state = "queued"
+                if self.traps is not None and not self.traps.admit(url, depth):
+                    state = "suppressed"
+
+                host = host_of(url)
+                self.db.execute(
+                    "INSERT INTO urls (url, page_name, depth, priority, host, state) VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, page_name, depth, priority, host, state),
+                )
+                self.db.execute("INSERT OR IGNORE INTO hosts (host) VALUES (?)", (host,))
+                new += 1
+                if state == "queued":
+                    added += 1
+            self.db.execute("UPDATE counters SET value = ? WHERE name = 'urls'", (total + new,))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return added
+
+    def _claimable(self, host, now, limit):
+        """Best claimable rows of one host: (priority, id, url, page_name, depth)."""
+        queued = self.db.execute(
+            "SELECT priority, id, url, page_name, depth FROM urls "
+            "WHERE host = ? AND state = 'queued' ORDER BY priority, id LIMIT ?",
+            (host, limit),
+        ).fetchall()
+        expired = self.db.execute(
+            "SELECT priority, id, url, page_name, depth FROM urls "
+            "WHERE host = ? AND state = 'leased' AND lease_expires < ? ORDER BY priority, id LIMIT ?",
+            (host, now, limit),
+        ).fetchall()
+        return sorted(queued + expired)[:limit]
+
+    def claim(self, owner, n=1):
+        """
+        Lease up to n URLs (queued, or leased with an expired lease) in
+        priority order, from hosts that politeness allows right now.
+        Returns [(url, page_name, depth)].
+        """
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            # expired leases that used up their attempts are given up on
+            self.db.execute(
+                "UPDATE urls SET state = 'failed' "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, MAX_ATTEMPTS),
+            )
+            candidates = []
+            ready = self.db.execute(
+                "SELECT host, COALESCE(delay, ?) FROM hosts WHERE next_allowed <= ?", (self.delay, now)
+            ).fetchall()
+            for host, delay in ready:
+                inflight = self.db.execute(
+                    "SELECT COUNT(*) FROM urls WHERE host = ? AND state = 'leased' AND lease_expires >= ?",
+                    (host, now),
+                ).fetchone()[0]
+                # with a delay, the next request of this host waits for it anyway
+                room = min(self.max_inflight - inflight, 1 if delay > 0 else n)
+                if room > 0:
+                    candidates += [(row, host, delay) for row in self._claimable(host, now, room)]
+
+            candidates.sort()
+            taken = candidates[:n]
+            self.db.executemany(
+                "UPDATE urls SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(owner, now + self.lease_seconds, row[1]) for row, _, _ in taken],
+            )
+            # spacing also applies between requests that overlap in flight
+            self.db.executemany(
+                "UPDATE hosts SET next_allowed = ? WHERE host = ?",
+                {(now + delay, host) for _, host, delay in taken},
+            )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return [(url, page_name, depth) for (_, _, url, page_name, depth), _, _ in taken]
+
+    def seconds_until_ready(self):
+        """How long until some host with queued URLs may get its next request (0 = now)."""
+        row = self.db.execute(
+            "SELECT MIN(next_allowed) FROM hosts h "
+            "WHERE EXISTS (SELECT 1 FROM urls u WHERE u.host = h.host AND u.state = 'queued')"
+        ).fetchone()
+        return max(row[0] - time.time(), 0) if row[0] is not None else 0
+
+    def complete(self, url, owner):
+        """
+        Mark a leased URL done; its host's next request waits `delay` from
+        now. False if the lease was lost to another worker.
+        """
+        now = time.time()
+        with self.db:
+            cur = self.db.execute(
+                "UPDATE urls SET state = 'done', lease_owner = NULL, lease_expires = NULL "
+                "WHERE url = ? AND state = 'leased' AND lease_owner = ?",
+                (url, owner),
+            )
+            if cur.rowcount == 1:
+                self.db.execute(
+                    "UPDATE hosts SET next_allowed = MAX(next_allowed, ? + COALESCE(delay, ?)) "
+                    "WHERE host = (SELECT host FROM urls WHERE url = ?)",
+                    (now, self.delay, url),
+                )
+        return cur.rowcount == 1
+
+    def record_page(self, url, digest):
+        """Report a fetched page's text digest (crawl_traps.page_text_digest) to the trap detector."""
+        if self.traps is None:
+            return
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.traps.record_page(url, digest)
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def is_finished(self):
+        """True once nothing is queued and no lease is still live."""
+        row = self.db.execute(
+            "SELECT COUNT(*) FROM urls WHERE state = 'queued' "
+            "OR (state = 'leased' AND (lease_expires >= ? OR attempts < ?))",
+            (time.time(), MAX_ATTEMPTS),
+        ).fetchone()
+        return row[0] == 0
+
+    def stats(self):
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+
+    def url_count(self):
+        return self.db.execute("SELECT value FROM counters WHERE name = 'urls'").fetchone()[0]
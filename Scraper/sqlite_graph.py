@@ -0,0 +1,473 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+GRAPH_FILE = "Output_Graph_Json/dom_graph.json"      # ← change as needed
+GRAPH_DB = "Output_Graph_Json/dom_graph.sqlite"
+
+CACHE_MB = 64            # SQLite page cache per connection
+BATCH = 500              # node IDs per IN (...) query
+TREE_RELATIONS = ("CONTAINS", "CONTAINS_DATA")
+
+# attributes copied into their own (indexed) columns; all of them stay in attrs too
+INDEXED_ATTRS = ("type", "page", "xpath")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id        INTEGER PRIMARY KEY,   -- insertion order = networkx node order
+    node      TEXT NOT NULL UNIQUE,
+    type      TEXT,
+    page      TEXT,
+    xpath     TEXT,
+    attrs     TEXT NOT NULL          -- JSON, every attribute
+);
+CREATE TABLE IF NOT EXISTS edges (
+    id        INTEGER PRIMARY KEY,   -- insertion order = networkx edge order
+    src       INTEGER NOT NULL,      -- nodes.id
+    dst       INTEGER NOT NULL,
+    relation  TEXT,
+    key       INTEGER NOT NULL,
+    attrs     TEXT NOT NULL          -- JSON, every attribute (relation included)
+);
+CREATE INDEX IF NOT EXISTS edges_src ON edges (src, relation);
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst, relation);
+CREATE INDEX IF NOT EXISTS nodes_type ON nodes (type);
+CREATE INDEX IF NOT EXISTS nodes_page ON nodes (page);
+CREATE INDEX IF NOT EXISTS nodes_xpath ON nodes (xpath);
+"""
+
+
+# ============================================================
+# 2. STORE
+# ============================================================
+
+class SqliteGraph:
+    """
+    A MultiDiGraph on disk. Every read is an indexed query that loads only
+    the rows it returns, so memory does not grow with the graph, and WAL
+    mode lets any number of processes read while one writes.
+
+    Beyond the networkx-style reads at the bottom (G.nodes[n], in_edges,
+    out_edges, predecessors, successors, ...), which let code such as
+    Embedding/embed_graph.get_context_text run on it unchanged, it answers
+    subtree, ancestor, neighborhood and attribute queries in SQL.
+    """
+
+    def __init__(self, path=GRAPH_DB, readonly=False, cache_mb=CACHE_MB):
+        self.path = path
+        if readonly:
+            self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(path)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA cache_size=-{cache_mb * 1024}")
+        self.nodes = NodeView(self)
+        self.edges = EdgeView(self)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM edges")
+            self.db.execute("DELETE FROM nodes")
+
+    def _insert_node(self, node, attrs):
+        cur = self.db.execute(
+            "INSERT OR IGNORE INTO nodes (node, type, page, xpath, attrs) VALUES (?, ?, ?, ?, ?)",
+            (node, *(attrs.get(k) for k in INDEXED_ATTRS), json.dumps(attrs)),
+        )
+        return cur.rowcount == 1
+
+    def _update_node(self, node, attrs):
+        self.db.execute(
+            "UPDATE nodes SET type = ?, page = ?, xpath = ?, attrs = ? WHERE node = ?",
+            (*(attrs.get(k) for k in INDEXED_ATTRS), json.dumps(attrs), node),
+        )
+
+    def add_node(self, node, **attrs):
+        """Like networkx: new attributes are merged into an existing node's."""
+        if not self._insert_node(node, attrs):
+            self._update_node(node, {**self.nodes[node], **attrs})
+
+    def add_edges(self, edges):
+        """(source, target, key, attrs) tuples; missing endpoints are added as bare nodes."""
+        rows = []
+        for u, v, key, attrs in edges:
+            ends = []
+            for node in (u, v):
+                self._insert_node(node, {})
+                ends.append(self._row(node))
+            rows.append((*ends, attrs.get("relation"), key, json.dumps(attrs)))
+        self.db.executemany("INSERT INTO edges (src, dst, relation, key, attrs) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def add_page_subgraph(self, graph_data):
+        """
+        Merge one dom_graph_parser.page_subgraph into the store, with the
+        semantics of parser.merge_page_subgraph: shared External_Page nodes
+        keep the attributes they were first seen with, other nodes take the
+        new ones. Call inside `with store.db:` to batch the commit.
+        """
+        edges_key = "links" if "links" in graph_data else "edges"
+        for node in graph_data["nodes"]:
+            attrs = {k: v for k, v in node.items() if k != "id"}
+            if self._insert_node(node["id"], attrs):
+                continue
+            old = self.nodes[node["id"]]
+            merged = {**attrs, **old} if attrs.get("type") == "External_Page" else {**old, **attrs}
+            self._update_node(node["id"], merged)
+
+        self.add_edges(
+            (e["source"], e["target"], e.get("key", 0),
+             {k: v for k, v in e.items() if k not in ("source", "target", "key")})
+            for e in graph_data[edges_key]
+        )
+
+    def import_graph(self, graph):
+        """Replace the contents with a networkx graph or node-link data, in one transaction."""
+        if isinstance(graph, dict):
+            nodes = ((n["id"], {k: v for k, v in n.items() if k != "id"}) for n in graph["nodes"])
+            links = graph["links"] if "links" in graph else graph["edges"]
+            edges = ((e["source"], e["target"], e.get("key", 0),
+                      {k: v for k, v in e.items() if k not in ("source", "target", "key")}) for e in links)
+        else:
+            nodes = graph.nodes(data=True)
+            edges = graph.edges(keys=True, data=True)
+
+        with self.db:
+            self.db.execute("DELETE FROM edges")
+            self.db.execute("DELETE FROM nodes")
+            self.db.executemany(
+                "INSERT INTO nodes (node, type, page, xpath, attrs) VALUES (?, ?, ?, ?, ?)",
+                ((n, *(a.get(k) for k in INDEXED_ATTRS), json.dumps(a)) for n, a in nodes),
+            )
+            self.add_edges(edges)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _row(self, node):
+        row = self.db.execute("SELECT id FROM nodes WHERE node = ?", (node,)).fetchone()
+        if row is None:
+            raise KeyError(node)
+        return row[0]
+
+    def find_nodes(self, **conditions):
+        """
+        (node, attrs) of every node whose attributes equal the given values,
+        e.g. find_nodes(type="Page_File") or find_nodes(page="faq.html", tag="h2").
+        type / page / xpath use their indexes; other attributes are checked
+        inside the JSON (so combine them with an indexed one on big graphs).
+        """
+        where, params = [], []
+        for k, v in conditions.items():
+            where.append(f"{k} = ?" if k in INDEXED_ATTRS else "json_extract(attrs, ?) = ?")
+            params.extend([v] if k in INDEXED_ATTRS else [f"$.{k}", v])
+        sql = "SELECT node, attrs FROM nodes" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id"
+        for node, attrs in self.db.execute(sql, params):
+            yield node, json.loads(attrs)
+
+    def subtree(self, node, relations=TREE_RELATIONS, max_depth=None):
+        """[(descendant, depth)] below node over the given relations, breadth first, in edge order."""
+        marks = ",".join("?" * len(relations))
+        rows = self.db.execute(f"""
+            WITH RECURSIVE sub(id, depth, path) AS (
+                SELECT id, 0, '' FROM nodes WHERE node = ?
+                UNION ALL
+                SELECT e.dst, sub.depth + 1, sub.path || printf('%012d', e.id)
+                FROM sub JOIN edges e ON e.src = sub.id AND e.relation IN ({marks})
+                WHERE ? IS NULL OR sub.depth < ?
+            )
+            SELECT n.node, sub.depth FROM sub JOIN nodes n ON n.id = sub.id
+            WHERE sub.depth > 0 ORDER BY sub.depth, sub.path
+        """, (node, *relations, max_depth, max_depth))
+        return rows.fetchall()
+
+    def ancestors(self, node, relations=TREE_RELATIONS):
+        """[(ancestor, distance)] up the tree relations, nearest first."""
+        marks = ",".join("?" * len(relations))
+        rows = self.db.execute(f"""
+            WITH RECURSIVE up(id, distance) AS (
+                SELECT id, 0 FROM nodes WHERE node = ?
+                UNION
+                SELECT e.src, up.distance + 1
+                FROM up JOIN edges e ON e.dst = up.id AND e.relation IN ({marks})
+            )
+            SELECT n.node, MIN(up.distance) FROM up JOIN nodes n ON n.id = up.id
+            WHERE up.distance > 0 GROUP BY up.id ORDER BY 2
+        """, (node, *relations))
+        return rows.fetchall()
+
+    def neighborhood(self, node, radius=1, relations=None, direction="both"):
+        """
+        {node: hops} for everything within `radius` hops of node, following
+        edges out, in or both ways, optionally only the given relations.
+        One indexed query per BATCH nodes of each ring.
+        """
+        rel_sql = ""
+        if relations:
+            rel_sql = " AND e.relation IN (" + ",".join("?" * len(relations)) + ")"
+        queries = []
+        if direction in ("out", "both"):
+            queries.append(("e.src", "e.dst"))
+        if direction in ("in", "both"):
+            queries.append(("e.dst", "e.src"))
+
+        start = self._row(node)
+        hops = {start: 0}
+        ring = [start]
+        for distance in range(1, radius + 1):
+            found = []
+            for i in range(0, len(ring), BATCH):
+                batch = ring[i:i + BATCH]
+                marks = ",".join("?" * len(batch))
+                for here, there in queries:
+                    sql = f"SELECT {there} FROM edges e WHERE {here} IN ({marks}){rel_sql}"
+                    for (other,) in self.db.execute(sql, (*batch, *(relations or ()))):
+                        if other not in hops:
+                            hops[other] = distance
+                            found.append(other)
+            ring = found
+
+        names = {}
+        rows = list(hops)
+        for i in range(0, len(rows), BATCH):
+            batch = rows[i:i + BATCH]
+            sql = f"SELECT id, node FROM nodes WHERE id IN ({','.join('?' * len(batch))})"
+            names.update(self.db.execute(sql, batch))
+        return {names[r]: d for r, d in hops.items()}
+
+    def subgraph(self, nodes):
+        """The induced subgraph on `nodes` as an in-memory nx.MultiDiGraph (e.g. for a visualizer)."""
+        import networkx as nx
+        H = nx.MultiDiGraph()
+        rows = {}
+        nodes = list(nodes)
+        for i in range(0, len(nodes), BATCH):
+            batch = nodes[i:i + BATCH]
+            sql = f"SELECT id, node, attrs FROM nodes WHERE node IN ({','.join('?' * len(batch))}) ORDER BY id"
+            for row_id, node, attrs in self.db.execute(sql, batch):
+                rows[row_id] = node
+        for row_id in sorted(rows):
+            H.add_node(rows[row_id], **self.nodes[rows[row_id]])
+
+        ids = sorted(rows)
+        for i in range(0, len(ids), BATCH):
+            batch = ids[i:i + BATCH]
+            sql = f"SELECT src, dst, key, attrs FROM edges WHERE src IN ({','.join('?' * len(batch))}) ORDER BY id"
+            for src, dst, key, attrs in self.db.execute(sql, batch):
+                if dst in rows:
+                    H.add_edge(rows[src], rows[dst], key=key, **json.loads(attrs))
+        return H
+
+    def neighborhood_graph(self, node, radius=1, relations=None, direction="both"):
+        return self.subgraph(self.neighborhood(node, radius, relations, direction))
+
+    # -----------------------------
+    # networkx-compatible reads
+    # -----------------------------
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.nodes
+
+    def has_node(self, node):
+        return node in self.nodes
+
+    def number_of_nodes(self):
+        return self.db.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def number_of_edges(self):
+        return self.db.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def is_directed(self):
+        return True
+
+    def is_multigraph(self):
+        return True
+
+    def _edges(self, end, nbunch, data, keys, default):
+        """Edges by source (end="src") or target (end="dst"), in insertion order."""
+        sql = """
+            SELECT s.node, t.node, e.key, e.relation, e.attrs
+            FROM edges e JOIN nodes s ON s.id = e.src JOIN nodes t ON t.id = e.dst
+        """
+        if nbunch is None:
+            rows = self.db.execute(sql + " ORDER BY e.src, e.id" if end == "src" else sql + " ORDER BY e.dst, e.id")
+        elif isinstance(nbunch, str):
+            rows = self.db.execute(sql + f" WHERE e.{end} = (SELECT id FROM nodes WHERE node = ?) ORDER BY e.id",
+                                   (nbunch,))
+        else:
+            for node in nbunch:
+                yield from self._edges(end, node, data, keys, default)
+            return
+
+        for u, v, key, relation, attrs in rows:
+            out = (u, v, key) if keys else (u, v)
+            if data is True:
+                out += (json.loads(attrs),)
+            elif data == "relation":
+                out += (default if relation is None else relation,)
+            elif data is not False:
+                out += (json.loads(attrs).get(data, default),)
+            yield out
+
+    def out_edges(self, nbunch=None, data=False, keys=False, default=None):
+        return self._edges("src", nbunch, data, keys, default)
+
+    def in_edges(self, nbunch=None, data=False, keys=False, default=None):
+        return self._edges("dst", nbunch, data, keys, default)
+
+    def successors(self, node):
+        self._row(node)
+        return (v for v, in self.db.execute("""
+            SELECT t.node FROM edges e JOIN nodes t ON t.id = e.dst
+            WHERE e.src = (SELECT id FROM nodes WHERE node = ?) GROUP BY e.dst ORDER BY MIN(e.id)
+        """, (node,)))
+
+    def predecessors(self, node):
+        self._row(node)
+        return (u for u, in self.db.execute("""
+            SELECT s.node FROM edges e JOIN nodes s ON s.id = e.src
+            WHERE e.dst = (SELECT id FROM nodes WHERE node = ?) GROUP BY e.src ORDER BY MIN(e.id)
+        """, (node,)))
+
+    neighbors = successors
+
+    def get_edge_data(self, u, v, key=None, default=None):
+        rows = self.db.execute("""
+            SELECT e.key, e.attrs FROM edges e
+            WHERE e.src = (SELECT id FROM nodes WHERE node = ?) AND e.dst = (SELECT id FROM nodes WHERE node = ?)
+            ORDER BY e.id
+        """, (u, v)).fetchall()
+        found = {k: json.loads(attrs) for k, attrs in rows}
+        if key is not None:
+            return found.get(key, default)
+        return found or default
+
+
+class NodeView:
+    """G.nodes: G.nodes[n], G.nodes(data=...), n in G.nodes, G.nodes.get(n), len, iteration."""
+
+    def __init__(self, graph):
+        self._db = graph.db
+
+    def __call__(self, data=False, default=None):
+        if data is False:
+            return self
+        return self._data(data, default)
+
+    def _data(self, data, default):
+        if data is True:
+            for node, attrs in self._db.execute("SELECT node, attrs FROM nodes ORDER BY id"):
+                yield node, json.loads(attrs)
+        elif data in INDEXED_ATTRS:
+            for node, value in self._db.execute(f"SELECT node, {data} FROM nodes ORDER BY id"):
+                yield node, default if value is None else value
+        else:
+            for node, attrs in self._db.execute("SELECT node, attrs FROM nodes ORDER BY id"):
+                yield node, json.loads(attrs).get(data, default)
+
+    def __getitem__(self, node):
+        row = self._db.execute("SELECT attrs FROM nodes WHERE node = ?", (node,)).fetchone()
+        if row is None:
+            raise KeyError(node)
+        return json.loads(row[0])
+
+    def get(self, node, default=None):
+        try:
+            return self[node]
+        except KeyError:
+            return default
+
+    def __contains__(self, node):
+        return self._db.execute("SELECT 1 FROM nodes WHERE node = ?", (node,)).fetchone() is not None
+
+    def __iter__(self):
+        return (node for node, in self._db.execute("SELECT node FROM nodes ORDER BY id"))
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+
+class EdgeView:
+    """G.edges: G.edges(nbunch, data=..., keys=...), len, iteration over (u, v, key)."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, nbunch=None, data=False, keys=False, default=None):
+        return self._graph.out_edges(nbunch, data=data, keys=keys, default=default)
+
+    def __iter__(self):
+        return self._graph.out_edges(keys=True)
+
+    def __len__(self):
+        return self._graph.number_of_edges()
+
+
+# ============================================================
+# 3. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Store a DOM graph in SQLite and query it.")
+    arg_parser.add_argument("graph", nargs="?", default=GRAPH_FILE,
+                            help="node-link JSON to import, or an existing .sqlite store to query")
+    arg_parser.add_argument("-o", "--output", default=GRAPH_DB, help="store to import into")
+    arg_parser.add_argument("--subtree", metavar="NODE")
+    arg_parser.add_argument("--ancestors", metavar="NODE")
+    arg_parser.add_argument("--neighborhood", metavar="NODE")
+    arg_parser.add_argument("--radius", type=int, default=1)
+    arg_parser.add_argument("--find", nargs="+", metavar="ATTR=VALUE")
+    args = arg_parser.parse_args(argv)
+
+    if args.graph.endswith(".sqlite"):
+        G = SqliteGraph(args.graph, readonly=True)
+    else:
+        with open(args.graph, "r", encoding="utf-8") as f:
+            graph_data = json.load(f)
+        started = time.perf_counter()
+        G = SqliteGraph(args.output)
+        G.import_graph(graph_data)
+        print(f"Imported {G.number_of_nodes()} nodes, {G.number_of_edges()} edges into {args.output} "
+              f"in {time.perf_counter() - started:.2f}s")
+
+    if args.subtree:
+        for node, depth in G.subtree(args.subtree):
+            print("  " * depth + node)
+    if args.ancestors:
+        for node, distance in G.ancestors(args.ancestors):
+            print(f"{distance}  {node}")
+    if args.neighborhood:
+        hops = G.neighborhood(args.neighborhood, args.radius)
+        for node, d in sorted(hops.items(), key=lambda item: (item[1], item[0])):
+            print(f"{d}  {node}")
+    if args.find:
+        conditions = dict(c.split("=", 1) for c in args.find)
+        for node, attrs in G.find_nodes(**conditions):
+            print(node, (attrs.get("text_snippet") or attrs.get("title") or "")[:80])
+    G.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
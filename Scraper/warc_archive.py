@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import base64
+import hashlib
+from datetime import datetime, timezone
+from http.client import responses as HTTP_REASONS
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+WARC_FILE = "Output_Archive/crawl.warc.gz"    # ← change as needed
+INDEX_SUFFIX = ".idx"                         # offset index next to the archive
+READ_CHUNK = 1 << 16
+
+# Headers describing the transfer, not the (already decoded) body we store
+TRANSFER_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+def warc_date(ts=None):
+    return datetime.fromtimestamp(ts or time.time(), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def block_digest(block):
+    return "sha1:" + base64.b32encode(hashlib.sha1(block).digest()).decode("ascii")
+
+
+# ============================================================
+# 2. WRITING
+# ============================================================
+
+class WarcWriter:
+    """
+    Appends fetched responses to a WARC/1.1 file, one gzip member per record
+    so every record can be read on its own from its offset. Each record also
+    gets a line in the offset index: {"url", "offset", "length", "status", "date"}.
+
+    Bodies are stored as the crawler saw them (decompressed by aiohttp), so
+    Content-Encoding / Content-Length are rewritten to match.
+    """
+
+    def __init__(self, path=WARC_FILE, info=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.warc = open(path, "ab")
+        self.index = open(path + INDEX_SUFFIX, "a", encoding="utf-8")
+        fields = "".join(f"{k}: {v}\r\n" for k, v in (info or {}).items())
+        self._write("warcinfo", None, "application/warc-fields", fields.encode("utf-8"), {})
+
+    def close(self):
+        self.warc.close()
+        self.index.close()
+
+    def _write(self, warc_type, url, content_type, block, extra):
+        headers = {
+            "WARC-Type": warc_type,
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "WARC-Date": warc_date(),
+        }
+        if url:
+            headers["WARC-Target-URI"] = url
+        headers.update(extra)
+        headers["WARC-Block-Digest"] = block_digest(block)
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(len(block))
+
+        raw = (
+            b"WARC/1.1\r\n"
+            + "".join(f"{k}: {v}\r\n" for k, v in headers.items()).encode("utf-8")
+            + b"\r\n" + block + b"\r\n\r\n"
+        )
+        packer = zlib.compressobj(6, zlib.DEFLATED, 31)   # 31 = gzip container
+        member = packer.compress(raw) + packer.flush()
+
+        offset = self.warc.tell()
+        self.warc.write(member)
+        self.warc.flush()
+        return offset, len(member), headers["WARC-Date"]
+
+    def write_response(self, record, depth=None, revalidated=False):
+        """
+        Archive one http_crawler.fetch_page record (network errors have
+        nothing to archive). revalidated=True marks a cached response the
+        server just confirmed with a 304.
+        """
+        if record["status"] is None:
+            return
+
+        status = record["status"]
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}".rstrip()]
+        for k, v in record["headers"].items():
+            if k.lower() not in TRANSFER_HEADERS:
+                lines.append(f"{k}: {v}")
+        lines.append(f"Content-Length: {len(record['body'])}")
+        block = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + record["body"]
+
+        extra = {}
+        if record["final_url"] != record["url"]:
+            extra["WARC-Final-URI"] = record["final_url"]   # after redirects (extension field)
+        if depth is not None:
+            extra["WARC-Crawl-Depth"] = str(depth)          # extension field, for replay
+        if revalidated:
+            extra["WARC-Revalidated"] = "304"               # extension field: body from the HTTP cache
+
+        offset, length, date = self._write(
+            "response", record["url"], "application/http;msgtype=response", block, extra,
+        )
+        self.index.write(json.dumps({
+            "url": record["url"], "offset": offset, "length": length, "status": status, "date": date,
+        }) + "\n")
+        self.index.flush()
+
+
+# ============================================================
+# 3. READING
+# ============================================================
+
+def parse_record(raw):
+    """One decompressed WARC record → (WARC headers, block)."""
+    head, _, rest = raw.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.split(b"\r\n")[1:]:
+        k, _, v = line.decode("utf-8").partition(":")
+        headers[k.strip()] = v.strip()
+    length = int(headers.get("Content-Length", len(rest)))
+    return headers, rest[:length]
+
+
+def response_record(warc_headers, block):
+    """A WARC response → the record shape of http_crawler.fetch_page."""
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    http_headers = {}
+    for line in lines[1:]:
+        k, _, v = line.partition(":")
+        http_headers[k.strip().lower()] = v.strip()
+
+    url = warc_headers["WARC-Target-URI"]
+    depth = warc_headers.get("WARC-Crawl-Depth")
+    return {
+        "url": url,
+        "final_url": warc_headers.get("WARC-Final-URI", url),
+        "status": status,
+        "headers": http_headers,
+        "body": body,
+        "fetch_ms": 0.0,
+        "error": None,
+        "crawl_depth": int(depth) if depth is not None else None,
+    }
+
+
+def read_response(f, offset, length):
+    """The response record at (offset, length) of an open archive, as a fetch_page record."""
+    f.seek(offset)
+    headers, block = parse_record(zlib.decompress(f.read(length), 31))
+    return response_record(headers, block)
+
+
+class WarcReader:
+    """Random access by URL through the offset index, plus a sequential scan."""
+
+    def __init__(self, path=WARC_FILE):
+        self.path = path
+        self.warc = open(path, "rb")
+        self.offsets = {}   # url -> (offset, length) of its latest response
+        index_path = path + INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            rebuild_index(path)
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self.offsets[entry["url"]] = (entry["offset"], entry["length"])
+
+    def close(self):
+        self.warc.close()
+
+    def __contains__(self, url):
+        return url in self.offsets
+
+    def get(self, url):
+        """Latest archived response for url as a fetch_page record, or None."""
+        if url not in self.offsets:
+            return None
+        offset, length = self.offsets[url]
+        return read_response(self.warc, offset, length)
+
+    def latest_offsets(self):
+        """(url, offset, length) of every URL's latest response, in archive order."""
+        return sorted(((url, offset, length) for url, (offset, length) in self.offsets.items()),
+                      key=lambda entry: entry[1])
+
+    def latest_responses(self):
+        """Every URL's latest response, in archive order (sequential reads, one at a time)."""
+        for _, offset, length in self.latest_offsets():
+            yield read_response(self.warc, offset, length)
+
+
+def iter_members(path):
+    """(offset, length, decompressed record) for every gzip member, without an index."""
+    with open(path, "rb") as f:
+        offset = 0
+        pending = b""
+        while True:
+            unpacker = zlib.decompressobj(31)
+            out = []
+            consumed = 0
+            data = pending
+            while not unpacker.eof:
+                if not data:
+                    data = f.read(READ_CHUNK)
+                    if not data:
+                        return
+                out.append(unpacker.decompress(data))
+                consumed += len(data) - len(unpacker.unused_data)
+                data = b""
+            pending = unpacker.unused_data
+            yield offset, consumed, b"".join(out)
+            offset += consumed
+
+
+def rebuild_index(path):
+    """Recreate the offset index by scanning the archive (e.g. after copying only the .warc.gz)."""
+    with open(path + INDEX_SUFFIX, "w", encoding="utf-8") as index:
+        for offset, length, raw in iter_members(path):
+            headers, block = parse_record(raw)
+            if headers.get("WARC-Type") != "response":
+                continue
+            status = int(block.split(b"\r\n", 1)[0].split()[1])
+            index.write(json.dumps({
+                "url": headers["WARC-Target-URI"], "offset": offset, "length": length,
+                "status": status, "date": headers.get("WARC-Date"),
+            }) + "\n")
@@ -0,0 +1,131 @@
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import dom_graph_parser as parser
+import http_crawler as crawler
+from crawl_pipeline import init_parse_worker, parse_job
+from warc_archive import WarcReader, WARC_FILE, read_response, rebuild_index
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+JOBS_PER_WORKER = 4     # pages submitted to the parse pool but not merged yet, per process
+
+replay_archive = None   # the archive, opened once per parse process (init_replay_worker)
+
+
+def init_replay_worker(path, start_url, base_url):
+    global replay_archive
+    init_parse_worker(start_url, base_url)
+    replay_archive = open(path, "rb")
+
+
+def replay_job(page_name, url, offset, length, base_url):
+    """Read one archived response and parse it → (depth, page subgraph, link targets, links)."""
+    record = read_response(replay_archive, offset, length)
+    depth = record.pop("crawl_depth")
+    return (depth,) + parse_job(page_name, url, record, depth, base_url)
+
+
+# ============================================================
+# 2. REPLAY INTO THE GRAPH BUILDER
+# ============================================================
+
+def replay(path=WARC_FILE, start_url=None, parse_workers=0):
+    """
+    Build parser.G from an archive instead of the network: every archived
+    page under start_url's directory, parsed exactly as http_crawler would
+    (same page names, links, fetch metadata and click depth). No network
+    access; with parse_workers the parsing runs in a process pool.
+
+    Only the offset index is read up front. Each response body is read when
+    its page is parsed, and at most JOBS_PER_WORKER pages per process are
+    in the pool at once, so memory does not grow with the archive.
+    Returns {page name: click depth}.
+    """
+    reader = WarcReader(path)
+    try:
+        entries = reader.latest_offsets()
+
+        if start_url is None:
+            start_url = entries[0][0] if entries else crawler.START_URL
+        base_url = crawler.base_of(start_url)
+
+        init_parse_worker(start_url, base_url)
+
+        jobs = []
+        for url, offset, length in entries:
+            if not url.startswith(base_url) or not crawler.looks_like_page(url):
+                continue
+            page_name = crawler.url_to_page_name(url, base_url)
+            if base_url + page_name != url:
+                crawler.page_urls.setdefault(page_name, url)
+            jobs.append((page_name, url, offset, length))
+
+        depths = {}
+        if parse_workers:
+            with ProcessPoolExecutor(parse_workers, initializer=init_replay_worker,
+                                     initargs=(path, start_url, base_url)) as pool:
+                pending = deque()
+
+                def merge_oldest():
+                    page_name, future = pending.popleft()
+                    depth, graph, _, links = future.result()
+                    parser.merge_page_subgraph(graph)
+                    crawler.page_urls.update(links)
+                    depths[page_name] = depth
+
+                # results are merged in archive order, as the in-process replay does
+                for job in jobs:
+                    if len(pending) >= parse_workers * JOBS_PER_WORKER:
+                        merge_oldest()
+                    pending.append((job[0], pool.submit(replay_job, *job, base_url)))
+                while pending:
+                    merge_oldest()
+        else:
+            for page_name, url, offset, length in jobs:
+                record = read_response(reader.warc, offset, length)
+                depths[page_name] = record.pop("crawl_depth")
+                crawler.record_page(page_name, record, depths[page_name])
+    finally:
+        reader.close()
+
+    return depths
+
+
+# ============================================================
+# 3. MAIN
+# ============================================================
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Rebuild a DOM graph from a WARC archive (no network).")
+    arg_parser.add_argument("archive", nargs="?", default=WARC_FILE)
+    arg_parser.add_argument("--start-url", help="crawl root (default: first archived URL)")
+    arg_parser.add_argument("--parse-workers", type=int, default=0, help="parser processes (0 = in-process)")
+    arg_parser.add_argument("--rebuild-index", action="store_true", help="rescan the archive for offsets first")
+    arg_parser.add_argument("-o", "--output", default=parser.OUTPUT_FILE)
+    args = arg_parser.parse_args(argv)
+
+    if args.rebuild_index:
+        rebuild_index(args.archive)
+
+    started = time.perf_counter()
+    depths = replay(args.archive, args.start_url, args.parse_workers)
+    took = time.perf_counter() - started
+
+    parser.export_graph(args.output)
+
+    print("--- DOM Graph Replayed ---")
+    print(f"Pages: {len(depths)} in {took:.2f}s from {args.archive}")
+    print("Nodes:", len(parser.G.nodes))
+    print("Edges:", len(parser.G.edges))
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
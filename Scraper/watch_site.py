@@ -0,0 +1,191 @@
+import os
+import json
+import time
+
+import dom_graph_parser as parser
+
+
+# ============================================================
+# 1. SETUP
+# ============================================================
+
+ROOT_DIR = parser.ROOT_DIR
+OUTPUT_FILE = parser.OUTPUT_FILE
+SHARD_DIR = "Output_Graph_Json/pages"    # one <page>.json per page, rewritten on change
+
+POLL_INTERVAL = 0.2          # seconds between directory scans
+DEBOUNCE = 0.3               # wait until the directory is quiet this long
+COMBINED_EXPORT_INTERVAL = 0.3   # full dom_graph.json is rewritten at most this often
+
+file_contents = {}   # filename -> last parsed content (re-parsed when a link target changes)
+
+
+# ============================================================
+# 2. DIRECTORY SNAPSHOTS
+# ============================================================
+
+def snapshot(root_dir=ROOT_DIR):
+    """Cheap per-file signature {filename: (mtime_ns, size)} for all .html files."""
+    snap = {}
+    with os.scandir(root_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".html") and entry.is_file():
+                st = entry.stat()
+                snap[entry.name] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def diff_snapshots(old, new):
+    """Return (added, changed, deleted) filename sets between two snapshots."""
+    added = new.keys() - old.keys()
+    deleted = old.keys() - new.keys()
+    changed = {f for f in new.keys() & old.keys() if new[f] != old[f]}
+    return added, changed, deleted
+
+
+# ============================================================
+# 3. INCREMENTAL UPDATES
+# ============================================================
+
+def shard_path(filename):
+    return os.path.join(SHARD_DIR, filename + ".json")
+
+
+def write_shard(filename):
+    with open(shard_path(filename), "w", encoding="utf-8") as f:
+        json.dump(parser.page_subgraph(filename), f, indent=4)
+
+
+def read_page(root_dir, filename):
+    """The page's HTML, or None if the file vanished since the last poll."""
+    try:
+        return parser.read_html_file(os.path.join(root_dir, filename))
+    except FileNotFoundError:
+        return None
+
+
+def linking_pages(filename):
+    """Pages whose tree has a LINKS_TO_PAGE edge to filename."""
+    if filename not in parser.G:
+        return set()
+    return {
+        parser.G.nodes[u].get("page", u)
+        for u, _, rel in parser.G.in_edges(filename, data="relation")
+        if rel == "LINKS_TO_PAGE"
+    }
+
+
+def apply_changes(root_dir, added, changed, deleted):
+    """
+    Re-parse only what the change touches:
+      - deleted pages are removed, and the pages that linked to them are
+        re-parsed so their shards stop pointing at them
+      - changed/added pages are re-parsed in place (one that vanished
+        before it could be read counts as deleted)
+      - pages with a dangling link to a newly added filename (the parser's
+        dangling_links) are re-parsed too, since their links to it only
+        become LINKS_TO_PAGE edges once it exists
+    """
+    deleted = set(deleted)
+    contents = {}
+    for filename in sorted(set(added) | set(changed)):
+        content = read_page(root_dir, filename)
+        if content is None:
+            deleted.add(filename)
+        else:
+            contents[filename] = content
+    added = {f for f in added if f in contents}
+
+    referrers = set()
+    for filename in deleted:
+        referrers |= linking_pages(filename)
+        parser.remove_page(filename)
+        parser.all_known_pages.discard(filename)
+        file_contents.pop(filename, None)
+        if os.path.exists(shard_path(filename)):
+            os.remove(shard_path(filename))
+
+    parser.all_known_pages.update(added)
+    file_contents.update(contents)
+
+    for filename in added:
+        referrers |= parser.dangling_links.get(filename, set())
+    referrers = (referrers - deleted) & file_contents.keys()
+
+    for filename in sorted(contents.keys() | referrers):
+        parser.remove_page(filename, keep_page_node=True)
+        parser.add_page(filename, file_contents[filename])
+        write_shard(filename)
+
+    return referrers - contents.keys()
+
+
+# ============================================================
+# 4. WATCH LOOP
+# ============================================================
+
+def initial_build(root_dir=ROOT_DIR):
+    file_contents.update(parser.load_site_files(root_dir))
+    parser.all_known_pages.update(file_contents.keys())
+    parser.set_site_scope(root_dir)
+
+    for filename, content in file_contents.items():
+        parser.add_page(filename, content)
+
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    for filename in file_contents:
+        write_shard(filename)
+
+    parser.export_graph(OUTPUT_FILE)
+    print(f"Initial build: {len(parser.G.nodes)} nodes, {len(parser.G.edges)} edges")
+
+
+def watch(root_dir=ROOT_DIR):
+    """Poll root_dir, debounce bursts of edits, apply them incrementally."""
+    initial_build(root_dir)
+
+    applied = snapshot(root_dir)   # state the in-memory graph reflects
+    seen = applied                 # latest observed state
+    last_change = None
+    last_export = time.monotonic()
+    export_pending = False
+
+    print(f"Watching {root_dir} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            now = time.monotonic()
+
+            current = snapshot(root_dir)
+            if current != seen:
+                seen = current
+                last_change = now
+
+            if last_change is not None and now - last_change >= DEBOUNCE:
+                added, changed, deleted = diff_snapshots(applied, seen)
+                started = time.perf_counter()
+                referrers = apply_changes(root_dir, added, changed, deleted)
+                applied = seen
+                last_change = None
+                export_pending = True
+
+                took = (time.perf_counter() - started) * 1000
+                print(
+                    f"+{len(added)} ~{len(changed)} -{len(deleted)} "
+                    f"(+{len(referrers)} referrers) in {took:.0f} ms → "
+                    f"{len(parser.G.nodes)} nodes, {len(parser.G.edges)} edges"
+                )
+
+            if export_pending and now - last_export >= COMBINED_EXPORT_INTERVAL:
+                parser.export_graph(OUTPUT_FILE)
+                last_export = now
+                export_pending = False
+
+    except KeyboardInterrupt:
+        if export_pending:
+            parser.export_graph(OUTPUT_FILE)
+        print("\nStopped watching.")
+
+
+if __name__ == "__main__":
+    watch(ROOT_DIR)
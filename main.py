@@ -2,41 +2,123 @@ import json
 import networkx as nx
 import numpy as np
 import os
+import sys
 
 from Embedding.embed_graph import GRAPH_FILE, get_context_text, model, OUTPUT_EMBEDDINGS
-
-
-def main():
-    print("Loading graph...")
-    with open(GRAPH_FILE, "r", encoding="utf-8") as f:
-        graph_data = json.load(f)
-
-    G = nx.node_link_graph(graph_data)
-
-    os.makedirs("Embedding/Output_Embeddings", exist_ok=True)
+from Scraper.csr_graph import load_csr_graph
+from Scraper.page_rank import best_page_score, static_prior
+from Scraper.sqlite_graph import SqliteGraph
+from Embedding.structural_embed import structural_embeddings
+
+# "networkx" = load graphs as nx.MultiDiGraph
+# "csr"      = Scraper/csr_graph.py: read-only arrays at a fraction of the memory
+#              (directories saved by csr_graph.py are always loaded this way)
+# .sqlite stores (Scraper/sqlite_graph.py) are always read from disk, query by query
+GRAPH_BACKEND = "networkx"
+
+# Nodes on pages marked NEAR_DUPLICATE_OF another page (Scraper/near_duplicates.py):
+# "embed" = embed them like any other node
+# "reuse" = copy the vector of the canonical page's node at the same XPath
+#           when tag and full text (text_digest) are identical, embed only what differs
+# "skip"  = leave them out of the output
+DUPLICATE_PAGES = "embed"
+
+# Also store a structural vector per node (Embedding/structural_embed.py) under
+# "structure", next to the text "embedding", for hybrid similarity
+STRUCTURAL_EMBEDDINGS = True
+
+# Graphs scored by Scraper/page_rank.py also get a "prior" per node: its page's
+# PageRank relative to the best page's. Retrieval adds page_rank.PRIOR_WEIGHT * prior
+# to the cosine similarity, so well-linked pages come first on near-ties.
+
+
+def near_duplicate_twins(G, node_ids):
+    """{node on a near-duplicate page: same node on its canonical page} (reuse mode)."""
+    canonical = {u: v for u, v, rel in G.edges(data="relation") if rel == "NEAR_DUPLICATE_OF"}
+    if not canonical:
+        return {}
+
+    by_xpath = {
+        (attrs.get("page"), attrs.get("xpath")): node
+        for node, attrs in G.nodes(data=True)
+        if attrs.get("page") in canonical.values()
+    }
+
+    twins = {}
+    for node in node_ids:
+        attrs = G.nodes[node]
+        page = attrs.get("page")
+        if page not in canonical:
+            continue
+        twin = by_xpath.get((canonical[page], attrs.get("xpath")))
+        if twin is None:
+            continue
+        # text_snippet is cut off, so only the digest of the whole text tells
+        # twins apart (graphs parsed without digests get no twins)
+        twin_attrs = G.nodes[twin]
+        if (twin_attrs.get("tag") == attrs.get("tag") and attrs.get("text_digest") is not None
+                and twin_attrs.get("text_digest") == attrs.get("text_digest")):
+            twins[node] = twin
+    return twins
+
+
+def embed_graph_file(graph_file=GRAPH_FILE, output_file=OUTPUT_EMBEDDINGS):
+    print(f"Loading graph {graph_file}...")
+    if graph_file.endswith(".sqlite"):
+        G = SqliteGraph(graph_file, readonly=True)
+    elif GRAPH_BACKEND == "csr" or os.path.isdir(graph_file):
+        G = load_csr_graph(graph_file)
+    else:
+        with open(graph_file, "r", encoding="utf-8") as f:
+            graph_data = json.load(f)
+        G = nx.node_link_graph(graph_data)
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
     # --------------------------------------------------------
     # 1) PREPARE CONTEXT TEXTS IN ONE LIST
     # --------------------------------------------------------
     print("Preparing context texts...")
     node_ids = list(G.nodes)
+
+    twins = {}
+    if DUPLICATE_PAGES == "skip":
+        duplicate_pages = {u for u, _, rel in G.edges(data="relation") if rel == "NEAR_DUPLICATE_OF"}
+        node_ids = [n for n in node_ids if G.nodes[n].get("page") not in duplicate_pages]
+    elif DUPLICATE_PAGES == "reuse":
+        twins = near_duplicate_twins(G, node_ids)
+
     all_texts = [get_context_text(G, node) for node in node_ids]
+    to_encode = [i for i, node in enumerate(node_ids) if node not in twins]
+    print(f"Nodes: {len(node_ids)} ({len(twins)} reuse a near-duplicate's vector)")
 
     # --------------------------------------------------------
     # 2) BATCH EMBEDDING (very fast)
     # --------------------------------------------------------
     print("Embedding all nodes (batched)...")
 
-    embeddings_matrix = model.encode(
-        all_texts,
+    encoded = model.encode(
+        [all_texts[i] for i in to_encode],
         convert_to_numpy=True,
         batch_size=64,
         show_progress_bar=True,
         normalize_embeddings=True
     )
 
+    row_of = {node_ids[i]: row for row, i in enumerate(to_encode)}
+    embeddings_matrix = encoded[[row_of[twins.get(node, node)] for node in node_ids]]
+
     print("Embedding shape:", embeddings_matrix.shape)
 
+    best = best_page_score(G)
+    priors = static_prior(G, node_ids, best) if best else None
+
+    structure = {}
+    if STRUCTURAL_EMBEDDINGS:
+        print("Structural embeddings (random walks)...")
+        vectors = structural_embeddings(G)
+        structure = {node: vectors[i] for i, node in enumerate(G.nodes)}
+
     # --------------------------------------------------------
     # 3) BUILD OUTPUT JSON
     # --------------------------------------------------------
@@ -52,13 +134,36 @@ def main():
             "type": attrs.get("type"),
             "page": attrs.get("page")
         }
-
-    with open(OUTPUT_EMBEDDINGS, "w", encoding="utf-8") as f:
+        if node in twins:
+            output_dict[node]["embedding_of"] = twins[node]
+        if node in structure:
+            output_dict[node]["structure"] = structure[node].tolist()
+        if priors is not None:
+            output_dict[node]["prior"] = round(float(priors[i]), 6)
+
+    with open(output_file, "w", encoding="utf-8") as f:
         json.dump(output_dict, f, indent=4)
 
     print("✔ Embeddings created!")
-    print(f"Saved to {OUTPUT_EMBEDDINGS}")
+    print(f"Saved to {output_file}")
+
+
+def main(graph_files=None):
+    """
+    Embed one graph (GRAPH_FILE) or several, e.g. the per-site graphs of
+    Scraper/batch_sites.py: `python main.py Scraper/Output_Graph_Json/sites/*/dom_graph.json`.
+    The model is loaded once for all of them; each graph's embeddings go to
+    Embedding/Output_Embeddings/<its directory name>/node_embeddings.json.
+    """
+    if not graph_files:
+        embed_graph_file(GRAPH_FILE, OUTPUT_EMBEDDINGS)
+        return
+
+    for graph_file in graph_files:
+        site = os.path.basename(os.path.dirname(os.path.abspath(graph_file)))
+        output_file = os.path.join(os.path.dirname(OUTPUT_EMBEDDINGS), site, os.path.basename(OUTPUT_EMBEDDINGS))
+        embed_graph_file(graph_file, output_file)
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,107 @@
+import os
+import sys
+import asyncio
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+# the Scraper modules import each other by bare module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scraper"))
+
+import http_crawler as crawler             # noqa: E402
+from batch_sites import reset_builder      # noqa: E402
+from crawl_frontier import CrawlFrontier   # noqa: E402
+
+
+PAGES = {
+    "index.html": '<html><head><title>Home</title></head><body>'
+                  '<a href="about.html">About us</a> <a href="blog.html">Blog</a></body></html>',
+    "about.html": '<html><head><title>About</title></head><body><p>Who we are</p>'
+                  '<a href="index.html">Home</a></body></html>',
+    "blog.html": '<html><head><title>Blog</title></head><body><p>Posts</p>'
+                 '<a href="https://example.org/">elsewhere</a></body></html>',
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_builder():
+    """Every test starts (and leaves) the module-level graph builder empty."""
+    reset_builder()
+    yield
+    reset_builder()
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A writable directory with three linked pages."""
+    root = tmp_path / "site"
+    root.mkdir()
+    for name, content in PAGES.items():
+        (root / name).write_text(content, encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def served_site(site):
+    """site served by http_crawler.serve_directory (Last-Modified, no ETag); yields its base URL."""
+    server, base = crawler.serve_directory(str(site))
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+class EtagHandler(BaseHTTPRequestHandler):
+    """Serves server.root with only an ETag validator, spelled "Etag" the way many servers do."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = os.path.join(self.server.root, self.path.lstrip("/").split("?")[0] or "index.html")
+        if not os.path.isfile(path):
+            self.server.statuses.append(404)
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+        status = 304 if self.headers.get("If-None-Match") == etag else 200
+        self.server.statuses.append(status)
+        self.send_response(status)
+        self.send_header("Etag", etag)
+        if status == 200:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(body)
+
+
+@pytest.fixture
+def etag_server(site):
+    """site behind EtagHandler; yields the server (base_url, statuses of every request)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EtagHandler)
+    server.root = str(site)
+    server.statuses = []
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawl():
+    """crawl(start_url, **options): one crawl into a fresh parser.G, without robots.txt, sitemaps or delays."""
+
+    def run(start_url, **options):
+        reset_builder()
+        frontier = CrawlFrontier(delay=0, user_agent=crawler.USER_AGENT)
+        return asyncio.run(crawler.crawl(
+            start_url, frontier=frontier, respect_robots=False, use_sitemap=False, **options,
+        ))
+
+    return run
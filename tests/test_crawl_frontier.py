@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import aiohttp
+import pytest
+
+from crawl_frontier import load_robots
+
+
+class RobotsHandler(BaseHTTPRequestHandler):
+    """Answers /robots.txt with the next status in server.script (the last one repeats)."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status = self.server.script[min(len(self.server.attempts), len(self.server.script) - 1)]
+        self.server.attempts.append(status)
+        body = b"User-agent: *\nDisallow: /private/\n" if status == 200 else b"nope"
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def robots_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RobotsHandler)
+    server.attempts = []
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def robots_for(server, *script):
+    server.script = script
+
+    async def load():
+        async with aiohttp.ClientSession() as session:
+            return await load_robots(session, server.base_url, retries=2, backoff=0.01)
+
+    return asyncio.run(load())
+
+
+def allowed(robots, server, path):
+    return robots.can_fetch("*", server.base_url + path)
+
+
+def test_robots_rules_are_parsed(robots_server):
+    robots = robots_for(robots_server, 200)
+    assert allowed(robots, robots_server, "index.html")
+    assert not allowed(robots, robots_server, "private/a.html")
+
+
+@pytest.mark.parametrize("status", [404, 410, 400, 418, 302])
+def test_missing_or_unusable_robots_allows_everything(robots_server, status):
+    robots = robots_for(robots_server, status)
+    assert allowed(robots, robots_server, "private/a.html")
+    assert robots_server.attempts == [status]
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_restricted_robots_disallows_the_host(robots_server, status):
+    robots = robots_for(robots_server, status)
+    assert not allowed(robots, robots_server, "index.html")
+    assert robots_server.attempts == [status]
+
+
+def test_server_errors_are_retried(robots_server):
+    robots = robots_for(robots_server, 503, 500, 200)
+    assert robots_server.attempts == [503, 500, 200]
+    assert allowed(robots, robots_server, "index.html")
+    assert not allowed(robots, robots_server, "private/a.html")
+
+
+def test_unavailable_robots_disallows_the_host(robots_server):
+    robots = robots_for(robots_server, 503)
+    assert robots_server.attempts == [503, 503, 503]
+    assert not allowed(robots, robots_server, "index.html")
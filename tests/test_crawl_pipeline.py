@@ -0,0 +1,47 @@
+import os
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import http_crawler as crawler
+import crawl_pipeline
+from crawl_frontier import CrawlFrontier
+
+
+def pipeline(start_url, **options):
+    frontier = CrawlFrontier(delay=0, user_agent=crawler.USER_AGENT)
+    return asyncio.run(asyncio.wait_for(crawl_pipeline.pipeline_crawl(
+        start_url, frontier=frontier, respect_robots=False, use_sitemap=False, **options,
+    ), timeout=20))
+
+
+def exit_parse_process(*args):
+    os._exit(1)
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_pipeline_fetches_every_page(served_site, parse_workers):
+    depths = pipeline(served_site + "index.html", parse_workers=parse_workers, fetchers=3)
+    assert depths == {"index.html": 0, "about.html": 1, "blog.html": 1}
+
+
+def test_parser_error_stops_the_fetchers(served_site, monkeypatch):
+    record_page = crawler.record_page
+
+    def failing_record_page(page_name, record, depth):
+        if page_name != "index.html":
+            raise RuntimeError("parser failed on " + page_name)
+        return record_page(page_name, record, depth)
+
+    monkeypatch.setattr(crawler, "record_page", failing_record_page)
+    # one parser and a one-page queue: without supervision the fetchers
+    # would block on queue.put forever once the parser is gone
+    with pytest.raises(RuntimeError, match="parser failed"):
+        pipeline(served_site + "index.html", parse_workers=0, fetchers=4, queue_size=1)
+
+
+def test_broken_process_pool_is_raised(served_site, monkeypatch):
+    monkeypatch.setattr(crawl_pipeline, "parse_job", exit_parse_process)
+    with pytest.raises(BrokenProcessPool):
+        pipeline(served_site + "index.html", parse_workers=1, fetchers=4, queue_size=1)
@@ -0,0 +1,12 @@
+import dom_graph_parser as parser
+
+
+def test_page_link_targets_are_in_document_order():
+    parser.all_known_pages.update({"a.html", "b.html", "c.html", "d.html"})
+    parser.add_page("x.html", '<html><body><div><p><a href="c.html">C</a></p><a href="a.html">A</a></div>'
+                              '<ul><li><a href="d.html">D</a></li></ul>'
+                              '<a href="b.html">B</a><a href="c.html">C again</a></body></html>')
+
+    assert parser.page_link_targets("x.html") == ["c.html", "a.html", "d.html", "b.html"]
+    tags = [parser.G.nodes[n]["tag"] for n in parser.get_page_nodes("x.html")]
+    assert tags == ["html", "body", "div", "p", "a", "a", "ul", "li", "a", "a", "a"]
@@ -0,0 +1,65 @@
+import json
+
+import networkx as nx
+import pytest
+
+from graph_history import GraphHistory, VISIBLE
+
+
+def site_graph(version):
+    """A small site that changes a little with every crawl."""
+    G = nx.MultiDiGraph()
+    G.add_node("index.html", type="Page_File")
+    G.add_node("index.html::p_1", type="DOM_Element", page="index.html", text=f"crawl {version}")
+    G.add_edge("index.html", "index.html::p_1", relation="CONTAINS")
+    if version % 3:
+        G.add_node("about.html", type="Page_File")
+        G.add_edge("index.html::p_1", "about.html", relation="LINKS_TO_PAGE", anchor="About")
+    return G
+
+
+def graph_data(G):
+    """Nodes with attributes, and every node's out-edges in order (node order follows recording)."""
+    return dict(G.nodes(data=True)), {u: list(G.out_edges(u, keys=True, data=True)) for u in G}
+
+
+def scanned(history, version):
+    """The snapshot the slow way: every row whose interval contains the version."""
+    G = nx.MultiDiGraph()
+    for node, attrs in history.db.execute(f"SELECT node, attrs FROM nodes WHERE {VISIBLE} ORDER BY id",
+                                          (version, version)):
+        G.add_node(node, **json.loads(attrs))
+    history._add_edges(G, history.db.execute(f"SELECT src, dst, key, seq, attrs FROM edges WHERE {VISIBLE}",
+                                             (version, version)))
+    return G
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = GraphHistory(str(tmp_path / "history.sqlite"), keyframe_every=3)
+    for version in range(1, 11):
+        history.commit(site_graph(version))
+    yield history
+    history.close()
+
+
+def test_snapshots_from_keyframes_match_the_recorded_graphs(history):
+    assert [v for v, *_, keyframe in history.versions() if keyframe] == [1, 4, 7, 10]
+    for version in range(1, 11):
+        assert graph_data(history.snapshot(version)) == graph_data(site_graph(version))
+        assert graph_data(history.snapshot(version)) == graph_data(scanned(history, version))
+
+
+def test_compact_adds_keyframes_and_keeps_every_version(history):
+    assert history.compact(keyframe_every=2) == [3, 6, 9]
+    assert len(history.versions()) == 10
+    for version in range(1, 11):
+        assert graph_data(history.snapshot(version)) == graph_data(site_graph(version))
+
+
+def test_snapshot_reads_rows_by_id_not_by_scan(history):
+    plan = " ".join(row[-1] for row in history.db.execute(
+        "EXPLAIN QUERY PLAN SELECT node FROM nodes WHERE id IN ("
+        " SELECT row FROM node_keyframes WHERE version = 1"
+        " UNION ALL SELECT id FROM nodes WHERE valid_from > 1 AND valid_from <= 2) ORDER BY id"))
+    assert "SCAN nodes" not in plan
@@ -0,0 +1,26 @@
+import networkx as nx
+
+import graph_index
+from graph_index import GraphIndex
+
+
+def test_removed_positions_are_compacted_in_order(monkeypatch):
+    monkeypatch.setattr(graph_index, "COMPACT_MIN", 4)
+    G = nx.MultiDiGraph()
+    for i in range(10):
+        G.add_node(f"n{i}", type="DOM_Element", tag="p" if i % 2 else "div")
+    index = GraphIndex(G)
+
+    for round_ in range(20):
+        removed = [f"n{i}" for i in range(0, 10, 3)]
+        G.remove_nodes_from(removed)
+        index.update(removed)
+        G.add_nodes_from(removed, type="DOM_Element", tag="h1")
+        index.update(removed)
+        assert len(index.ids) <= 2 * len(G)
+
+    fresh = GraphIndex(G)
+    assert list(index.find(tag="p")) == [n for n in index.ids if n and G.nodes[n]["tag"] == "p"]
+    for tag in ("p", "div", "h1"):
+        assert sorted(index.find(tag=tag)) == sorted(fresh.find(tag=tag))
+    assert index.distinct("tag") == fresh.distinct("tag")
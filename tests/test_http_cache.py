@@ -0,0 +1,82 @@
+import os
+import time
+
+import networkx as nx
+
+import dom_graph_parser as parser
+from http_cache import HttpCache, normalize_headers
+
+
+def graph_snapshot():
+    """parser.G without the per-fetch attributes that legitimately differ between crawls."""
+    G = parser.G.copy()
+    for _, attrs in G.nodes(data=True):
+        for key in ("fetch_ms", "from_cache", "status", "bytes"):
+            attrs.pop(key, None)
+    return G
+
+
+def test_normalize_headers_lowercases_names():
+    assert normalize_headers({"Etag": '"x"', "Content-Type": "text/html"}) == {
+        "etag": '"x"', "content-type": "text/html",
+    }
+
+
+def test_etag_only_revalidation_round_trip(etag_server, crawl, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    start_url = etag_server.base_url + "index.html"
+    try:
+        first = crawl(start_url, cache=cache)
+        before = graph_snapshot()
+        assert cache.get(start_url)["etag"]
+        assert "If-None-Match" in cache.conditional_headers(cache.get(start_url))
+        assert etag_server.statuses == [200, 200, 200]
+
+        etag_server.statuses.clear()
+        second = crawl(start_url, cache=cache)
+    finally:
+        cache.close()
+
+    assert etag_server.statuses == [304, 304, 304]
+    assert second == first
+    assert all(parser.G.nodes[page].get("from_cache") for page in second)
+    assert parser.G.nodes["index.html"]["content_type"].startswith("text/html")
+    assert nx.utils.graphs_equal(graph_snapshot(), before)
+
+
+def test_last_modified_revalidation_round_trip(served_site, crawl, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    start_url = served_site + "index.html"
+    try:
+        crawl(start_url, cache=cache)
+        before = graph_snapshot()
+        assert cache.get(start_url)["last_modified"]
+
+        pages = crawl(start_url, cache=cache)
+    finally:
+        cache.close()
+
+    assert all(parser.G.nodes[page].get("from_cache") for page in pages)
+    assert nx.utils.graphs_equal(graph_snapshot(), before)
+
+
+def test_changed_page_is_parsed_again(etag_server, site, crawl, tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    start_url = etag_server.base_url + "index.html"
+    try:
+        crawl(start_url, cache=cache)
+        (site / "about.html").write_text(
+            "<html><head><title>About (new)</title></head><body><p>Changed</p></body></html>",
+            encoding="utf-8",
+        )
+        os.utime(site / "about.html", (time.time() + 5, time.time() + 5))
+
+        etag_server.statuses.clear()
+        crawl(start_url, cache=cache)
+    finally:
+        cache.close()
+
+    assert sorted(etag_server.statuses) == [200, 304, 304]
+    assert not parser.G.nodes["about.html"].get("from_cache")
+    assert parser.G.nodes["about.html"]["title"] == "About (new)"
+    assert parser.G.nodes["index.html"].get("from_cache")
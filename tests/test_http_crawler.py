@@ -0,0 +1,67 @@
+import dom_graph_parser as parser
+import http_crawler as crawler
+from batch_sites import reset_builder
+
+
+def page_links():
+    """{(source page, target page)} of every LINKS_TO_PAGE edge in parser.G."""
+    return {
+        (parser.G.nodes[u].get("page", u), v)
+        for u, v, rel in parser.G.edges(data="relation")
+        if rel == "LINKS_TO_PAGE"
+    }
+
+
+def test_url_to_page_name():
+    base = "http://host/site/"
+    assert crawler.url_to_page_name("http://host/site/a.html#top", base) == "a.html"
+    assert crawler.url_to_page_name("http://host/site/", base) == "index.html"
+    assert crawler.url_to_page_name("http://host/site/blog/?p=2", base) == "blog/index.html?p=2"
+
+
+def test_crawl_matches_local_build(served_site, site, crawl):
+    depths = crawl(served_site + "index.html")
+    assert depths == {"index.html": 0, "about.html": 1, "blog.html": 1}
+
+    crawled_links = page_links()
+    crawled_externals = {n for n, t in parser.G.nodes(data="type") if t == "External_Page"}
+    assert parser.G.nodes["index.html"]["status"] == 200
+
+    reset_builder()
+    parser.build_all_pages(str(site))
+    assert crawled_links == page_links()
+    assert crawled_externals == {n for n, t in parser.G.nodes(data="type") if t == "External_Page"}
+
+
+def test_max_depth_stops_following_links(served_site, crawl):
+    assert crawl(served_site + "index.html", max_depth=0) == {"index.html": 0}
+
+
+def test_missing_page_is_recorded_without_a_tree(served_site, site, crawl):
+    (site / "blog.html").unlink()
+    crawl(served_site + "index.html")
+    assert parser.G.nodes["blog.html"]["status"] == 404
+    assert parser.get_page_nodes("blog.html") == []
+
+
+def test_large_page_is_read_completely(served_site, site, crawl):
+    filler = "".join(f"<p>paragraph {i} " + "x" * 200 + "</p>" for i in range(2000))
+    (site / "about.html").write_text(
+        f'<html><body>{filler}<a href="blog.html">last link</a></body></html>', encoding="utf-8",
+    )
+    size = (site / "about.html").stat().st_size
+    assert size > 64 * 1024
+
+    crawl(served_site + "index.html")
+    assert parser.G.nodes["about.html"]["bytes"] == size
+    assert ("about.html", "blog.html") in page_links()
+    assert "budget_truncated" not in parser.G.nodes["about.html"]
+
+
+def test_body_is_capped_at_max_bytes(served_site, site, crawl, monkeypatch):
+    monkeypatch.setitem(parser.PAGE_LIMITS, "max_bytes", 100_000)
+    (site / "about.html").write_text("<html><body>" + "<p>x</p>" * 50_000 + "</body></html>", encoding="utf-8")
+
+    crawl(served_site + "index.html")
+    assert parser.G.nodes["about.html"]["bytes"] == 100_001
+    assert parser.G.nodes["about.html"]["budget_truncated"] == ["max_bytes"]
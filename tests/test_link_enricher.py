@@ -0,0 +1,111 @@
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import networkx as nx
+import pytest
+
+from link_enricher import LinkCheckCache, enrich_external_links, link_health_report
+
+
+class LinkTargetHandler(BaseHTTPRequestHandler):
+    """/page → HTML with a title, /old → redirect to /page, /nohead → 405 on HEAD, else 404."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, with_body):
+        self.server.requests.append((self.command, self.path))
+        if self.path == "/old":
+            self.send_response(301)
+            self.send_header("Location", "/page")
+            self.end_headers()
+            return
+        if self.path == "/nohead" and self.command == "HEAD":
+            self.send_response(405)
+            self.end_headers()
+            return
+        if self.path not in ("/page", "/nohead"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        # the title comes after more than one read buffer's worth of <head>
+        filler = b"<meta name='filler' content='" + b"y" * 30000 + b"'>"
+        body = b"<html><head>" + filler + b"<title> Target\n Page </title></head><body>x</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if with_body:
+            # in pieces, so the client sees the body arrive over several reads
+            for start in range(0, len(body), 8192):
+                self.wfile.write(body[start:start + 8192])
+                self.wfile.flush()
+                time.sleep(0.005)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def do_GET(self):
+        self.respond(True)
+
+
+@pytest.fixture
+def link_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LinkTargetHandler)
+    server.requests = []
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def graph_linking_to(urls):
+    G = nx.MultiDiGraph()
+    G.add_node("index.html", type="Page_File", title="Home")
+    G.add_node("a_1", type="DOM_Element", tag="a", page="index.html")
+    G.add_edge("index.html", "a_1", relation="CONTAINS")
+    for url in urls:
+        G.add_node(url, type="External_Page", url=url, label=url)
+        G.add_edge("a_1", url, relation="LINKS_TO_EXTERNAL_PAGE")
+    return G
+
+
+def test_enrichment_output(link_server):
+    base = link_server.base_url
+    G = graph_linking_to([base + "/page", base + "/old", base + "/nohead", base + "/gone"])
+
+    total, checked = asyncio.run(enrich_external_links(G))
+    assert (total, checked) == (4, 4)
+
+    page = G.nodes[base + "/page"]
+    assert page["status"] == 200 and page["title"] == "Target Page"
+    assert page["content_type"] == "text/html" and page["error"] is None
+
+    assert G.nodes[base + "/old"]["final_url"] == base + "/page"
+    assert G.nodes[base + "/nohead"]["status"] == 200
+    assert G.nodes[base + "/gone"]["status"] == 404
+
+    report = link_health_report(G)
+    assert report["ok"] == 3
+    assert report["broken"] == [(base + "/gone", 404, ["index.html"])]
+
+
+def test_fresh_results_come_from_the_cache(link_server, tmp_path):
+    url = link_server.base_url + "/page"
+    cache = LinkCheckCache(str(tmp_path / "links.sqlite"))
+    try:
+        assert asyncio.run(enrich_external_links(graph_linking_to([url]), cache)) == (1, 1)
+        link_server.requests.clear()
+
+        G = graph_linking_to([url])
+        assert asyncio.run(enrich_external_links(G, cache)) == (1, 0)
+        assert link_server.requests == []
+        assert G.nodes[url]["title"] == "Target Page"
+
+        # expired entries are checked again
+        assert cache.get(url, now=G.nodes[url]["checked_at"] + cache.ttl + 1) is None
+    finally:
+        cache.close()
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+import dom_graph_parser as parser
+import near_duplicates
+
+LOREM = ("spices wreaths cinnamon cloves anise vanilla ginger nutmeg cardamom pepper saffron "
+         "garland ribbon basket window table door kitchen winter market gift").split()
+
+
+def prose(seed, words=120):
+    """Deterministic filler text; different seeds share almost no 3-word shingles."""
+    return " ".join(LOREM[(i * seed + i // len(LOREM)) % len(LOREM)] for i in range(words))
+
+
+def product_page(description, heading="Spice wreath"):
+    # the description sits directly in a <div> that also has children, so
+    # no leaf element (and no text_snippet) holds it in full
+    return (f"<html><head><title>{heading}</title></head><body>"
+            f"<h1>{heading}</h1><div class='desc'>{description}<span>In stock</span></div>"
+            f"<p>Free shipping</p></body></html>")
+
+
+def test_text_of_elements_with_children_is_fingerprinted():
+    parser.add_page("wreath.html", product_page(prose(3)))
+    parser.add_page("bouquet.html", product_page(prose(7)))
+    parser.add_page("wreath-copy.html", product_page(prose(3) + " limited edition"))
+
+    duplicates = near_duplicates.mark_near_duplicates(parser.G)
+
+    assert duplicates.keys() == {"wreath-copy.html"}
+    assert duplicates["wreath-copy.html"][0] == "wreath.html"
+
+
+def test_graph_text_fallback_keeps_whole_paragraphs():
+    long_paragraph = prose(5, words=80)
+    parser.add_page("a.html", f"<html><body><div><p>{long_paragraph}</p><p>x</p></div></body></html>")
+
+    text = near_duplicates.graph_page_text(parser.G, "a.html")
+    assert long_paragraph in text
+    assert len(long_paragraph) > parser.SNIPPET_CHARS
+
+
+def test_text_digest_covers_text_past_the_snippet():
+    shared = prose(3, words=60)
+    parser.add_page("a.html", product_page(shared + " red"))
+    parser.add_page("b.html", product_page(shared + " blue"))
+    parser.add_page("c.html", product_page(shared + " red"))
+
+    def desc(page):
+        return next(n for n in parser.get_page_nodes(page) if parser.G.nodes[n].get("tag") == "div")
+
+    a, b, c = (parser.G.nodes[desc(p)] for p in ("a.html", "b.html", "c.html"))
+    assert a["text_snippet"] == b["text_snippet"]
+    assert a["text_digest"] != b["text_digest"]
+    assert a["text_digest"] == c["text_digest"]
+
+
+def test_embedding_reuse_needs_identical_full_text():
+    pytest.importorskip("sentence_transformers")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from main import near_duplicate_twins
+
+    shared = prose(3, words=60)
+    parser.add_page("a.html", product_page(shared + " red"))
+    parser.add_page("b.html", product_page(shared + " blue"))
+    parser.G.add_edge("b.html", "a.html", relation="NEAR_DUPLICATE_OF")
+
+    twins = near_duplicate_twins(parser.G, parser.get_page_nodes("b.html"))
+    tags = {parser.G.nodes[n]["tag"] for n in twins}
+    assert "span" in tags and "h1" in tags
+    assert "div" not in tags and "body" not in tags
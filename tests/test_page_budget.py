@@ -0,0 +1,45 @@
+import pytest
+
+import dom_graph_parser as parser
+
+DEEP_PAGE = "<html><body>" + "<div>" * 30 + "deep" + "</div>" * 30 + "<p>shallow</p></body></html>"
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setitem(parser.PAGE_LIMITS, "max_depth", 10)
+    return parser.PAGE_LIMITS
+
+
+def paragraphs(page):
+    return [n for n in parser.get_page_nodes(page) if parser.G.nodes[n].get("tag") == "p"]
+
+
+def test_depth_limit_cuts_only_the_deep_subtree_even_in_skip_mode(limits, monkeypatch):
+    monkeypatch.setattr(parser, "ON_LIMIT", "skip")
+    parser.add_page("deep.html", DEEP_PAGE)
+
+    assert parser.G.nodes["deep.html"]["budget_truncated"] == ["max_depth"]
+    assert "budget_skipped" not in parser.G.nodes["deep.html"]
+    assert paragraphs("deep.html")
+
+
+def test_page_wide_limit_skips_the_page(limits, monkeypatch):
+    monkeypatch.setattr(parser, "ON_LIMIT", "skip")
+    monkeypatch.setitem(limits, "max_elements", 5)
+    parser.add_page("deep.html", DEEP_PAGE)
+
+    assert parser.G.nodes["deep.html"]["budget_skipped"] == ["max_elements"]
+    assert parser.get_page_nodes("deep.html") == []
+
+
+def test_reparsing_clears_old_budget_reasons(limits):
+    parser.add_page("deep.html", DEEP_PAGE)
+    assert parser.G.nodes["deep.html"]["budget_truncated"] == ["max_depth"]
+
+    limits["max_depth"] = 200
+    parser.remove_page("deep.html", keep_page_node=True)
+    parser.add_page("deep.html", DEEP_PAGE)
+
+    assert "budget_truncated" not in parser.G.nodes["deep.html"]
+    assert "deep.html" not in parser.page_budget_log
@@ -0,0 +1,174 @@
+import json
+import time
+import asyncio
+import sqlite3
+
+import pytest
+
+import crawl_workers
+from crawl_traps import SqliteTrapDetector
+from sqlite_frontier import SqliteFrontier, MAX_ATTEMPTS
+
+
+def entry(url, priority=0, depth=0):
+    return (url, url.rsplit("/", 1)[-1], depth, priority)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "frontier.sqlite")
+
+
+def test_claims_follow_priority_and_skip_known_urls(db_path):
+    frontier = SqliteFrontier(db_path, delay=0, max_inflight=10)
+    assert frontier.add([entry("http://a/x", 2), entry("http://a/y", 1), entry("http://a/x", 0)]) == 2
+
+    assert [url for url, _, _ in frontier.claim("w1", 5)] == ["http://a/y", "http://a/x"]
+    assert frontier.claim("w1", 5) == []
+
+
+def test_max_urls_uses_a_running_count(db_path):
+    frontier = SqliteFrontier(db_path, delay=0)
+    assert frontier.add([entry("http://a/1"), entry("http://a/2")], max_urls=3) == 2
+    assert frontier.add([entry("http://a/2"), entry("http://a/3"), entry("http://a/4")], max_urls=3) == 1
+    assert frontier.url_count() == 3
+
+    frontier.reset()
+    assert frontier.url_count() == 0
+    assert frontier.add([entry("http://a/5")], max_urls=3) == 1
+
+
+def test_expired_lease_is_reclaimed_then_given_up(db_path):
+    frontier = SqliteFrontier(db_path, lease_seconds=-1, delay=0)
+    frontier.add([entry("http://a/x")])
+
+    for attempt in range(MAX_ATTEMPTS):
+        assert not frontier.is_finished()
+        assert [url for url, _, _ in frontier.claim(f"w{attempt}", 1)] == ["http://a/x"]
+
+    # the first worker lost its lease to the others
+    assert not frontier.complete("http://a/x", "w0")
+    assert frontier.claim("w9", 1) == []
+    assert frontier.stats() == {"failed": 1}
+    assert frontier.is_finished()
+
+
+def test_resume_releases_the_leases_of_a_crashed_run(db_path):
+    frontier = SqliteFrontier(db_path, delay=0)
+    frontier.add([entry("http://a/x"), entry("http://a/y", 1)])
+    frontier.claim("crashed", 1)
+    frontier.close()
+
+    frontier = SqliteFrontier(db_path, delay=0)
+    assert frontier.release_leases() == 1
+    assert frontier.stats() == {"queued": 2}
+    url, _, _ = frontier.claim("w1", 1)[0]
+    assert url == "http://a/x"
+    assert frontier.complete(url, "w1")
+    assert frontier.db.execute("SELECT attempts FROM urls WHERE url = ?", (url,)).fetchone()[0] == 1
+
+
+def test_host_delay_spaces_claims_across_frontiers(db_path):
+    first = SqliteFrontier(db_path, delay=0.3)
+    second = SqliteFrontier(db_path, delay=0.3)    # another worker process
+    first.add([entry("http://a/1"), entry("http://a/2"), entry("http://b/1")])
+
+    claimed = first.claim("w1", 10)
+    assert sorted(url for url, _, _ in claimed) == ["http://a/1", "http://b/1"]   # one per host
+    assert second.claim("w2", 10) == []
+    assert 0 < second.seconds_until_ready() <= 0.3
+
+    time.sleep(0.35)
+    assert [url for url, _, _ in second.claim("w2", 10)] == ["http://a/2"]
+
+
+def test_crawl_delay_applies_to_every_worker(db_path):
+    first = SqliteFrontier(db_path, delay=0)
+    first.add([entry("http://a/1"), entry("http://a/2")])
+    first.set_host_delay("a", 0.3)
+
+    second = SqliteFrontier(db_path, delay=0)
+    assert len(second.claim("w2", 10)) == 1
+    assert first.claim("w1", 10) == []
+
+
+def test_inflight_limit_per_host(db_path):
+    frontier = SqliteFrontier(db_path, delay=0, max_inflight=2)
+    frontier.add([entry(f"http://a/{i}") for i in range(4)] + [entry("http://b/1")])
+
+    claimed = [url for url, _, _ in frontier.claim("w1", 10)]
+    assert claimed == ["http://a/0", "http://a/1", "http://b/1"]
+    assert frontier.claim("w1", 10) == []
+
+    assert frontier.complete("http://a/0", "w1")
+    assert [url for url, _, _ in frontier.claim("w1", 10)] == ["http://a/2"]
+
+
+def test_frontier_without_host_column_is_upgraded(db_path):
+    db = sqlite3.connect(db_path)
+    db.executescript("""
+        CREATE TABLE urls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE NOT NULL, page_name TEXT NOT NULL,
+            depth INTEGER NOT NULL, priority REAL NOT NULL, state TEXT NOT NULL DEFAULT 'queued',
+            lease_owner TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX urls_claim ON urls (state, priority, id);
+        INSERT INTO urls (url, page_name, depth, priority) VALUES ('http://A/x', 'x', 0, 0);
+    """)
+    db.commit()
+    db.close()
+
+    frontier = SqliteFrontier(db_path, delay=0)
+    assert frontier.url_count() == 1
+    assert frontier.claim("w1", 1) == [("http://A/x", "x", 0)]
+
+
+def with_traps(db_path, **options):
+    frontier = SqliteFrontier(db_path, delay=0)
+    frontier.traps = SqliteTrapDetector(frontier.db, **options)
+    return frontier
+
+
+def test_trap_templates_are_judged_on_the_pages_of_all_workers(db_path):
+    first = with_traps(db_path, min_sample=4, window=4, block_yield=0.3)
+    second = with_traps(db_path, min_sample=4, window=4, block_yield=0.3)
+
+    first.add([entry(f"http://a/cal?day={i}") for i in range(2)])
+    second.add([entry(f"http://a/cal?day={i}") for i in range(2, 4)])
+    for i in range(4):
+        (first if i % 2 else second).record_page(f"http://a/cal?day={i}", b"same text")
+
+    assert second.add([entry("http://a/cal?day=9"), entry("http://a/other")]) == 1
+    assert first.add([entry("http://a/cal?day=9")]) == 0      # suppressed once, remembered
+    assert first.stats() == {"queued": 5, "suppressed": 1}
+
+    [row] = SqliteTrapDetector(first.db).report()
+    assert (row["template"], row["state"], row["fetched"], row["distinct"], row["suppressed"]) == \
+        ("a/cal?day", "blocked", 4, 1, 1)
+
+
+def test_depth_explosion_is_seen_across_workers(db_path):
+    first = with_traps(db_path, max_depth_span=3)
+    second = with_traps(db_path, max_depth_span=3)
+
+    first.add([entry("http://a/page/1", depth=0)])
+    assert second.add([entry("http://a/page/9", depth=9)]) == 0
+
+    first.reset()
+    assert SqliteTrapDetector(first.db).report() == []
+
+
+def test_workers_crawl_the_site_through_the_frontier(served_site, db_path, tmp_path):
+    frontier = SqliteFrontier(db_path)
+    asyncio.run(crawl_workers.seed(frontier, served_site + "index.html",
+                                   respect_robots=False, use_sitemap=False, delay=0))
+    frontier.close()
+
+    shards = str(tmp_path / "shards")
+    assert asyncio.run(crawl_workers.work(db_path, shards, concurrency=3)) == 3
+
+    pages = set()
+    for path in (tmp_path / "shards").iterdir():
+        pages |= {json.loads(line)["page"] for line in path.read_text(encoding="utf-8").splitlines()}
+    assert pages == {"index.html", "about.html", "blog.html"}
+    assert SqliteFrontier(db_path).stats() == {"done": 3}
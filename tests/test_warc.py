@@ -0,0 +1,85 @@
+import networkx as nx
+
+import dom_graph_parser as parser
+from batch_sites import reset_builder
+from http_cache import HttpCache
+from warc_archive import WarcWriter, WarcReader
+import warc_replay
+from warc_replay import replay
+
+
+def page_links():
+    return {
+        (parser.G.nodes[u].get("page", u), v)
+        for u, v, rel in parser.G.edges(data="relation")
+        if rel == "LINKS_TO_PAGE"
+    }
+
+
+def test_revalidating_crawl_archive_replays(etag_server, crawl, tmp_path):
+    start_url = etag_server.base_url + "index.html"
+    cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    warc_path = str(tmp_path / "crawl.warc.gz")
+    try:
+        crawl(start_url, cache=cache)
+        etag_server.statuses.clear()
+
+        archive = WarcWriter(warc_path)
+        try:
+            crawled = crawl(start_url, cache=cache, archive=archive)
+        finally:
+            archive.close()
+    finally:
+        cache.close()
+
+    assert etag_server.statuses == [304, 304, 304]
+    links, titles = page_links(), dict(parser.G.nodes(data="title"))
+    tree = nx.MultiDiGraph(parser.G.subgraph(parser.get_page_nodes("about.html")))
+
+    reader = WarcReader(warc_path)
+    try:
+        assert all(reader.get(etag_server.base_url + page)["status"] == 200 for page in crawled)
+    finally:
+        reader.close()
+
+    reset_builder()
+    assert replay(warc_path, start_url) == crawled
+    assert page_links() == links
+    assert dict(parser.G.nodes(data="title")) == titles
+    assert nx.utils.graphs_equal(nx.MultiDiGraph(parser.G.subgraph(parser.get_page_nodes("about.html"))), tree)
+
+
+def test_parallel_replay_streams_through_a_bounded_window(served_site, crawl, tmp_path, monkeypatch):
+    start_url = served_site + "index.html"
+    warc_path = str(tmp_path / "crawl.warc.gz")
+    archive = WarcWriter(warc_path)
+    try:
+        crawled = crawl(start_url, archive=archive)
+    finally:
+        archive.close()
+
+    reset_builder()
+    assert replay(warc_path, start_url) == crawled
+    links, titles = page_links(), dict(parser.G.nodes(data="title"))
+
+    submitted, merged = [], []
+    submit = warc_replay.ProcessPoolExecutor.submit
+    merge = parser.merge_page_subgraph
+
+    def counting_submit(pool, *args, **kwargs):
+        submitted.append(len(submitted) + 1 - len(merged))     # jobs out, this one included
+        return submit(pool, *args, **kwargs)
+
+    def counting_merge(graph):
+        merged.append(graph)
+        return merge(graph)
+
+    monkeypatch.setattr(warc_replay.ProcessPoolExecutor, "submit", counting_submit)
+    monkeypatch.setattr(parser, "merge_page_subgraph", counting_merge)
+    monkeypatch.setattr(warc_replay, "JOBS_PER_WORKER", 1)
+
+    reset_builder()
+    assert replay(warc_path, start_url, parse_workers=2) == crawled
+    assert page_links() == links
+    assert dict(parser.G.nodes(data="title")) == titles
+    assert len(submitted) == len(crawled) and max(submitted) <= 2
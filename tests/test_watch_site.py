@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+import dom_graph_parser as parser
+import watch_site
+
+
+@pytest.fixture
+def watched(site, tmp_path, monkeypatch):
+    monkeypatch.setattr(watch_site, "SHARD_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(watch_site, "OUTPUT_FILE", str(tmp_path / "dom_graph.json"))
+    watch_site.file_contents.clear()
+    watch_site.initial_build(str(site))
+    yield site
+    watch_site.file_contents.clear()
+
+
+def shard_targets(page):
+    with open(watch_site.shard_path(page), encoding="utf-8") as f:
+        return {edge["target"] for edge in json.load(f)["edges"]}
+
+
+def test_deleting_a_page_rewrites_the_shards_linking_to_it(watched):
+    assert "about.html" in shard_targets("index.html")
+
+    (watched / "about.html").unlink()
+    referrers = watch_site.apply_changes(str(watched), set(), set(), {"about.html"})
+
+    assert referrers == {"index.html"}
+    assert "about.html" not in parser.G
+    assert "about.html" not in shard_targets("index.html")
+
+
+def test_file_vanishing_before_the_read_counts_as_deleted(watched):
+    (watched / "about.html").unlink()
+    watch_site.apply_changes(str(watched), set(), {"about.html"}, set())
+
+    assert "about.html" not in parser.G
+    assert "about.html" not in watch_site.file_contents
+    assert "about.html" not in shard_targets("index.html")
+
+
+def test_adding_a_page_reparses_the_pages_linking_to_it(watched):
+    (watched / "blog.html").write_text(
+        '<html><body><a href="contact.html">Contact</a></body></html>', encoding="utf-8")
+    watch_site.apply_changes(str(watched), set(), {"blog.html"}, set())
+    assert parser.dangling_links == {"contact.html": {"blog.html"}}
+
+    (watched / "contact.html").write_text("<html><body><p>Write us</p></body></html>", encoding="utf-8")
+    referrers = watch_site.apply_changes(str(watched), {"contact.html"}, set(), set())
+
+    assert referrers == {"blog.html"}
+    assert "contact.html" in shard_targets("blog.html")
+    assert parser.dangling_links == {}